@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Import-time and CLI start-up benchmark for DOI Finder.
+
+Measures, each in fresh interpreters, the time to import ``find_doi.cli`` (from
+``python -X importtime``) and the wall time of ``python -m find_doi --help``,
+and checks that the heavy optional modules are not loaded by a plain
+``import find_doi``. Exits with status 1 when a check fails, so it can guard
+against start-up regressions in CI::
+
+    python benchmarks/import_time.py --max-import-ms 60
+    python benchmarks/import_time.py --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported by the code paths needing them
+HEAVY_MODULES = ("requests", "urllib3", "bibtexparser", "aiohttp", "sqlite3", "asyncio", "concurrent.futures")
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of a module in a fresh interpreter, from -X importtime."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            check=True, capture_output=True, text=True, env=_env()).stderr
+    for line in reversed(stderr.splitlines()):
+        _, cumulative, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative) / 1000
+    raise RuntimeError(f"{module} not found in the -X importtime output")
+
+
+def wall_time_ms(args: List[str]) -> float:
+    """Wall time of running the interpreter with the given arguments."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, check=True, stdout=subprocess.DEVNULL, env=_env())
+    return (time.perf_counter() - start) * 1000
+
+
+def loaded_heavy_modules() -> List[str]:
+    """Heavy modules present in sys.modules after importing the package."""
+    code = f"import sys, find_doi; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    return subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True,
+                          env=_env()).stdout.split()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DOI Finder import-time benchmark",
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--runs", type=int, default=15, help="Fresh interpreters per measurement")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if importing find_doi.cli takes longer")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    # Warm the bytecode cache so the first run does not pay for compilation
+    subprocess.run([sys.executable, "-m", "compileall", "-q", os.path.join(ROOT, "find_doi")], check=True)
+
+    interpreter = statistics.median(wall_time_ms(["-c", "pass"]) for _ in range(args.runs))
+    results = {
+        "python": sys.version.split()[0],
+        "import_find_doi_cli_ms": statistics.median(import_time_ms("find_doi.cli") for _ in range(args.runs)),
+        "help_wall_ms": statistics.median(wall_time_ms(["-m", "find_doi", "--help"]) for _ in range(args.runs)),
+        "interpreter_wall_ms": interpreter,
+        "heavy_modules_loaded": loaded_heavy_modules(),
+    }
+    results["help_overhead_ms"] = results["help_wall_ms"] - interpreter
+
+    print(f"import find_doi.cli           {results['import_find_doi_cli_ms']:8.1f} ms")
+    print(f"python -m find_doi --help     {results['help_wall_ms']:8.1f} ms "
+          f"({results['help_overhead_ms']:.1f} ms over a bare interpreter)")
+    print(f"heavy modules on import       {', '.join(results['heavy_modules_loaded']) or 'none'}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    failed = False
+    if results["heavy_modules_loaded"]:
+        print("FAIL: importing find_doi loads " + ", ".join(results["heavy_modules_loaded"]), file=sys.stderr)
+        failed = True
+    if args.max_import_ms is not None and results["import_find_doi_cli_ms"] > args.max_import_ms:
+        print(f"FAIL: importing find_doi.cli took {results['import_find_doi_cli_ms']:.1f} ms, "
+              f"budget is {args.max_import_ms:.1f} ms", file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
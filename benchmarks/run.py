@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+"""
+Performance benchmarks for DOI Finder against the local mock CrossRef server.
+
+Every scenario runs in a fresh interpreter so peak memory is measured per
+scenario. Results are printed as a table and can be written as JSON and
+compared with an earlier run::
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --sizes 100,1000 --compare results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from find_doi import DOIFinder  # noqa: E402
+from find_doi.mockserver import MockCrossRefServer, synthetic_works  # noqa: E402
+
+SINGLE_LOOKUPS = 200
+
+
+def peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    """Peak resident set size in MiB (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def make_bibtex(works: List[Dict[str, Any]], count: int) -> str:
+    """Build a BibTeX file citing the first count works, without DOIs."""
+    entries = []
+    for number, work in enumerate(works[:count]):
+        author = work["author"][0]
+        entries.append(
+            f"@article{{entry{number},\n  title={{{work['title'][0]}}},\n"
+            f"  author={{{author['family']}, {author['given']}}},\n"
+            f"  journal={{{work['container-title'][0]}}},\n}}\n"
+        )
+    return "\n".join(entries)
+
+
+class TimedFinder(DOIFinder):
+    """DOIFinder recording the latency of every title lookup."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: List[float] = []
+
+    def find_by_metadata(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().find_by_metadata(*args, **kwargs)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+
+def run_scenario(name: str, size: int, api_url: str, workers: int) -> Dict[str, Any]:
+    """Run one scenario in this process and return its measurements."""
+    works = synthetic_works(max(size, SINGLE_LOOKUPS))
+    finder = TimedFinder(base_url=api_url)
+    latencies: List[float] = []
+    start = time.perf_counter()
+    if name == "single":
+        for work in works[:size]:
+            finder.find_by_title(work["title"][0])
+        latencies = finder.latencies
+    elif name == "bibtex":
+        finder.find_from_bibtex(make_bibtex(works, size), max_workers=workers)
+        latencies = finder.latencies
+    elif name == "cli":
+        with tempfile.NamedTemporaryFile("w", suffix=".bib", delete=False) as file:
+            file.write(make_bibtex(works, size))
+        try:
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, "-m", "find_doi", "bibtex", file.name, "--json",
+                 "--workers", str(workers), "--api-url", api_url],
+                check=True, stdout=subprocess.DEVNULL, cwd=ROOT,
+            )
+        finally:
+            os.unlink(file.name)
+    else:
+        raise ValueError(f"Unknown scenario: {name}")
+    seconds = time.perf_counter() - start
+    finder.close()
+
+    return {
+        "operations": size,
+        "seconds": seconds,
+        "throughput": size / seconds if seconds else None,
+        "p50_ms": _ms(percentile(latencies, 0.50)),
+        "p95_ms": _ms(percentile(latencies, 0.95)),
+        "p99_ms": _ms(percentile(latencies, 0.99)),
+        "peak_rss_mb": max(peak_rss_mb(), peak_rss_mb(resource.RUSAGE_CHILDREN)),
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else seconds * 1000
+
+
+def run_isolated(name: str, size: int, api_url: str, workers: int) -> Dict[str, Any]:
+    """Run a scenario in a fresh interpreter and collect its JSON report."""
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", name, "--sizes", str(size), "--api-url", api_url,
+         "--workers", str(workers)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def print_table(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+    """Print the results, with the throughput change against a baseline if given."""
+    header = f"{'scenario':<16}{'ops':>8}{'seconds':>10}{'ops/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'peak MiB':>10}"
+    if baseline:
+        header += f"{'vs base':>10}"
+    print(header)
+
+    def cell(value, width, digits=1):
+        return f"{'-':>{width}}" if value is None else f"{value:>{width}.{digits}f}"
+
+    for result in results:
+        line = (f"{result['name']:<16}{result['operations']:>8}{cell(result['seconds'], 10, 2)}"
+                f"{cell(result['throughput'], 10)}{cell(result['p50_ms'], 9)}{cell(result['p95_ms'], 9)}"
+                f"{cell(result['p99_ms'], 9)}{cell(result['peak_rss_mb'], 10)}")
+        if baseline:
+            previous = baseline.get(result["name"])
+            if previous and previous.get("throughput") and result["throughput"]:
+                line += f"{result['throughput'] / previous['throughput'] - 1:>+10.1%}"
+            else:
+                line += f"{'-':>10}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DOI Finder performance benchmarks",
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000", help="Comma-separated BibTeX batch sizes")
+    parser.add_argument("--cli-sizes", default="100,1000", help="Comma-separated batch sizes for the CLI runs")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent lookups in batch scenarios")
+    parser.add_argument("--latency", type=float, default=0.005, help="Mock server latency per request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.005, help="Maximum random extra latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument("--rate-limit", type=int, default=10000, help="Requests per second advertised by the mock")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare throughput with")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child, int(args.sizes), args.api_url, args.workers)))
+        return
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    cli_sizes = [int(size) for size in args.cli_sizes.split(",") if size]
+    plan = [("single", SINGLE_LOOKUPS)] + [("bibtex", size) for size in sizes] + [("cli", size) for size in cli_sizes]
+
+    server = MockCrossRefServer(synthetic_works(max(sizes + cli_sizes + [SINGLE_LOOKUPS])), latency=args.latency,
+                                jitter=args.jitter, error_rate=args.error_rate,
+                                throttle_rate=args.throttle_rate, rate_limit=args.rate_limit, seed=0)
+    results = []
+    with server:
+        for name, size in plan:
+            requests_before = server.requests
+            result = run_isolated(name, size, server.url, args.workers)
+            result["name"] = f"{name}-{size}" if name != "single" else name
+            result["requests"] = server.requests - requests_before
+            results.append(result)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("child", "api_url")},
+        "results": results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = {result["name"]: result for result in json.load(file)["results"]}
+    print_table(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,40 +2,194 @@
 DOI Finder - A package to find Digital Object Identifiers for academic articles using CrossRef API.
 """
 
-import requests
-import bibtexparser
+import importlib
+import itertools
+import logging
 import re
-from typing import Optional, List
-from dataclasses import dataclass
-
-@dataclass
-class ArticleInfo:
-    """Data class to store article information."""
-    doi: Optional[str] = None
-    title: Optional[str] = None
-    authors: Optional[List[str]] = None
-    year: Optional[int] = None
-    journal: Optional[str] = None
-    publisher: Optional[str] = None
-    url: Optional[str] = None
-    abstract: Optional[str] = None
-    citation_count: Optional[int] = None
-    type: Optional[str] = None  # article, book, conference paper, etc.
+import threading
+import time
+from collections import deque
+from typing import IO, TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, Optional, List, Tuple, Union
+from dataclasses import asdict, replace
+
+from .crossref import (
+    ARTICLE_INFO_FIELDS, DOI_FIELDS, FALLBACK_SCORE, cache_key, decode_json, match_title, parse_article_info,
+    sanitize_title, title_score, works_query_plan,
+)
+from .dedupe import ClusterLookups, cluster_titles, normalize_title
+from .errors import CircuitOpenError, CrossRefError, DeadlineExceeded, RateLimitError, TransientError
+from .metrics import Metrics
+from .models import ArticleInfo, Resolution
+from .ratelimit import RateLimiter, SharedRateLimiter
+from .resilience import (
+    HEDGE_DELAY, CircuitBreaker, LatencyWindow, check_deadline, deadline, map_concurrently, remaining,
+    request_timeout, retry_delay, run_in_context,
+)
+from .singleflight import SingleFlight
+from .tracing import NullTracer, Tracer
+
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    import bibtexparser
+    import requests
+    from .cache import CacheBackend
+    from .checkpoint import Checkpoint
+    from .index import LocalIndex
+
+# requests, bibtexparser, aiohttp and sqlite3 take most of the import time, so the
+# modules needing them are only imported when one of their names is first used
+_LAZY_IMPORTS = {
+    'AsyncDOIFinder': '.aio',
+    'Checkpoint': '.checkpoint',
+    'CacheBackend': '.cache',
+    'LookupCache': '.cache',
+    'MemoryCache': '.cache',
+    'open_cache': '.cache',
+    'RedisCache': '.rediscache',
+    'LocalIndex': '.index',
+    'ResultTable': '.table',
+    'iter_bibtex_entries': '.bibtex',
+    'create_session': '.session',
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
 
 class DOIFinder:
-    def __init__(self, mailto_email=None):
+    def __init__(self, mailto_email=None, cache: Optional[Union["CacheBackend", str]] = None,
+                 session: Optional["requests.Session"] = None, base_url: str = "https://api.crossref.org",
+                 rate_limiter: Optional[RateLimiter] = None, max_retries: int = 5,
+                 index: Optional[Union["LocalIndex", str]] = None, lean: bool = False,
+                 metrics: Optional[Metrics] = None, max_queries: int = 3,
+                 timeout: Optional[Union[float, Tuple[float, float]]] = (5.0, 30.0),
+                 call_deadline: Optional[float] = None, hedge: bool = False,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 dedupe_threshold: Optional[float] = None, tracer: Optional[Tracer] = None,
+                 pool_size: int = 10, transient_retries: int = 2, owns_cache: Optional[bool] = None):
         """
         Initialize the DOI Finder with necessary configurations.
         
         Args:
             mailto_email (str, optional): Email to send to CrossRef API for improved rate limits.
                                          See: https://github.com/CrossRef/rest-api-doc#good-manners--more-reliable-service
+            cache (CacheBackend or str, optional): Cache for lookup results, or a SQLite file path or cache
+                                                   URL to open with `open_cache`
+            session (requests.Session, optional): HTTP session to send requests with, see `create_session`.
+                                                  A pooled session is created on first use and owned by the
+                                                  finder if omitted.
+            base_url (str): Base URL of the CrossRef REST API
+            rate_limiter (RateLimiter, optional): Rate limiter to share with other finders.
+                                                  A limiter following CrossRef's advertised limits is created if omitted.
+            max_retries (int): Number of times a throttled (429) request is retried
+            index (LocalIndex or str, optional): Offline index, or a path to one, consulted before the API
+            lean (bool): Ask CrossRef only for the fields each lookup reads instead of full records
+            metrics (Metrics, optional): Receives request timings, cache hit rates and lookup outcomes.
+                                         A private `Metrics` is created if omitted.
+            max_queries (int): Most searches sent for one title, see `works_query_plan`.
+                               1 only sends the title (and author) query.
+            timeout (float or Tuple[float, float], optional): Connect and read timeouts of every request
+                                                              in seconds, None to wait forever
+            call_deadline (float, optional): Seconds a single lookup may take in total, searches and
+                                             retries included. See `deadline` to bound a whole batch.
+            hedge (bool): Send a duplicate of a request that takes longer than the 95th percentile of
+                          recent response times, and use whichever answers first
+            circuit_breaker (CircuitBreaker, optional): Breaker failing requests fast while CrossRef is
+                                                        failing, to share with other finders. One opening
+                                                        after 5 consecutive failures is created if omitted.
+            dedupe_threshold (float, optional): Title similarity above which BibTeX entries are taken to
+                                                likely cite the same work, e.g. `DEFAULT_THRESHOLD`, see
+                                                `cluster_titles`. A record found for one spelling is only
+                                                shared with the others if their titles match it. None, the
+                                                default, only looks up titles equal after normalization once.
+            tracer (Tracer, optional): Records a span for every stage of every lookup, from parsing
+                                       to matching. Nothing is recorded if omitted.
+            pool_size (int): Connections kept alive by the session created when none is passed in,
+                             at least the number of threads sending requests
+            transient_retries (int): Number of times a request failing with a connection error, a timeout
+                                     or a 5xx response is retried, with exponential backoff. Every attempt
+                                     waits for the rate limiter and counts for the circuit breaker.
+            owns_cache (bool, optional): Whether `close` closes the cache. By default only a cache the
+                                         finder opened from a path or URL is closed.
         """
         self.headers = {
             'User-Agent': 'DOIFinder/0.1.0 (https://github.com/yourusername/doi_finder; mailto:{})'.format(
                 mailto_email if mailto_email else "anonymous@example.com"
             )
         }
+        self._owns_index = isinstance(index, str)
+        if self._owns_index:
+            from .index import LocalIndex
+            index = LocalIndex(index)
+        self.index = index
+        self._owns_cache = isinstance(cache, str) if owns_cache is None else owns_cache
+        if isinstance(cache, str):
+            from .cache import open_cache
+            cache = open_cache(cache)
+        self.cache = cache
+        self._owns_session = session is None
+        self._session = session
+        self.pool_size = pool_size
+        self._session_lock = threading.Lock()
+        self.base_url = base_url.rstrip('/')
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.max_retries = max_retries
+        self.transient_retries = transient_retries
+        self.lean = lean
+        self.max_queries = max_queries
+        self.timeout = (timeout, timeout) if isinstance(timeout, (int, float)) else timeout
+        self.call_deadline = call_deadline
+        self.hedge = hedge
+        self._latency: Dict[str, LatencyWindow] = {}
+        self._hedge_executor = None
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        self.dedupe_threshold = dedupe_threshold
+        # Collapses identical lookups running at the same time into one request
+        self._flight = SingleFlight()
+        self.tracer = tracer if tracer is not None else NullTracer()
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.metrics.gauge("singleflight_calls", lambda: self._flight.calls)
+        self.metrics.gauge("singleflight_shared", lambda: self._flight.shared)
+        self.metrics.gauge("circuit_open", lambda: int(self.circuit_breaker.state == 'open'))
+
+    @property
+    def session(self) -> "requests.Session":
+        """HTTP session used for requests, created on first use unless one was passed in."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    from .session import create_session
+                    self._session = create_session(pool_maxsize=self.pool_size)
+        return self._session
+
+    def close(self) -> None:
+        """Release the HTTP session and cache if they were created by this finder."""
+        if self._owns_session and self._session is not None:
+            self._session.close()
+        if self._hedge_executor is not None:
+            # Duplicates that lost the race are not waited for
+            self._hedge_executor.shutdown(wait=False)
+        if self._owns_cache and self.cache is not None:
+            self.cache.close()
+        if self._owns_index:
+            self.index.close()
+
+    def __enter__(self) -> "DOIFinder":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
         
     def find_by_title(self, title: str, clean_title: bool = True) -> Optional[str]:
         """
@@ -47,6 +201,10 @@ class DOIFinder:
             
         Returns:
             Optional[str]: The DOI if found, None otherwise
+
+        Raises:
+            TransientError: If CrossRef could not be asked, e.g. it kept throttling requests,
+                            the deadline passed or the circuit breaker is open
         """
         doi = self.find_by_metadata(title, clean_title=clean_title)
         if doi:
@@ -56,6 +214,9 @@ class DOIFinder:
     def find_by_title_and_author(self, title: str, author: str, clean_title: bool = True) -> Optional[str]:
         """
         Find DOI for an article by its title and author.
+
+        Raises:
+            TransientError: If CrossRef could not be asked, see `find_by_title`
         """
         doi = self.find_by_metadata(title, author=author, clean_title=clean_title)
         if doi:
@@ -65,13 +226,22 @@ class DOIFinder:
     def find_by_metadata(self, title: str, author: Optional[str] = None, clean_title: bool = True) -> Optional[str]:
         """
         Find DOI for an article by its title and author.
+
+        Raises:
+            TransientError: If CrossRef could not be asked, see `find_by_title`
         """
-        # Try CrossRef API first
-        if clean_title:
-            title = title.lower().strip()
-            # remove extra spaces
-            title = re.sub(r'\s+', ' ', title)
-        doi = self._search_crossref_by_metadata(title, author)
+        with self.tracer.span("find_by_metadata", title=title) as span:
+            # Try CrossRef API first
+            if clean_title:
+                with self.tracer.span("clean_title"):
+                    title = title.lower().strip()
+                    # remove extra spaces
+                    title = re.sub(r'\s+', ' ', title)
+            with deadline(self.call_deadline):
+                doi = self._flight.do(self._get_cache_key("doi", title, author),
+                                      self._search_crossref_by_metadata, title, author)
+            span.set(result="found" if doi else "miss")
+        self.metrics.count("lookups_total", kind="doi", result="found" if doi else "miss")
         if doi:
             return doi
         return None
@@ -85,33 +255,45 @@ class DOIFinder:
             
         Returns:
             Optional[ArticleInfo]: Article information if found, None otherwise
+
+        Raises:
+            TransientError: If CrossRef could not be asked, see `find_by_title`
         """
         # Try CrossRef API first
-        article_infos = self._search_crossref_detailed(title, author)
+        with self.tracer.span("find_article_info", title=title) as span, deadline(self.call_deadline):
+            article_infos = self._flight.do(self._get_cache_key("info", title, author),
+                                            self._search_crossref_detailed, title, author)
+            span.set(result="found" if article_infos else "miss")
+        self.metrics.count("lookups_total", kind="info", result="found" if article_infos else "miss")
         if article_infos:
             return article_infos
     
-    def find_from_bibtex(self, bibtex_str: str, use_metadata: bool = True) -> Optional[List[str]]:
+    def find_from_bibtex(self, bibtex_str: str, use_metadata: bool = True, max_workers: int = 1) -> Optional[List[str]]:
         """
         Find DOIs from a BibTeX entry.
         
         Args:
             bibtex_str (str): The BibTeX entry as a string
             use_metadata (bool): Whether to use metadata (beside title) to help find the DOI
+            max_workers (int): Number of entries resolved concurrently, results keep the input order
 
         Returns:
             Optional[List[str]]: The DOIs if found, None otherwise
+
+        Raises:
+            TransientError: If CrossRef could not be asked for an entry, see `find_by_title`
         """
         try:
-            bib_database = bibtexparser.parse_string(bibtex_str)
+            bib_database = self._parse_bibtex(bibtex_str)
         except Exception as e:
-            print(f"Error parsing BibTeX: {e}")
+            logger.error("Error parsing BibTeX: %s", e)
             return None
             
         if not bib_database.entries:
             return None
 
         dois = []
+        lookups = []
         for entry in bib_database.entries:
             # First check if DOI is directly in the BibTeX
             if 'doi' in entry:
@@ -126,187 +308,771 @@ class DOIFinder:
                         author = entry['author']
                     if 'year' in entry:
                         year = entry['year']
-                dois.append(self.find_by_metadata(entry['title'], author=author))
+                # Reserve the slot so results line up with the input entries
+                lookups.append((len(dois), entry['title'], author))
+                dois.append(None)
+
+        # Entries citing the same work are looked up once
+        found = self._map_clustered(
+            lambda lookup: self.find_by_metadata(lookup[1], author=lookup[2]), lookups,
+            [lookup[1] for lookup in lookups], [lookup[2] for lookup in lookups], max_workers,
+        )
+        for (index, _, _), doi in zip(lookups, found):
+            dois[index] = doi
         return dois
     
-    def find_article_info_from_bibtex(self, bibtex_str: str) -> Optional[List[ArticleInfo]]:
+    def find_article_info_from_bibtex(self, bibtex_str: str, max_workers: int = 1) -> Optional[List[ArticleInfo]]:
         """
         Find detailed article information from a BibTeX entry.
         
         Args:
             bibtex_str (str): The BibTeX entry as a string
+            max_workers (int): Number of entries resolved concurrently, results keep the input order
             
         Returns:
             Optional[List[ArticleInfo]]: Article information if found, None otherwise
+
+        Raises:
+            TransientError: If CrossRef could not be asked for an entry, see `find_by_title`
         """
         try:
-            bib_database = bibtexparser.parse_string(bibtex_str)
+            bib_database = self._parse_bibtex(bibtex_str)
         except Exception as e:
-            print(f"Error parsing BibTeX: {e}")
+            logger.error("Error parsing BibTeX: %s", e)
             return None
             
         if not bib_database.entries:
             return None
                 
+        # Entries that carry a DOI are fetched together in a few batched requests
+        by_doi = iter(self.find_article_info_by_dois(
+            [entry['doi'] for entry in bib_database.entries if 'doi' in entry], max_workers=max_workers
+        ))
+
         article_infos = []
+        lookups = []
         for entry in bib_database.entries:
             # First check if DOI is directly in the BibTeX
             if 'doi' in entry:
-                # Use the DOI to get detailed information
-                article_infos.append(self._search_crossref_by_doi(entry['doi']))
+                article_infos.append(next(by_doi))
                 
             # If no DOI, try to find it using the title
             if 'title' in entry:
-                article_infos.append(self.find_article_info(entry['title']))
-            
+                # Reserve the slot so results line up with the input entries
+                lookups.append((len(article_infos), entry['title'], entry['author'] if 'author' in entry else None))
+                article_infos.append(None)
+
+        found = self._map_clustered(lambda lookup: self.find_article_info(lookup[1]), lookups,
+                                    [lookup[1] for lookup in lookups], [lookup[2] for lookup in lookups], max_workers,
+                                    title_of=lambda article_info: article_info.title)
+        for (index, _, _), article_info in zip(lookups, found):
+            article_infos[index] = article_info
         return article_infos
-    
-    def _search_crossref_by_metadata(self, title: str, author: Optional[str] = None) -> Optional[str]:
-        """Search CrossRef API for the DOI."""
-        url = "https://api.crossref.org/works"
 
+    def find_article_info_by_dois(self, dois: List[str], chunk_size: int = 50,
+                                  max_workers: int = 1) -> List[Optional[ArticleInfo]]:
+        """
+        Find detailed article information for many DOIs with batched requests.
+
+        DOIs are looked up ``chunk_size`` at a time with a single multi-value
+        ``filter=doi:...`` query each, instead of one request per DOI.
+
+        Args:
+            dois (List[str]): The DOIs
+            chunk_size (int): Number of DOIs fetched per request
+            max_workers (int): Number of requests sent concurrently
+
+        Returns:
+            List[Optional[ArticleInfo]]: Article information for each DOI, in input order
+
+        Raises:
+            TransientError: If fetching any of the DOIs failed, see `find_by_title`
+        """
+        resolutions = self.resolve_dois(dois, chunk_size=chunk_size, max_workers=max_workers)
+        errors = list(dict.fromkeys(resolution.error for resolution in resolutions if resolution.error))
+        if errors:
+            # Failed fetches must not look like DOIs CrossRef does not know
+            raise TransientError(f"Fetching {len(errors)} of {len(dois)} DOIs from CrossRef failed: {errors[0]}")
+        return [resolution.article_info for resolution in resolutions]
+
+    def resolve(self, title: Optional[str] = None, author: Optional[str] = None, doi: Optional[str] = None,
+                clean_title: bool = True) -> Resolution:
+        """
+        Find the DOI and article information of a work with as few requests as possible.
+
+        A known DOI is looked up directly, otherwise title/author searches are sent
+        until one matches (see `works_query_plan`), and the matching response is
+        parsed once for both the DOI and the metadata. The number of requests sent
+        is recorded in `Resolution.requests`.
+
+        Args:
+            title (str, optional): The title of the article
+            author (str, optional): Author name to narrow the search
+            doi (str, optional): A known DOI, takes precedence over the title
+            clean_title (bool): Whether to clean/normalize the title before searching
+
+        Returns:
+            Resolution: The combined result, with empty fields if nothing was found
+        """
+        with self.tracer.span("resolve", **({"doi": doi} if doi else {"title": title})) as span:
+            if doi:
+                with deadline(self.call_deadline):
+                    resolution = replace(self._flight.do(("resolve", "work:" + doi.strip().lower()),
+                                                         self._resolve_doi, doi))
+            elif title:
+                if clean_title:
+                    with self.tracer.span("clean_title"):
+                        title = re.sub(r'\s+', ' ', title.lower().strip())
+                with deadline(self.call_deadline):
+                    resolution = replace(self._flight.do(("resolve", self._get_cache_key("info", title, author)),
+                                                         self._resolve_title, title, author))
+            else:
+                resolution = Resolution()
+            span.set(result=resolution.status, source=resolution.source or "", requests=resolution.requests)
+        self.metrics.count("lookups_total", kind="resolve", result=resolution.status)
+        return resolution
+
+    def _resolve_title(self, title: str, author: Optional[str] = None) -> Resolution:
+        """Resolve a work by title, following the search plan until a result matches."""
+        resolution = self._resolve_title_locally(title, author)
+        if resolution is not None:
+            return resolution
+
+        requests = [0]
+        try:
+            item = self._search_works(title, author, ARTICLE_INFO_FIELDS, requests)
+            article_info = parse_article_info(item) if item else None
+        except Exception as e:
+            # Reported through the result so callers can tell failures from misses
+            return Resolution(error=str(e), requests=requests[0])
+        if article_info is None:
+            return Resolution(requests=requests[0])
+        self._remember_title(title, author, item['DOI'], article_info)
+        return Resolution(doi=item['DOI'], article_info=article_info, score=item.get('score'),
+                          source='search', requests=requests[0])
+
+    def _resolve_title_locally(self, title: str, author: Optional[str] = None,
+                               kind: str = "info") -> Optional[Resolution]:
+        """
+        Resolve a title from the offline index or the cache, without any request.
+
+        Every title lookup consults the sources in the same order: the index, the
+        cache entry of ``kind`` and then the remembered misses.
+
+        Args:
+            title (str): The cleaned title
+            author (str, optional): Author name of the query
+            kind (str): ``info`` for cached article information, ``doi`` for a cached DOI alone
+
+        Returns:
+            Optional[Resolution]: The result, an empty one for a known miss, None to search CrossRef
+        """
+        if self.index is not None:
+            article_info = self._tally("index", self.index.lookup_title(title, author))
+            if article_info is not None:
+                return Resolution(doi=article_info.doi, article_info=article_info, source='index')
+        if self.cache is not None:
+            cached = self._tally("cache", self.cache.get(self._get_cache_key(kind, title, author)))
+            if cached is not None and kind == "doi":
+                return Resolution(doi=cached, source='cache')
+            if cached is not None:
+                return Resolution(doi=cached['doi'], article_info=ArticleInfo(**cached), source='cache')
+        if self._known_miss(title, author):
+            return Resolution(source='cache')
+        return None
+
+    def _remember_title(self, title: str, author: Optional[str], doi: str,
+                        article_info: Optional[ArticleInfo] = None) -> None:
+        """Cache the DOI, and the article information if given, found by searching a title."""
+        if article_info is not None:
+            self._cache_set(self._get_cache_key("info", title, author), asdict(article_info))
+        self._cache_set(self._get_cache_key("doi", title, author), doi)
+
+    def _cache_set(self, key: str, value: Any) -> None:
+        """Store a lookup result in the cache; the result stands even if the cache cannot store it."""
+        if self.cache is None:
+            return
+        try:
+            self.cache.set(key, value)
+        except Exception as e:
+            self.metrics.count("cache_write_errors_total")
+            logger.warning("Error writing to the lookup cache: %s", e)
+
+    def resolve_bibtex(self, bibtex_str: str, use_metadata: bool = True, max_workers: int = 1) -> Optional[List[Resolution]]:
+        """
+        Resolve every BibTeX entry, sending only the searches each entry needs.
+
+        Entries that carry a DOI are looked up by DOI only, the others are searched
+        by title (and author when use_metadata is set).
+
+        Args:
+            bibtex_str (str): The BibTeX entries as a string
+            use_metadata (bool): Whether to use metadata (beside title) to help find the DOI
+            max_workers (int): Number of entries resolved concurrently, results keep the input order
+
+        Returns:
+            Optional[List[Resolution]]: One result per entry, None if the BibTeX could not be parsed
+        """
+        try:
+            bib_database = self._parse_bibtex(bibtex_str)
+        except Exception as e:
+            logger.error("Error parsing BibTeX: %s", e)
+            return None
+
+        if not bib_database.entries:
+            return None
+
+        entries = bib_database.entries
+        with_doi = [entry for entry in entries if 'doi' in entry]
+        by_doi = iter(self.resolve_dois([entry['doi'] for entry in with_doi], max_workers=max_workers))
+        by_title = iter(self.resolve_entries([entry for entry in entries if 'doi' not in entry],
+                                             use_metadata=use_metadata, max_workers=max_workers))
+        resolutions = []
+        for entry in entries:
+            resolution = replace(next(by_doi) if 'doi' in entry else next(by_title))
+            resolution.key = entry.key
+            resolutions.append(resolution)
+        return resolutions
+
+    def resolve_entries(self, entries: List["bibtexparser.model.Entry"], use_metadata: bool = True,
+                        max_workers: int = 1) -> List[Resolution]:
+        """
+        Resolve BibTeX entries that were already parsed, see `resolve`.
+
+        Entries whose titles cite the same work are looked up once and share
+        the result.
+
+        Args:
+            entries (List[bibtexparser.model.Entry]): The parsed entries
+            use_metadata (bool): Whether to use metadata (beside title) to help find the DOI
+            max_workers (int): Number of entries resolved concurrently
+
+        Returns:
+            List[Resolution]: One result per entry, in input order, carrying the entry's key
+        """
+        return self._map_entries(entries, use_metadata, max_workers)
+
+    def iter_resolve_bibtex(self, source: Union[str, IO[str]], use_metadata: bool = True,
+                            max_workers: int = 1, checkpoint: Optional["Checkpoint"] = None,
+                            fetch_dois: bool = True) -> Iterator[Resolution]:
+        """
+        Resolve BibTeX entries while they are being read, yielding results in input order.
+
+        Entries are parsed incrementally from the source and only a small window of
+        them is in flight at a time, so memory stays flat however large the input is.
+
+        Args:
+            source (str or IO[str]): BibTeX text or a text stream, e.g. an open file
+            use_metadata (bool): Whether to use metadata (beside title) to help find the DOI
+            max_workers (int): Number of entries resolved concurrently
+            checkpoint (Checkpoint, optional): Journal that records every resolution as it completes.
+                                               Entries it already resolved are not looked up again,
+                                               entries that failed are retried.
+            fetch_dois (bool): Whether entries that carry a DOI are looked up by DOI for their
+                               article information. Otherwise their DOI is returned as is, without
+                               a request, when only DOIs are needed.
+
+        Yields:
+            Resolution: One result per entry
+        """
+        from concurrent.futures import Future, ThreadPoolExecutor
+
+        from .bibtex import iter_bibtex_entries
+        from .checkpoint import entry_fingerprint
+
+        def resolved(entry):
+            """Return the entry fingerprint and its recorded resolution, if any."""
+            if checkpoint is None:
+                return None, None
+            fingerprint = entry_fingerprint(entry)
+            return fingerprint, checkpoint.get(fingerprint)
+
+        def completed(fingerprint, resolution):
+            if checkpoint is not None:
+                checkpoint.record(fingerprint, resolution)
+            return resolution
+
+        entries = iter_bibtex_entries(source)
+        if max_workers <= 1:
+            for entry in entries:
+                fingerprint, done = resolved(entry)
+                yield done or completed(fingerprint, self._resolve_entry(entry, use_metadata, fetch_dois))
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque()
+            for entry in entries:
+                fingerprint, done = resolved(entry)
+                pending.append((fingerprint, done or executor.submit(run_in_context(self._resolve_entry), entry,
+                                                                     use_metadata, fetch_dois)))
+                if len(pending) >= 2 * max_workers:
+                    fingerprint, result = pending.popleft()
+                    yield completed(fingerprint, result.result()) if isinstance(result, Future) else result
+            while pending:
+                fingerprint, result = pending.popleft()
+                yield completed(fingerprint, result.result()) if isinstance(result, Future) else result
+
+    def _resolve_entry(self, entry, use_metadata: bool = True, fetch_dois: bool = True) -> Resolution:
+        """Resolve a parsed BibTeX entry, taking its DOI as is unless fetch_dois is set."""
+        if not fetch_dois and 'doi' in entry:
+            return Resolution(doi=entry['doi'], source='bibtex', key=entry.key)
+        author = entry['author'] if use_metadata and 'author' in entry else None
+        with self.tracer.span("entry", key=entry.key):
+            resolution = self.resolve(
+                title=entry['title'] if 'title' in entry else None,
+                author=author,
+                doi=entry['doi'] if 'doi' in entry else None,
+            )
+        resolution.key = entry.key
+        return resolution
+
+    def _resolve_doi(self, doi: str) -> Resolution:
+        """Resolve a known DOI to its article information."""
+        resolution = self._resolve_doi_locally(doi)
+        if resolution is not None:
+            return resolution
+
+        try:
+            response = self._get(f"{self.base_url}/works/{doi}")
+            article_info = (parse_article_info(self._decode(response)['message'])
+                            if response.status_code == 200 else None)
+        except Exception as e:
+            return Resolution(doi=doi, source='bibtex', error=str(e), requests=1)
+        if article_info is None:
+            # CrossRef does not know the DOI, keep the one from the input
+            return Resolution(doi=doi, source='bibtex', requests=1)
+        self._cache_set("work:" + doi.strip().lower(), asdict(article_info))
+        return Resolution(doi=article_info.doi or doi, article_info=article_info, source='doi', requests=1)
+
+    def _resolve_doi_locally(self, doi: str) -> Optional[Resolution]:
+        """Resolve a DOI from the offline index or the cache, without any request."""
+        if self.index is not None:
+            article_info = self._tally("index", self.index.lookup_doi(doi))
+            if article_info is not None:
+                return Resolution(doi=article_info.doi, article_info=article_info, source='index')
+        if self.cache is not None:
+            cached = self._tally("cache", self.cache.get("work:" + doi.strip().lower()))
+            if cached is not None:
+                return Resolution(doi=cached['doi'] or doi, article_info=ArticleInfo(**cached), source='cache')
+        return None
+
+    def resolve_dois(self, dois: List[str], chunk_size: int = 50, max_workers: int = 1) -> List[Resolution]:
+        """
+        Resolve many DOIs, see `resolve`.
+
+        DOIs found in the index or the cache are answered from there, the others
+        are fetched ``chunk_size`` at a time with one filtered request each, see
+        `find_article_info_by_dois`. Failed fetches are reported in the results
+        instead of being raised.
+
+        Args:
+            dois (List[str]): The DOIs
+            chunk_size (int): Number of DOIs fetched per request
+            max_workers (int): Number of requests sent concurrently
+
+        Returns:
+            List[Resolution]: One result per DOI, in input order
+        """
+        resolved = {}
+        missing = {}
+        for doi in dois:
+            key = doi.strip().lower()
+            if key in resolved or key in missing:
+                continue
+            resolution = self._resolve_doi_locally(doi)
+            if resolution is not None:
+                resolved[key] = resolution
+            elif ',' in doi:
+                # Commas separate filter values, such DOIs have to be fetched on their own
+                resolved[key] = self._resolve_doi(doi)
+            else:
+                missing[key] = doi.strip()
+
+        missing = list(missing.values())
+        chunks = [missing[start:start + chunk_size] for start in range(0, len(missing), chunk_size)]
+        for chunk_resolutions in map_concurrently(self._fetch_doi_chunk, chunks, max_workers):
+            resolved.update(chunk_resolutions)
+        resolutions = [replace(resolved[doi.strip().lower()]) for doi in dois]
+        for resolution in resolutions:
+            self.metrics.count("lookups_total", kind="resolve", result=resolution.status)
+        return resolutions
+
+    def _fetch_doi_chunk(self, dois: List[str]) -> Dict[str, Resolution]:
+        """Fetch the records of several DOIs with one filtered `/works` request."""
         params = {
-            "query.title": title,
-            "rows": 5,  # Increased rows for better matching
-            "sort": "score",  # Sort by relevance score
-            "order": "desc"
+            "filter": ",".join(f"doi:{doi}" for doi in dois),
+            "rows": len(dois),
         }
+        if self.lean:
+            params["select"] = ",".join(ARTICLE_INFO_FIELDS)
+        with self.tracer.span("fetch_dois", dois=len(dois)):
+            try:
+                with deadline(self.call_deadline):
+                    response = self._get(f"{self.base_url}/works", params)
+                if response.status_code != 200:
+                    # A single malformed DOI fails the whole filter, look them up one by one
+                    return {doi.lower(): self._resolve_doi(doi) for doi in dois}
+                found = {item['DOI'].lower(): parse_article_info(item)
+                         for item in self._decode(response)['message']['items']}
+            except Exception as e:
+                return {doi.lower(): Resolution(doi=doi, source='bibtex', error=str(e), requests=1) for doi in dois}
+            for key, article_info in found.items():
+                self._cache_set("work:" + key, asdict(article_info))
+
+        # Every DOI of the chunk is counted as taking the one shared request
+        resolutions = {}
+        for doi in dois:
+            article_info = found.get(doi.lower())
+            if article_info is None:
+                # CrossRef does not know the DOI, keep the one from the input
+                resolutions[doi.lower()] = Resolution(doi=doi, source='bibtex', requests=1)
+            else:
+                resolutions[doi.lower()] = Resolution(doi=article_info.doi, article_info=article_info, source='doi',
+                                                      requests=1)
+        return resolutions
+
+    def _map_entries(self, entries: List["bibtexparser.model.Entry"], use_metadata: bool = True,
+                     max_workers: int = 1) -> List[Resolution]:
+        """Resolve BibTeX entries by title, once per cluster of entries citing the same work."""
+        resolutions = self._map_clustered(
+            lambda entry: self._resolve_entry(entry, use_metadata), entries,
+            [entry['title'] if 'title' in entry else None for entry in entries],
+            [entry['author'] if use_metadata and 'author' in entry else None for entry in entries],
+            max_workers, settled=lambda resolution: resolution.status != 'miss',
+            title_of=lambda resolution: resolution.article_info.title if resolution.article_info else None,
+        )
+        # Entries of a cluster share one resolution, each gets a copy with its own key
+        return [replace(resolution, key=entry.key) for entry, resolution in zip(entries, resolutions)]
+
+    def _map_clustered(self, func: Callable[[Any], Any], items: List[Any], titles: List[Optional[str]],
+                       authors: List[Optional[str]], max_workers: int = 1,
+                       settled: Callable[[Any], bool] = bool,
+                       title_of: Optional[Callable[[Any], Optional[str]]] = None) -> List[Any]:
+        """
+        Apply func to one item per cluster of items citing the same work, see `ClusterLookups`.
+
+        The result of a cluster's representative is shared by the items of the
+        same spelling, and by the other items of the cluster whose title
+        matches the record found. The others are resolved on their own.
+
+        Args:
+            func (Callable): Resolves one item
+            items (List): The items
+            titles (List[str]): The title of each item
+            authors (List[str]): The author field of each item, or None
+            max_workers (int): Number of items resolved concurrently
+            settled (Callable): Whether a result is final
+            title_of (Callable, optional): Title of the record in a result, None if results
+                                           carry no title to check other spellings against
+
+        Returns:
+            List: The result of each item, in input order
+        """
+        with self.tracer.span("cluster_titles", entries=len(items)) as span:
+            clusters = cluster_titles(titles, authors, threshold=self.dedupe_threshold)
+            span.set(clusters=len(clusters))
+        lookups = ClusterLookups(clusters, titles, settled=settled, title_of=title_of)
+        while lookups.pending():
+            lookups.record(map_concurrently(func, [items[index] for index in lookups.pending()], max_workers))
+        duplicates = len(items) - lookups.lookups
+        if duplicates:
+            self.metrics.count("duplicate_entries_total", duplicates)
+        return lookups.results
+
+    def _get(self, url: str, params: Optional[dict] = None) -> "requests.Response":
+        """
+        Send a rate-limited GET request, retrying throttled and failed responses.
+
+        Requests are not sent while the circuit breaker is open or when the
+        current deadline would pass while waiting for the rate limiter. Failed
+        requests are retried here rather than by the session, so that every
+        attempt is rate limited, counted by the circuit breaker and measured.
+
+        Raises:
+            TransientError: On connection failures, timeouts and 5xx responses, after all retries
+            RateLimitError: When CrossRef keeps throttling after all retries
+            DeadlineExceeded: When the deadline of the lookup or batch passed
+            CircuitOpenError: While CrossRef keeps failing
+        """
+        import requests
+
+        endpoint = "filter" if params and "filter" in params else "search" if url.endswith("/works") else "work"
+        throttled = failures = 0
+        for attempt in itertools.count():
+            with self.tracer.span("rate_limit_wait"):
+                try:
+                    self.circuit_breaker.before_request()
+                    wait = self.rate_limiter.reserve()
+                    check_deadline(wait)
+                except CircuitOpenError:
+                    self.metrics.count("circuit_rejections_total", endpoint=endpoint)
+                    raise
+                except DeadlineExceeded:
+                    self.circuit_breaker.abandoned()
+                    self.metrics.count("deadline_exceeded_total", endpoint=endpoint)
+                    raise
+                if wait > 0:
+                    time.sleep(wait)
+            self.metrics.observe("rate_limit_wait_seconds", wait)
+            timeout = request_timeout(self.timeout)
+            start = time.perf_counter()
+            try:
+                with self.tracer.span("http_request", endpoint=endpoint, attempt=attempt) as span:
+                    response = self._send(url, params, endpoint, timeout)
+                    span.set(status=response.status_code, bytes=len(response.content))
+            except requests.RequestException as e:
+                self.metrics.observe("http_request_seconds", time.perf_counter() - start, endpoint=endpoint)
+                self.metrics.count("http_requests_total", endpoint=endpoint, status="error")
+                if timeout != self.timeout and remaining() <= 0:
+                    # The deadline cut the timeout short and has passed, whether
+                    # requests reports it as a timeout or as a connection error
+                    self.circuit_breaker.abandoned()
+                    self.metrics.count("deadline_exceeded_total", endpoint=endpoint)
+                    raise DeadlineExceeded("Deadline exceeded before CrossRef answered") from e
+                self.circuit_breaker.failed()
+                error, cause = TransientError(f"Request to CrossRef failed: {e}"), e
+            else:
+                seconds = time.perf_counter() - start
+                self.metrics.observe("http_request_seconds", seconds, endpoint=endpoint)
+                # Time until the response headers arrived, covering connection setup and server latency
+                self.metrics.observe("http_first_byte_seconds", response.elapsed.total_seconds(), endpoint=endpoint)
+                self.metrics.count("http_requests_total", endpoint=endpoint, status=response.status_code)
+                self.metrics.count("http_response_bytes_total", len(response.content), endpoint=endpoint)
+                self.rate_limiter.update_from_headers(response.headers)
+                if response.status_code < 500:
+                    self.circuit_breaker.succeeded()
+                    if response.status_code != 429:
+                        self.rate_limiter.succeeded()
+                        if response.status_code == 200:
+                            self._latency_window(endpoint).add(seconds)
+                        return response
+                    throttled += 1
+                    if throttled > self.max_retries:
+                        raise RateLimitError(f"CrossRef is still throttling requests after {self.max_retries} retries")
+                    self.rate_limiter.backoff(response.headers.get('Retry-After'))
+                    continue
+                self.circuit_breaker.failed()
+                error, cause = TransientError(f"CrossRef returned HTTP {response.status_code}"), None
+            failures += 1
+            delay = retry_delay(failures) if failures <= self.transient_retries else None
+            if delay is None:
+                raise error from cause
+            self.metrics.count("http_retries_total", endpoint=endpoint)
+            with self.tracer.span("retry_backoff", failures=failures):
+                time.sleep(delay)
+
+    def _send(self, url: str, params: Optional[dict], endpoint: str,
+              timeout: Optional[Tuple[float, float]]) -> "requests.Response":
+        """Send one GET request, hedged with a duplicate if it is slower than usual."""
+        def send():
+            return self.session.get(url, params=params, headers=self.headers, timeout=timeout)
+
+        if not self.hedge:
+            return send()
+        delay = self._latency_window(endpoint).quantile(0.95)
+        return self._hedged(send, HEDGE_DELAY if delay is None else delay, endpoint)
+
+    def _hedged(self, send: Callable[[], "requests.Response"], delay: float, endpoint: str) -> "requests.Response":
+        """
+        Call send, and call it a second time if it has not returned after delay seconds.
+
+        Returns the first response received. The duplicate takes a rate limiter
+        token, and is not sent if that would mean waiting for one, nor when the
+        deadline passes before delay is up.
+        """
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        left = remaining()
+        if left is not None and left <= delay:
+            # A duplicate could not be sent before the deadline
+            return send()
+        if self._hedge_executor is None:
+            with self._session_lock:
+                if self._hedge_executor is None:
+                    self._hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="find-doi-hedge")
+        primary = self._hedge_executor.submit(run_in_context(send))
+        if not wait([primary], timeout=delay).done:
+            if not self.rate_limiter.try_acquire():
+                # No token to spare, keep waiting for the first request
+                return primary.result()
+            backup = self._hedge_executor.submit(run_in_context(send))
+            futures = {primary, backup}
+            while futures:
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        self.metrics.count("hedged_requests_total", endpoint=endpoint,
+                                           won="hedge" if future is backup else "primary")
+                        return future.result()
+            self.metrics.count("hedged_requests_total", endpoint=endpoint, won="none")
+        return primary.result()
+
+    def _latency_window(self, endpoint: str) -> LatencyWindow:
+        """Recent response times of an endpoint."""
+        window = self._latency.get(endpoint)
+        if window is None:
+            window = self._latency.setdefault(endpoint, LatencyWindow())
+        return window
+
+    def _search_crossref_by_metadata(self, title: str, author: Optional[str] = None) -> Optional[str]:
+        """Search CrossRef API for the DOI."""
+        resolution = self._resolve_title_locally(title, author, kind="doi")
+        if resolution is not None:
+            return resolution.doi
 
-        if author:
-            params["query.author"] = author
-        
         try:
-            response = requests.get(url, params=params, headers=self.headers)
-            if response.status_code == 200:
-                data = response.json()
-                if data['message']['items']:
-                    # Look through the top results to find the best title match
-                    for item in data['message']['items']:
-                        if 'title' in item and item['title']:
-                            # if title is exactly the same, return the DOI
-                            _sanitized_title = self._get_sanitized_title(title)
-                            _sanitized_item_title = self._get_sanitized_title(item['title'][0])
-                            if _sanitized_title == _sanitized_item_title:
-                                return item['DOI']
-                    
+            item = self._search_works(title, author, DOI_FIELDS)
+        except TransientError:
+            raise
         except Exception as e:
-            print(f"Error searching CrossRef: {e}")
-            
-        return None
+            # A malformed response, reported as not found
+            logger.warning("Error searching CrossRef: %s", e)
+            return None
+        if not item:
+            return None
+        self._remember_title(title, author, item['DOI'])
+        return item['DOI']
     
     def _search_crossref_by_doi(self, doi: str) -> Optional[ArticleInfo]:
         """Search CrossRef API for detailed article information using DOI."""
+        with deadline(self.call_deadline):
+            return self._flight.do("work:" + doi.strip().lower(), self._fetch_crossref_by_doi, doi)
+
+    def _fetch_crossref_by_doi(self, doi: str) -> Optional[ArticleInfo]:
+        """Look a DOI up in the index, the cache and then the CrossRef API."""
+        resolution = self._resolve_doi_locally(doi)
+        if resolution is not None:
+            return resolution.article_info
+
         try:
-            url = f"https://api.crossref.org/works/{doi}"
-            
-            response = requests.get(url, headers=self.headers)
-            if response.status_code == 200:
-                data = response.json()
-                item = data['message']
-                
-                # Extract authors
-                authors = []
-                if 'author' in item:
-                    for author in item['author']:
-                        if 'given' in author and 'family' in author:
-                            authors.append(f"{author['given']} {author['family']}")
-                        elif 'family' in author:
-                            authors.append(author['family'])
-                
-                # Extract year
-                year = None
-                if 'published-print' in item:
-                    year = item['published-print']['date-parts'][0][0]
-                elif 'published-online' in item:
-                    year = item['published-online']['date-parts'][0][0]
-                elif 'created' in item:
-                    year = item['created']['date-parts'][0][0]
-                
-                return ArticleInfo(
-                    doi=item.get('DOI'),
-                    title=item.get('title', [None])[0],
-                    authors=authors,
-                    year=year,
-                    journal=item.get('container-title', [None])[0] if item.get('container-title') else None,
-                    publisher=item.get('publisher'),
-                    url=item.get('URL'),
-                    abstract=item.get('abstract'),
-                    type=item.get('type')
-                )
-                    
+            response = self._get(f"{self.base_url}/works/{doi}")
+            if response.status_code != 200:
+                return None
+            article_info = parse_article_info(self._decode(response)['message'])
+        except TransientError:
+            raise
         except Exception as e:
-            print(f"Error searching CrossRef by DOI: {e}")
-            
-        return None
+            logger.warning("Error searching CrossRef by DOI: %s", e)
+            return None
+        self._cache_set("work:" + doi.strip().lower(), asdict(article_info))
+        return article_info
     
     def _search_crossref_detailed(self, title: str, author: Optional[str] = None) -> Optional[ArticleInfo]:
         """Search CrossRef API for detailed article information."""
-        url = "https://api.crossref.org/works"
-        params = {
-            "query.title": title,
-            "rows": 5,  # Increased rows for better matching
-            "sort": "score",  # Sort by relevance score
-            "order": "desc"
-        }
-
-        if author:
-            params["query.author"] = author
+        resolution = self._resolve_title_locally(title, author)
+        if resolution is not None:
+            return resolution.article_info
 
         try:
-            response = requests.get(url, params=params, headers=self.headers)
-            if response.status_code == 200:
-                data = response.json()
-                if data['message']['items']:
-                    # Look through the top results to find the best title match
-                    for item in data['message']['items']:
-                        if 'title' in item and item['title']:
-                            # Exact match but only characters are important
-                            _sanitized_title = self._get_sanitized_title(title)
-                            _sanitized_item_title = self._get_sanitized_title(item['title'][0])
-                            if _sanitized_title == _sanitized_item_title:
-                                # Extract authors
-                                authors = []
-                                if 'author' in item:
-                                    for author in item['author']:
-                                        if 'given' in author and 'family' in author:
-                                            authors.append(f"{author['given']} {author['family']}")
-                                        elif 'family' in author:
-                                            authors.append(author['family'])
-                                
-                                # Extract year
-                                year = None
-                                if 'published-print' in item:
-                                    year = item['published-print']['date-parts'][0][0]
-                                elif 'published-online' in item:
-                                    year = item['published-online']['date-parts'][0][0]
-                                elif 'created' in item:
-                                    year = item['created']['date-parts'][0][0]
-                                
-                                return ArticleInfo(
-                                    doi=item.get('DOI'),
-                                    title=item.get('title', [None])[0],
-                                    authors=authors,
-                                    year=year,
-                                    journal=item.get('container-title', [None])[0] if item.get('container-title') else None,
-                                    publisher=item.get('publisher'),
-                                    url=item.get('URL'),
-                                    abstract=item.get('abstract'),
-                                    type=item.get('type')
-                                )
-                    
+            item = self._search_works(title, author, ARTICLE_INFO_FIELDS)
+            article_info = parse_article_info(item) if item else None
+        except TransientError:
+            raise
         except Exception as e:
-            print(f"Error searching CrossRef: {e}")
-            
-        return None
+            logger.warning("Error searching CrossRef: %s", e)
+            return None
+        if article_info is not None:
+            self._remember_title(title, author, item['DOI'], article_info)
+        return article_info
     
+    def _search_works(self, title: str, author: Optional[str], fields, requests: Optional[List[int]] = None
+                      ) -> Optional[dict]:
+        """
+        Send the searches of the query plan for a title until one of them finds it.
+
+        Args:
+            title (str): The title to search for
+            author (str, optional): Author name to narrow the search
+            fields (Sequence[str]): Fields read from the results, requested in lean mode
+            requests (List[int], optional): Its first item is increased by every request sent
+
+        Returns:
+            Optional[dict]: The work record matching the title, None if no search found it.
+            When every search was answered without a match, the miss is cached.
+
+        Raises:
+            TransientError: On connection failures and 5xx responses, which are not cached
+            RateLimitError: When CrossRef keeps throttling requests
+        """
+        for step, params in works_query_plan(title, author, select=self._select(fields))[:self.max_queries]:
+            if requests is not None:
+                requests[0] += 1
+            with self.tracer.span("search", step=step) as span:
+                response = self._get(f"{self.base_url}/works", params)
+                if response.status_code != 200:
+                    # The other searches would be refused the same way
+                    self.metrics.count("search_queries_total", step=step, result="failed")
+                    return None
+                items = self._decode(response)['message']['items']
+                # Look through the top results, stopping at the first title match
+                item = self._match(items, title)
+                span.set(result="match" if item else "miss")
+            self.metrics.count("search_queries_total", step=step, result="match" if item else "miss")
+            if item is not None:
+                return item
+            if step == "title" and title_score(items, title) < FALLBACK_SCORE:
+                # Nothing close to the title came back, wider searches will not find it either
+                break
+            if not items and step == "bibliographic":
+                # The broadest search found nothing, the title-only one will not either
+                break
+        # Every search was answered without a match, failed requests raised before getting here
+        if self.cache is not None:
+            try:
+                self.cache.set_miss(self._get_cache_key("miss", title, author))
+            except Exception as e:
+                self.metrics.count("cache_write_errors_total")
+                logger.warning("Error writing to the lookup cache: %s", e)
+        return None
+
+    def _known_miss(self, title: str, author: Optional[str] = None) -> bool:
+        """Whether the cache remembers that searching for a title found nothing."""
+        if self.cache is None:
+            return False
+        known = self.cache.is_miss(self._get_cache_key("miss", title, author))
+        self.metrics.count("negative_cache_lookups_total", result="hit" if known else "miss")
+        return known
+
+    def _parse_bibtex(self, bibtex_str: str):
+        """Parse BibTeX text into a bibtexparser library, timing the parse."""
+        import bibtexparser
+
+        with self.tracer.span("parse_bibtex", bytes=len(bibtex_str)), \
+                self.metrics.timer("stage_seconds", stage="parse_bibtex"):
+            return bibtexparser.parse_string(bibtex_str)
+
+    def _decode(self, response: "requests.Response") -> Any:
+        """Decode a JSON response body, timing the decoding."""
+        with self.tracer.span("decode"), self.metrics.timer("stage_seconds", stage="decode"):
+            return decode_json(response.content)
+
+    def _match(self, items: List[dict], title: str) -> Optional[dict]:
+        """Pick the search result matching the title, timing the title comparison."""
+        with self.tracer.span("match", candidates=len(items)), self.metrics.timer("stage_seconds", stage="match"):
+            return match_title(items, title)
+
+    def _tally(self, tier: str, value: Any) -> Any:
+        """Count a cache or index lookup as a hit or a miss and return its result."""
+        self.metrics.count(f"{tier}_lookups_total", result="miss" if value is None else "hit")
+        return value
+
+    def _select(self, fields):
+        """Return the fields to request in lean mode, None to request full records."""
+        return fields if self.lean else None
+
     def _get_sanitized_title(self, title: str) -> str:
         """Sanitize the title by removing special characters and converting to lowercase."""
-        _sanitized_title = title.lower().strip()
-        # remove special characters using regex
-        _sanitized_title = re.sub(r'[^\w\s]', '', _sanitized_title)
-        # remove all spaces
-        _sanitized_title = re.sub(r'\s+', '', _sanitized_title)
-        return _sanitized_title
+        return sanitize_title(title)
+
+    def _get_cache_key(self, kind: str, title: str, author: Optional[str] = None) -> str:
+        """Build the cache key for a title/author query."""
+        return cache_key(kind, title, author)
 
 # Export the classes
-__all__ = ['DOIFinder', 'ArticleInfo']
\ No newline at end of file
+__all__ = [
+    'DOIFinder', 'AsyncDOIFinder', 'ArticleInfo', 'Resolution', 'LookupCache', 'MemoryCache',
+    'RedisCache', 'CacheBackend', 'open_cache', 'RateLimiter',
+    'SharedRateLimiter', 'create_session', 'Checkpoint', 'LocalIndex', 'Metrics', 'ResultTable', 'iter_bibtex_entries',
+    'CircuitBreaker', 'deadline', 'cluster_titles', 'normalize_title', 'Tracer',
+    'CrossRefError', 'TransientError', 'RateLimitError', 'DeadlineExceeded', 'CircuitOpenError',
+]
\ No newline at end of file
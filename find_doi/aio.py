@@ -0,0 +1,699 @@
+"""
+Asynchronous DOI Finder client built on aiohttp.
+"""
+
+import asyncio
+import functools
+import itertools
+import logging
+import re
+import time
+from dataclasses import asdict, replace
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+import bibtexparser
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from .cache import CacheBackend, open_cache
+from .crossref import (
+    ARTICLE_INFO_FIELDS, DOI_FIELDS, FALLBACK_SCORE, cache_key, decode_json, match_title, parse_article_info,
+    title_score, works_query_plan,
+)
+from .dedupe import ClusterLookups, cluster_titles
+from .errors import CircuitOpenError, DeadlineExceeded, RateLimitError, TransientError
+from .index import LocalIndex
+from .metrics import Metrics
+from .models import ArticleInfo, Resolution
+from .ratelimit import RateLimiter
+from .resilience import (
+    HEDGE_DELAY, CircuitBreaker, LatencyWindow, check_deadline, deadline, remaining, request_timeout, retry_delay,
+)
+from .singleflight import AsyncSingleFlight
+from .tracing import NullTracer, Tracer
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDOIFinder:
+    """asyncio counterpart of `DOIFinder` with the same lookup methods."""
+
+    def __init__(self, mailto_email=None, cache: Optional[Union[CacheBackend, str]] = None,
+                 session: Optional["aiohttp.ClientSession"] = None, base_url: str = "https://api.crossref.org",
+                 max_concurrency: int = 10, rate_limiter: Optional[RateLimiter] = None, max_retries: int = 5,
+                 index: Optional[Union[LocalIndex, str]] = None, lean: bool = False,
+                 metrics: Optional[Metrics] = None, max_queries: int = 3,
+                 timeout: Optional[Union[float, Tuple[float, float]]] = (5.0, 30.0),
+                 call_deadline: Optional[float] = None, hedge: bool = False,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 dedupe_threshold: Optional[float] = None, tracer: Optional[Tracer] = None,
+                 transient_retries: int = 2, owns_cache: Optional[bool] = None):
+        """
+        Initialize the asynchronous DOI Finder.
+
+        Args:
+            mailto_email (str, optional): Email to send to CrossRef API for improved rate limits
+            cache (CacheBackend or str, optional): Cache for lookup results, or a SQLite file path or cache
+                                                   URL to open with `open_cache`
+            session (aiohttp.ClientSession, optional): HTTP session to send requests with.
+                                                       A pooled session is created on first use if omitted.
+            base_url (str): Base URL of the CrossRef REST API
+            max_concurrency (int): Maximum number of requests in flight at once
+            rate_limiter (RateLimiter, optional): Rate limiter to share with other finders, threads or tasks
+            max_retries (int): Number of times a throttled (429) request is retried
+            index (LocalIndex or str, optional): Offline index, or a path to one, consulted before the API
+            lean (bool): Ask CrossRef only for the fields each lookup reads instead of full records
+            metrics (Metrics, optional): Receives request timings and lookup outcomes, see `DOIFinder`
+            max_queries (int): Most searches sent for one title, see `works_query_plan`
+            timeout (float or Tuple[float, float], optional): Connect and read timeouts of every request
+            call_deadline (float, optional): Seconds a single lookup may take in total
+            hedge (bool): Send a duplicate of requests slower than usual, see `DOIFinder`
+            circuit_breaker (CircuitBreaker, optional): Breaker failing requests fast while CrossRef is failing
+            dedupe_threshold (float, optional): Title similarity above which BibTeX entries are looked up
+                                                once, see `DOIFinder`
+            tracer (Tracer, optional): Records a span for every stage of every lookup
+            transient_retries (int): Number of times a request failing with a connection error, a timeout
+                                     or a 5xx response is retried, see `DOIFinder`
+            owns_cache (bool, optional): Whether `close` closes the cache, see `DOIFinder`
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncDOIFinder requires aiohttp, install it with 'pip install find-doi[async]'")
+        self.headers = {
+            'User-Agent': 'DOIFinder/0.1.0 (https://github.com/yourusername/doi_finder; mailto:{})'.format(
+                mailto_email if mailto_email else "anonymous@example.com"
+            )
+        }
+        self._owns_index = isinstance(index, str)
+        self.index = LocalIndex(index) if self._owns_index else index
+        self._owns_cache = isinstance(cache, str) if owns_cache is None else owns_cache
+        if isinstance(cache, str):
+            cache = open_cache(cache)
+        self.cache = cache
+        self._owns_session = session is None
+        self.session = session
+        self.base_url = base_url.rstrip('/')
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.max_retries = max_retries
+        self.transient_retries = transient_retries
+        self.lean = lean
+        self.max_queries = max_queries
+        self.timeout = (timeout, timeout) if isinstance(timeout, (int, float)) else timeout
+        self.call_deadline = call_deadline
+        self.hedge = hedge
+        self._latency: Dict[str, LatencyWindow] = {}
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        self.dedupe_threshold = dedupe_threshold
+        # Collapses identical lookups pending at the same time into one request
+        self._flight = AsyncSingleFlight()
+        self.tracer = tracer if tracer is not None else NullTracer()
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.metrics.gauge("singleflight_calls", lambda: self._flight.calls)
+        self.metrics.gauge("singleflight_shared", lambda: self._flight.shared)
+        self.metrics.gauge("circuit_open", lambda: int(self.circuit_breaker.state == 'open'))
+
+    async def close(self) -> None:
+        """Release the HTTP session and cache if they were created by this finder."""
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+        if self._owns_cache and self.cache is not None:
+            await self._blocking(self.cache.close)
+        if self._owns_index:
+            self.index.close()
+
+    async def __aenter__(self) -> "AsyncDOIFinder":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    async def find_by_title(self, title: str, clean_title: bool = True) -> Optional[str]:
+        """Find DOI for an article by its title."""
+        return await self.find_by_metadata(title, clean_title=clean_title)
+
+    async def find_by_title_and_author(self, title: str, author: str, clean_title: bool = True) -> Optional[str]:
+        """Find DOI for an article by its title and author."""
+        return await self.find_by_metadata(title, author=author, clean_title=clean_title)
+
+    async def find_by_metadata(self, title: str, author: Optional[str] = None, clean_title: bool = True) -> Optional[str]:
+        """
+        Find DOI for an article by its title and author.
+
+        Raises:
+            TransientError: If CrossRef could not be asked, see `DOIFinder.find_by_title`
+        """
+        with self.tracer.span("find_by_metadata", title=title) as span:
+            if clean_title:
+                with self.tracer.span("clean_title"):
+                    title = re.sub(r'\s+', ' ', title.lower().strip())
+            with deadline(self.call_deadline):
+                doi = await self._flight.do(cache_key("doi", title, author), self._search_crossref_by_metadata,
+                                            title, author)
+            span.set(result="found" if doi else "miss")
+        self.metrics.count("lookups_total", kind="doi", result="found" if doi else "miss")
+        return doi
+
+    async def find_article_info(self, title: str, author: Optional[str] = None) -> Optional[ArticleInfo]:
+        """
+        Find detailed article information by title.
+
+        Raises:
+            TransientError: If CrossRef could not be asked, see `DOIFinder.find_by_title`
+        """
+        with self.tracer.span("find_article_info", title=title) as span, deadline(self.call_deadline):
+            article_info = await self._flight.do(cache_key("info", title, author), self._search_crossref_detailed,
+                                                 title, author)
+            span.set(result="found" if article_info else "miss")
+        self.metrics.count("lookups_total", kind="info", result="found" if article_info else "miss")
+        return article_info
+
+    async def find_from_bibtex(self, bibtex_str: str, use_metadata: bool = True) -> Optional[List[str]]:
+        """
+        Find DOIs from a BibTeX entry, resolving entries concurrently.
+
+        Args:
+            bibtex_str (str): The BibTeX entry as a string
+            use_metadata (bool): Whether to use metadata (beside title) to help find the DOI
+
+        Returns:
+            Optional[List[str]]: The DOIs if found, None otherwise
+        """
+        try:
+            bib_database = self._parse_bibtex(bibtex_str)
+        except Exception as e:
+            logger.error("Error parsing BibTeX: %s", e)
+            return None
+
+        if not bib_database.entries:
+            return None
+
+        dois = []
+        lookups = []
+        for entry in bib_database.entries:
+            if 'doi' in entry:
+                dois.append(entry['doi'])
+            if 'title' in entry:
+                author = entry['author'] if use_metadata and 'author' in entry else None
+                # Reserve the slot so results line up with the input entries
+                lookups.append((len(dois), entry['title'], author))
+                dois.append(None)
+        found = await self._gather_clustered(lambda lookup: self.find_by_metadata(lookup[1], author=lookup[2]),
+                                             lookups, [lookup[1] for lookup in lookups],
+                                             [lookup[2] for lookup in lookups])
+        for (index, _, _), doi in zip(lookups, found):
+            dois[index] = doi
+        return dois
+
+    async def find_article_info_from_bibtex(self, bibtex_str: str) -> Optional[List[ArticleInfo]]:
+        """
+        Find detailed article information from a BibTeX entry, resolving entries concurrently.
+
+        Args:
+            bibtex_str (str): The BibTeX entry as a string
+
+        Returns:
+            Optional[List[ArticleInfo]]: Article information if found, None otherwise
+        """
+        try:
+            bib_database = self._parse_bibtex(bibtex_str)
+        except Exception as e:
+            logger.error("Error parsing BibTeX: %s", e)
+            return None
+
+        if not bib_database.entries:
+            return None
+
+        by_doi = []
+        lookups = []
+        article_infos = []
+        for entry in bib_database.entries:
+            if 'doi' in entry:
+                by_doi.append((len(article_infos), entry['doi']))
+                article_infos.append(None)
+            if 'title' in entry:
+                lookups.append((len(article_infos), entry['title'], entry['author'] if 'author' in entry else None))
+                article_infos.append(None)
+        found_by_doi, found = await asyncio.gather(
+            asyncio.gather(*(self._search_crossref_by_doi(doi) for _, doi in by_doi)),
+            self._gather_clustered(lambda lookup: self.find_article_info(lookup[1]), lookups,
+                                   [lookup[1] for lookup in lookups], [lookup[2] for lookup in lookups],
+                                   title_of=lambda article_info: article_info.title),
+        )
+        for (index, _), article_info in zip(by_doi, found_by_doi):
+            article_infos[index] = article_info
+        for (index, _, _), article_info in zip(lookups, found):
+            article_infos[index] = article_info
+        return article_infos
+
+    async def resolve(self, title: Optional[str] = None, author: Optional[str] = None, doi: Optional[str] = None,
+                      clean_title: bool = True) -> Resolution:
+        """Find the DOI and article information of a work with as few requests as possible, see `DOIFinder.resolve`."""
+        with self.tracer.span("resolve", **({"doi": doi} if doi else {"title": title})) as span:
+            if doi:
+                with deadline(self.call_deadline):
+                    resolution = replace(await self._flight.do(("resolve", "work:" + doi.strip().lower()),
+                                                               self._resolve_doi, doi))
+            elif title:
+                if clean_title:
+                    with self.tracer.span("clean_title"):
+                        title = re.sub(r'\s+', ' ', title.lower().strip())
+                with deadline(self.call_deadline):
+                    resolution = replace(await self._flight.do(("resolve", cache_key("info", title, author)),
+                                                               self._resolve_title, title, author))
+            else:
+                resolution = Resolution()
+            span.set(result=resolution.status, source=resolution.source or "", requests=resolution.requests)
+        self.metrics.count("lookups_total", kind="resolve", result=resolution.status)
+        return resolution
+
+    async def _resolve_title(self, title: str, author: Optional[str] = None) -> Resolution:
+        """Resolve a work by title, following the search plan until a result matches."""
+        resolution = await self._resolve_title_locally(title, author)
+        if resolution is not None:
+            return resolution
+
+        requests = [0]
+        try:
+            item = await self._search_works(title, author, ARTICLE_INFO_FIELDS, requests)
+            article_info = parse_article_info(item) if item else None
+        except Exception as e:
+            # Reported through the result so callers can tell failures from misses
+            return Resolution(error=str(e), requests=requests[0])
+        if article_info is None:
+            return Resolution(requests=requests[0])
+        await self._remember_title(title, author, item['DOI'], article_info)
+        return Resolution(doi=item['DOI'], article_info=article_info, score=item.get('score'),
+                          source='search', requests=requests[0])
+
+    async def _resolve_title_locally(self, title: str, author: Optional[str] = None,
+                                     kind: str = "info") -> Optional[Resolution]:
+        """Resolve a title from the offline index or the cache, see `DOIFinder._resolve_title_locally`."""
+        if self.index is not None:
+            article_info = await self._blocking(self.index.lookup_title, title, author)
+            if article_info is not None:
+                return Resolution(doi=article_info.doi, article_info=article_info, source='index')
+        if self.cache is not None:
+            cached = await self._blocking(self.cache.get, cache_key(kind, title, author))
+            if cached is not None and kind == "doi":
+                return Resolution(doi=cached, source='cache')
+            if cached is not None:
+                return Resolution(doi=cached['doi'], article_info=ArticleInfo(**cached), source='cache')
+        if await self._known_miss(title, author):
+            return Resolution(source='cache')
+        return None
+
+    async def _resolve_doi_locally(self, doi: str) -> Optional[Resolution]:
+        """Resolve a DOI from the offline index or the cache, without any request."""
+        if self.index is not None:
+            article_info = await self._blocking(self.index.lookup_doi, doi)
+            if article_info is not None:
+                return Resolution(doi=article_info.doi, article_info=article_info, source='index')
+        if self.cache is not None:
+            cached = await self._blocking(self.cache.get, "work:" + doi.strip().lower())
+            if cached is not None:
+                return Resolution(doi=cached['doi'] or doi, article_info=ArticleInfo(**cached), source='cache')
+        return None
+
+    async def _remember_title(self, title: str, author: Optional[str], doi: str,
+                              article_info: Optional[ArticleInfo] = None) -> None:
+        """Cache the DOI, and the article information if given, found by searching a title."""
+        if article_info is not None:
+            await self._cache_set(cache_key("info", title, author), asdict(article_info))
+        await self._cache_set(cache_key("doi", title, author), doi)
+
+    async def _cache_set(self, key: str, value: Any) -> None:
+        """Store a lookup result in the cache; the result stands even if the cache cannot store it."""
+        if self.cache is None:
+            return
+        try:
+            await self._blocking(self.cache.set, key, value)
+        except Exception as e:
+            self.metrics.count("cache_write_errors_total")
+            logger.warning("Error writing to the lookup cache: %s", e)
+
+    async def resolve_bibtex(self, bibtex_str: str, use_metadata: bool = True) -> Optional[List[Resolution]]:
+        """Resolve every BibTeX entry concurrently, sending only the searches each entry needs."""
+        try:
+            bib_database = self._parse_bibtex(bibtex_str)
+        except Exception as e:
+            logger.error("Error parsing BibTeX: %s", e)
+            return None
+
+        if not bib_database.entries:
+            return None
+
+        entries = bib_database.entries
+        with_doi = [entry for entry in entries if 'doi' in entry]
+        without_doi = [entry for entry in entries if 'doi' not in entry]
+        by_doi, by_title = await asyncio.gather(
+            asyncio.gather(*(self._resolve_entry(entry, use_metadata) for entry in with_doi)),
+            self._gather_clustered(
+                lambda entry: self._resolve_entry(entry, use_metadata), without_doi,
+                [entry['title'] if 'title' in entry else None for entry in without_doi],
+                [entry['author'] if use_metadata and 'author' in entry else None for entry in without_doi],
+                settled=lambda resolution: resolution.status != 'miss',
+                title_of=lambda resolution: resolution.article_info.title if resolution.article_info else None,
+            ),
+        )
+        by_doi, by_title = iter(by_doi), iter(by_title)
+        # Entries of a cluster share one resolution, each gets a copy with its own key
+        return [replace(next(by_doi) if 'doi' in entry else next(by_title), key=entry.key) for entry in entries]
+
+    async def _gather_clustered(self, func, items: List[Any], titles: List[Optional[str]],
+                                authors: List[Optional[str]], settled=bool, title_of=None) -> List[Any]:
+        """Await func for one item per cluster of items citing the same work, see `DOIFinder._map_clustered`."""
+        with self.tracer.span("cluster_titles", entries=len(items)) as span:
+            clusters = cluster_titles(titles, authors, threshold=self.dedupe_threshold)
+            span.set(clusters=len(clusters))
+        lookups = ClusterLookups(clusters, titles, settled=settled, title_of=title_of)
+        while lookups.pending():
+            lookups.record(await asyncio.gather(*(func(items[index]) for index in lookups.pending())))
+        duplicates = len(items) - lookups.lookups
+        if duplicates:
+            self.metrics.count("duplicate_entries_total", duplicates)
+        return lookups.results
+
+    async def _resolve_entry(self, entry, use_metadata: bool = True) -> Resolution:
+        """Resolve a parsed BibTeX entry."""
+        author = entry['author'] if use_metadata and 'author' in entry else None
+        with self.tracer.span("entry", key=entry.key):
+            resolution = await self.resolve(
+                title=entry['title'] if 'title' in entry else None,
+                author=author,
+                doi=entry['doi'] if 'doi' in entry else None,
+            )
+        resolution.key = entry.key
+        return resolution
+
+    async def _resolve_doi(self, doi: str) -> Resolution:
+        """Resolve a known DOI to its article information."""
+        resolution = await self._resolve_doi_locally(doi)
+        if resolution is not None:
+            return resolution
+
+        try:
+            data = await self._get_json(f"{self.base_url}/works/{doi}")
+            article_info = parse_article_info(data['message']) if data else None
+        except Exception as e:
+            return Resolution(doi=doi, source='bibtex', error=str(e), requests=1)
+        if article_info is None:
+            # CrossRef does not know the DOI, keep the one from the input
+            return Resolution(doi=doi, source='bibtex', requests=1)
+        await self._cache_set("work:" + doi.strip().lower(), asdict(article_info))
+        return Resolution(doi=article_info.doi or doi, article_info=article_info, source='doi', requests=1)
+
+    async def stream_find_by_metadata(self, queries: Iterable[Union[str, Tuple[str, Optional[str]]]],
+                                      concurrency: Optional[int] = None) -> AsyncIterator[Tuple[int, Optional[str]]]:
+        """
+        Resolve many titles and yield results as they complete.
+
+        Only ``concurrency`` queries are scheduled at a time, so arbitrarily large
+        inputs can be streamed through without creating a task per query up front.
+
+        Args:
+            queries (Iterable): Titles, or (title, author) tuples
+            concurrency (int, optional): Maximum number of pending lookups, defaults to max_concurrency
+
+        Yields:
+            Tuple[int, Optional[str]]: The index of the query and the DOI found for it
+        """
+        concurrency = concurrency or self.max_concurrency
+
+        async def lookup(index: int, query) -> Tuple[int, Optional[str]]:
+            title, author = (query, None) if isinstance(query, str) else query
+            return index, await self.find_by_metadata(title, author=author)
+
+        pending = set()
+        for index, query in enumerate(queries):
+            pending.add(asyncio.ensure_future(lookup(index, query)))
+            if len(pending) >= concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+
+    async def _get_json(self, url: str, params: Optional[dict] = None) -> Optional[Any]:
+        """
+        Send a GET request and return the decoded JSON body of a 200 response.
+
+        Throttled and failed requests are retried like by `DOIFinder._get`.
+
+        Raises:
+            TransientError: On connection failures, timeouts and 5xx responses, after all retries
+            RateLimitError: When CrossRef keeps throttling after all retries
+            DeadlineExceeded: When the deadline of the lookup or batch passed
+            CircuitOpenError: While CrossRef keeps failing
+        """
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self.session = aiohttp.ClientSession(connector=connector)
+        if self._semaphore is None:
+            # Created lazily so it binds to the running event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        endpoint = "filter" if params and "filter" in params else "search" if url.endswith("/works") else "work"
+        with self.tracer.span("queue_wait"):
+            await self._semaphore.acquire()
+        throttled = failures = 0
+        try:
+            for attempt in itertools.count():
+                with self.tracer.span("rate_limit_wait"):
+                    try:
+                        self.circuit_breaker.before_request()
+                        wait = self.rate_limiter.reserve()
+                        check_deadline(wait)
+                    except CircuitOpenError:
+                        self.metrics.count("circuit_rejections_total", endpoint=endpoint)
+                        raise
+                    except DeadlineExceeded:
+                        self.circuit_breaker.abandoned()
+                        self.metrics.count("deadline_exceeded_total", endpoint=endpoint)
+                        raise
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                self.metrics.observe("rate_limit_wait_seconds", wait)
+                timeout = request_timeout(self.timeout)
+                start = time.perf_counter()
+                try:
+                    with self.tracer.span("http_request", endpoint=endpoint, attempt=attempt) as span:
+                        status, headers, body = await self._send(url, params, endpoint, timeout)
+                        span.set(status=status, bytes=len(body))
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    self.metrics.observe("http_request_seconds", time.perf_counter() - start, endpoint=endpoint)
+                    self.metrics.count("http_requests_total", endpoint=endpoint, status="error")
+                    if timeout != self.timeout and remaining() <= 0:
+                        # The deadline cut the timeout short and has passed
+                        self.circuit_breaker.abandoned()
+                        self.metrics.count("deadline_exceeded_total", endpoint=endpoint)
+                        raise DeadlineExceeded("Deadline exceeded before CrossRef answered") from e
+                    self.circuit_breaker.failed()
+                    error, cause = TransientError(f"Request to CrossRef failed: {e}"), e
+                else:
+                    seconds = time.perf_counter() - start
+                    self.metrics.observe("http_request_seconds", seconds, endpoint=endpoint)
+                    self.metrics.count("http_requests_total", endpoint=endpoint, status=status)
+                    self.metrics.count("http_response_bytes_total", len(body), endpoint=endpoint)
+                    self.rate_limiter.update_from_headers(headers)
+                    if status < 500:
+                        self.circuit_breaker.succeeded()
+                        if status != 429:
+                            self.rate_limiter.succeeded()
+                            if status == 200:
+                                self._latency_window(endpoint).add(seconds)
+                                with self.tracer.span("decode"), self.metrics.timer("stage_seconds", stage="decode"):
+                                    return decode_json(body)
+                            return None
+                        throttled += 1
+                        if throttled > self.max_retries:
+                            raise RateLimitError(
+                                f"CrossRef is still throttling requests after {self.max_retries} retries")
+                        self.rate_limiter.backoff(headers.get('Retry-After'))
+                        continue
+                    self.circuit_breaker.failed()
+                    error, cause = TransientError(f"CrossRef returned HTTP {status}"), None
+                failures += 1
+                delay = retry_delay(failures) if failures <= self.transient_retries else None
+                if delay is None:
+                    raise error from cause
+                self.metrics.count("http_retries_total", endpoint=endpoint)
+                with self.tracer.span("retry_backoff", failures=failures):
+                    await asyncio.sleep(delay)
+        finally:
+            self._semaphore.release()
+
+    async def _send(self, url: str, params: Optional[dict], endpoint: str,
+                    timeout: Optional[Tuple[float, float]]) -> Tuple[int, Any, bytes]:
+        """Send one GET request, hedged with a duplicate if it is slower than usual, and read its body."""
+        async def send():
+            client_timeout = aiohttp.ClientTimeout(
+                total=remaining(),
+                connect=timeout[0] if timeout else None,
+                sock_read=timeout[1] if timeout else None,
+            )
+            async with self.session.get(url, params=params, headers=self.headers, timeout=client_timeout) as response:
+                return response.status, response.headers, await response.read()
+
+        if not self.hedge:
+            return await send()
+        delay = self._latency_window(endpoint).quantile(0.95)
+        delay = HEDGE_DELAY if delay is None else delay
+        left = remaining()
+        if left is not None and left <= delay:
+            # A duplicate could not be sent before the deadline
+            return await send()
+        primary = asyncio.ensure_future(send())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self.rate_limiter.try_acquire():
+            # Answered in time, or no token to spare for a duplicate
+            return await primary
+        backup = asyncio.ensure_future(send())
+        pending = {primary, backup}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.metrics.count("hedged_requests_total", endpoint=endpoint,
+                                           won="hedge" if task is backup else "primary")
+                        return task.result()
+        finally:
+            # The request that lost the race is cancelled
+            for task in pending:
+                task.cancel()
+        self.metrics.count("hedged_requests_total", endpoint=endpoint, won="none")
+        return primary.result()
+
+    async def _blocking(self, func, *args):
+        """
+        Run a blocking call, e.g. to the cache or the index, on the default executor.
+
+        Cache backends and the index do file or network I/O, which must not stall the event loop.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
+    def _parse_bibtex(self, bibtex_str: str):
+        """Parse BibTeX text into a bibtexparser library, timing the parse."""
+        with self.tracer.span("parse_bibtex", bytes=len(bibtex_str)), \
+                self.metrics.timer("stage_seconds", stage="parse_bibtex"):
+            return bibtexparser.parse_string(bibtex_str)
+
+    def _latency_window(self, endpoint: str) -> LatencyWindow:
+        """Recent response times of an endpoint."""
+        window = self._latency.get(endpoint)
+        if window is None:
+            window = self._latency[endpoint] = LatencyWindow()
+        return window
+
+    def _select(self, fields):
+        """Return the fields to request in lean mode, None to request full records."""
+        return fields if self.lean else None
+
+    async def _search_works(self, title: str, author: Optional[str], fields,
+                            requests: Optional[List[int]] = None) -> Optional[dict]:
+        """Send the searches of the query plan for a title until one finds it, see `DOIFinder._search_works`."""
+        for step, params in works_query_plan(title, author, select=self._select(fields))[:self.max_queries]:
+            if requests is not None:
+                requests[0] += 1
+            with self.tracer.span("search", step=step) as span:
+                data = await self._get_json(f"{self.base_url}/works", params)
+                if not data:
+                    # The other searches would be refused the same way
+                    self.metrics.count("search_queries_total", step=step, result="failed")
+                    return None
+                items = data['message']['items']
+                with self.tracer.span("match", candidates=len(items)), \
+                        self.metrics.timer("stage_seconds", stage="match"):
+                    item = match_title(items, title)
+                span.set(result="match" if item else "miss")
+            self.metrics.count("search_queries_total", step=step, result="match" if item else "miss")
+            if item is not None:
+                return item
+            if step == "title" and title_score(items, title) < FALLBACK_SCORE:
+                # Nothing close to the title came back, wider searches will not find it either
+                break
+            if not items and step == "bibliographic":
+                # The broadest search found nothing, the title-only one will not either
+                break
+        # Every search was answered without a match, failed requests raised before getting here
+        if self.cache is not None:
+            try:
+                await self._blocking(self.cache.set_miss, cache_key("miss", title, author))
+            except Exception as e:
+                self.metrics.count("cache_write_errors_total")
+                logger.warning("Error writing to the lookup cache: %s", e)
+        return None
+
+    async def _known_miss(self, title: str, author: Optional[str] = None) -> bool:
+        """Whether the cache remembers that searching for a title found nothing."""
+        if self.cache is None:
+            return False
+        known = await self._blocking(self.cache.is_miss, cache_key("miss", title, author))
+        self.metrics.count("negative_cache_lookups_total", result="hit" if known else "miss")
+        return known
+
+    async def _search_crossref_by_metadata(self, title: str, author: Optional[str] = None) -> Optional[str]:
+        """Search CrossRef API for the DOI."""
+        resolution = await self._resolve_title_locally(title, author, kind="doi")
+        if resolution is not None:
+            return resolution.doi
+
+        try:
+            item = await self._search_works(title, author, DOI_FIELDS)
+        except TransientError:
+            raise
+        except Exception as e:
+            # A malformed response, reported as not found
+            logger.warning("Error searching CrossRef: %s", e)
+            return None
+        if not item:
+            return None
+        await self._remember_title(title, author, item['DOI'])
+        return item['DOI']
+
+    async def _search_crossref_by_doi(self, doi: str) -> Optional[ArticleInfo]:
+        """Search CrossRef API for detailed article information using DOI."""
+        with deadline(self.call_deadline):
+            return await self._flight.do("work:" + doi.strip().lower(), self._fetch_crossref_by_doi, doi)
+
+    async def _fetch_crossref_by_doi(self, doi: str) -> Optional[ArticleInfo]:
+        """Look a DOI up in the index, the cache and then the CrossRef API."""
+        resolution = await self._resolve_doi_locally(doi)
+        if resolution is not None:
+            return resolution.article_info
+
+        try:
+            data = await self._get_json(f"{self.base_url}/works/{doi}")
+            article_info = parse_article_info(data['message']) if data else None
+        except TransientError:
+            raise
+        except Exception as e:
+            logger.warning("Error searching CrossRef by DOI: %s", e)
+            return None
+        if article_info is not None:
+            await self._cache_set("work:" + doi.strip().lower(), asdict(article_info))
+        return article_info
+
+    async def _search_crossref_detailed(self, title: str, author: Optional[str] = None) -> Optional[ArticleInfo]:
+        """Search CrossRef API for detailed article information."""
+        resolution = await self._resolve_title_locally(title, author)
+        if resolution is not None:
+            return resolution.article_info
+
+        try:
+            item = await self._search_works(title, author, ARTICLE_INFO_FIELDS)
+            article_info = parse_article_info(item) if item else None
+        except TransientError:
+            raise
+        except Exception as e:
+            logger.warning("Error searching CrossRef: %s", e)
+            return None
+        if article_info is not None:
+            await self._remember_title(title, author, item['DOI'], article_info)
+        return article_info
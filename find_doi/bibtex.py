@@ -0,0 +1,81 @@
+"""
+Incremental BibTeX reading for large bibliographies.
+"""
+
+import io
+import logging
+import re
+from typing import IO, Iterator, List, Union
+
+import bibtexparser
+
+logger = logging.getLogger(__name__)
+
+_STRING_BLOCK = re.compile(r'\s*@\s*string\b', re.IGNORECASE)
+
+
+def iter_bibtex_blocks(source: Union[str, IO[str]]) -> Iterator[str]:
+    """
+    Split BibTeX text into top-level ``@...`` blocks without reading it all at once.
+
+    A new block starts at every line beginning with ``@`` outside of braces, so
+    only one block is held in memory at a time.
+
+    Args:
+        source (str or IO[str]): BibTeX text or a text stream to read from
+
+    Yields:
+        str: The text of each block
+    """
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    lines: List[str] = []
+    depth = 0
+    for line in source:
+        if depth <= 0 and line.lstrip().startswith('@') and lines:
+            yield ''.join(lines)
+            lines = []
+            depth = 0
+        lines.append(line)
+        depth += line.count('{') - line.count('}')
+    if lines:
+        yield ''.join(lines)
+
+
+def iter_bibtex_entries(source: Union[str, IO[str]], batch_size: int = 100) -> Iterator["bibtexparser.model.Entry"]:
+    """
+    Parse BibTeX entries incrementally.
+
+    Blocks are parsed ``batch_size`` at a time, so memory stays bounded by the
+    batch rather than by the size of the input. ``@string`` definitions are kept
+    and applied to all following entries.
+
+    Args:
+        source (str or IO[str]): BibTeX text or a text stream to read from
+        batch_size (int): Number of blocks handed to the parser at once
+
+    Yields:
+        bibtexparser.model.Entry: The parsed entries, in input order
+    """
+    strings: List[str] = []
+    batch: List[str] = []
+    for block in iter_bibtex_blocks(source):
+        if _STRING_BLOCK.match(block):
+            strings.append(block)
+            continue
+        batch.append(block)
+        if len(batch) >= batch_size:
+            yield from _parse_blocks(strings, batch)
+            batch = []
+    if batch:
+        yield from _parse_blocks(strings, batch)
+
+
+def _parse_blocks(strings: List[str], blocks: List[str]) -> Iterator["bibtexparser.model.Entry"]:
+    """Parse a batch of blocks, prefixed with the @string definitions seen so far."""
+    try:
+        library = bibtexparser.parse_string(''.join(strings + blocks))
+    except Exception as e:
+        logger.error("Error parsing BibTeX: %s", e)
+        return
+    yield from library.entries
@@ -0,0 +1,527 @@
+"""
+Lookup caches for CrossRef queries.
+
+Finders talk to a cache through the `CacheBackend` interface, implemented by
+`MemoryCache` (one process), `LookupCache` (a SQLite file, shared by the
+processes of one machine) and `find_doi.rediscache.RedisCache` (a Redis
+server, shared by every node). `open_cache` picks one from a path or URL.
+
+Every backend can dump its contents as records and load them back, which is
+how a new node is seeded from a running one::
+
+    write_records(open_cache("redis://cache:6379/0").dump(), "seed.jsonl.gz")
+    open_cache("lookups.sqlite").load(read_records("seed.jsonl.gz"))
+"""
+
+import gzip
+import json
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import IO, Any, Dict, Iterable, Iterator, Optional
+
+
+class CacheBackend(ABC):
+    """Interface of the lookup caches used by `DOIFinder` and `AsyncDOIFinder`.
+
+    Values are JSON-serializable and come back as fresh copies. Entries expire
+    after ``ttl`` seconds and remembered misses after ``negative_ttl`` seconds.
+
+    `dump` and `load` exchange records of the form
+    ``{"key": ..., "value": ..., "created": ...}`` for entries and
+    ``{"key": ..., "miss": true, "created": ...}`` for misses, ``created``
+    being a Unix time, so copied entries keep their age.
+    """
+
+    ttl: Optional[float] = None
+    negative_ttl: Optional[float] = None
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for a key, None if missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value under a key."""
+
+    @abstractmethod
+    def is_miss(self, key: str) -> bool:
+        """Return whether a lookup is remembered as finding nothing."""
+
+    @abstractmethod
+    def set_miss(self, key: str) -> None:
+        """Remember that a lookup found nothing."""
+
+    @abstractmethod
+    def dump(self) -> Iterator[Dict[str, Any]]:
+        """Yield every live entry and miss as a record."""
+
+    @abstractmethod
+    def load(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Store records made by `dump`, skipping expired ones, and return how many were stored."""
+
+    def purge_expired(self) -> int:
+        """Remove expired entries and misses and return how many were removed."""
+        return 0
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all entries and misses."""
+
+    def close(self) -> None:
+        """Release the resources held by the cache."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of live entries, misses not included."""
+
+    def _expired(self, record: Dict[str, Any], now: float) -> bool:
+        """Whether a record would already have expired in this cache."""
+        ttl = self.negative_ttl if record.get('miss') else self.ttl
+        if record.get('miss') and ttl == 0:
+            return True
+        return ttl is not None and now - record.get('created', now) > ttl
+
+
+def open_cache(spec: str, **options) -> CacheBackend:
+    """
+    Open a cache from a path or URL.
+
+    Args:
+        spec (str): ``memory://`` for a `MemoryCache`, ``redis://[:password@]host[:port][/db]``
+                    for a `RedisCache`, anything else is the path of a `LookupCache` file
+        **options: ``ttl``, ``negative_ttl`` and the other arguments of the backend
+
+    Returns:
+        CacheBackend: The opened cache
+    """
+    if spec.startswith("memory://"):
+        return MemoryCache(**options)
+    if spec.startswith("redis://"):
+        from .rediscache import RedisCache
+        return RedisCache.from_url(spec, **options)
+    return LookupCache(spec, **options)
+
+
+def write_records(records: Iterable[Dict[str, Any]], path: str) -> int:
+    """
+    Write cache records as JSON Lines, gzipped if the path ends with ``.gz``.
+
+    Args:
+        records (Iterable[dict]): Records from `CacheBackend.dump`
+        path (str): The file to write, '-' for stdout
+
+    Returns:
+        int: The number of records written
+    """
+    count = 0
+    with _open_records(path, 'w') as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Read the cache records written by `write_records`, '-' for stdin."""
+    with _open_records(path, 'r') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _open_records(path: str, mode: str) -> IO[str]:
+    if path == '-':
+        stream = sys.stdout if mode == 'w' else sys.stdin
+        # Leave the standard streams open
+        return open(stream.fileno(), mode, encoding='utf-8', closefd=False)
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class MemoryCache(CacheBackend):
+    """Dictionary-backed cache local to one process.
+
+    Cheaper than a ``:memory:`` `LookupCache` and shared by every finder of the
+    process it is passed to. The least recently used entries are evicted beyond
+    ``max_entries``.
+    """
+
+    def __init__(self, ttl: Optional[float] = 30 * 24 * 3600, max_entries: Optional[int] = 100000,
+                 negative_ttl: Optional[float] = 7 * 24 * 3600):
+        """
+        Create an empty cache.
+
+        Args:
+            ttl (float, optional): Seconds before an entry expires, None to never expire
+            max_entries (int, optional): Maximum number of entries kept, and of misses, None for no limit
+            negative_ttl (float, optional): Seconds before a remembered miss expires, None to never
+                                            expire, 0 to not remember misses
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        # key -> (JSON text, creation time), least recently used first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._misses: "OrderedDict[str, float]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl is not None and now - entry[1] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return json.loads(entry[0])
+
+    def set(self, key: str, value: Any) -> None:
+        self._store(key, json.dumps(value), time.time())
+
+    def is_miss(self, key: str) -> bool:
+        if self.negative_ttl == 0:
+            return False
+        with self._lock:
+            created = self._misses.get(key)
+            if created is None:
+                return False
+            if self.negative_ttl is not None and time.time() - created > self.negative_ttl:
+                del self._misses[key]
+                return False
+        return True
+
+    def set_miss(self, key: str) -> None:
+        if self.negative_ttl == 0:
+            return
+        self._store_miss(key, time.time())
+
+    def dump(self) -> Iterator[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entries = list(self._entries.items())
+            misses = list(self._misses.items())
+        for key, (value, created) in entries:
+            record = {'key': key, 'value': json.loads(value), 'created': created}
+            if not self._expired(record, now):
+                yield record
+        for key, created in misses:
+            record = {'key': key, 'miss': True, 'created': created}
+            if not self._expired(record, now):
+                yield record
+
+    def load(self, records: Iterable[Dict[str, Any]]) -> int:
+        now = time.time()
+        count = 0
+        for record in records:
+            if self._expired(record, now):
+                continue
+            if record.get('miss'):
+                self._store_miss(record['key'], record.get('created', now))
+            else:
+                self._store(record['key'], json.dumps(record['value']), record.get('created', now))
+            count += 1
+        return count
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        removed = 0
+        with self._lock:
+            if self.ttl is not None:
+                expired = [key for key, (_, created) in self._entries.items() if now - created > self.ttl]
+                for key in expired:
+                    del self._entries[key]
+                removed += len(expired)
+            if self.negative_ttl is not None:
+                expired = [key for key, created in self._misses.items() if now - created > self.negative_ttl]
+                for key in expired:
+                    del self._misses[key]
+                removed += len(expired)
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._misses.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _store(self, key: str, value: str, created: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, created)
+            self._entries.move_to_end(key)
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _store_miss(self, key: str, created: float) -> None:
+        with self._lock:
+            self._misses[key] = created
+            self._misses.move_to_end(key)
+            while self.max_entries is not None and len(self._misses) > self.max_entries:
+                self._misses.popitem(last=False)
+
+
+class LookupCache(CacheBackend):
+    """SQLite-backed cache for parsed CrossRef lookup results.
+
+    Entries expire after ``ttl`` seconds. When more than ``max_entries`` are
+    stored, the least recently used entries are evicted, a tenth of
+    ``max_entries`` at a time so that most writes do not delete anything. Reads
+    buffer the access times they update and write ``touch_batch`` of them in
+    one transaction, before an eviction and when the cache is closed.
+
+    Lookups that found nothing are remembered apart from results, see
+    `set_miss`, and expire after the shorter ``negative_ttl`` so that works
+    added to CrossRef later are still found.
+    """
+
+    #: Number of reads whose access times are buffered before they are written
+    touch_batch = 256
+
+    def __init__(self, path: str = ":memory:", ttl: Optional[float] = 30 * 24 * 3600,
+                 max_entries: Optional[int] = 100000, negative_ttl: Optional[float] = 7 * 24 * 3600):
+        """
+        Open (or create) a lookup cache.
+
+        Args:
+            path (str): Path of the SQLite database file, ``:memory:`` for a process-local cache
+            ttl (float, optional): Seconds before an entry expires, None to never expire
+            max_entries (int, optional): Maximum number of entries kept, None for no limit.
+                                         Misses are limited separately to the same number.
+            negative_ttl (float, optional): Seconds before a remembered miss expires, None to never
+                                            expire, 0 to not remember misses
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS lookups ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS lookups_accessed ON lookups (accessed)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS misses (key TEXT PRIMARY KEY, created REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS misses_created ON misses (created)")
+        self._touched: Dict[str, float] = {}
+        # Upper bounds of the rows in each table, recounted before evicting
+        self._counts = {table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                        for table in ('lookups', 'misses')}
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Return the cached value for a key.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            Optional[Any]: The cached value, None if missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM lookups WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._conn.execute("DELETE FROM lookups WHERE key = ?", (key,))
+                self._touched.pop(key, None)
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= self.touch_batch:
+                self._flush_touched()
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a JSON-serializable value under a key.
+
+        Args:
+            key (str): The cache key
+            value (Any): The value to store
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lookups (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._touched.pop(key, None)
+            self._counts['lookups'] += 1
+            self._evict('lookups')
+
+    def is_miss(self, key: str) -> bool:
+        """
+        Return whether a lookup is remembered as finding nothing, see `set_miss`.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            bool: True if the miss was recorded less than ``negative_ttl`` seconds ago
+        """
+        if self.negative_ttl == 0:
+            return False
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT created FROM misses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return False
+            if self.negative_ttl is not None and now - row[0] > self.negative_ttl:
+                self._conn.execute("DELETE FROM misses WHERE key = ?", (key,))
+                return False
+        return True
+
+    def set_miss(self, key: str) -> None:
+        """
+        Remember that a lookup found nothing.
+
+        Only record lookups that CrossRef answered without a match, never failed
+        requests (timeouts, 5xx or 429 responses), which should be retried.
+
+        Args:
+            key (str): The cache key
+        """
+        if self.negative_ttl == 0:
+            return
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO misses (key, created) VALUES (?, ?)", (key, time.time()))
+            self._counts['misses'] += 1
+            self._evict('misses')
+
+    def dump(self) -> Iterator[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entries = self._conn.execute("SELECT key, value, created FROM lookups").fetchall()
+            misses = self._conn.execute("SELECT key, created FROM misses").fetchall()
+        for key, value, created in entries:
+            record = {'key': key, 'value': json.loads(value), 'created': created}
+            if not self._expired(record, now):
+                yield record
+        for key, created in misses:
+            record = {'key': key, 'miss': True, 'created': created}
+            if not self._expired(record, now):
+                yield record
+
+    def load(self, records: Iterable[Dict[str, Any]]) -> int:
+        now = time.time()
+        entries, misses = [], []
+        for record in records:
+            if self._expired(record, now):
+                continue
+            created = record.get('created', now)
+            if record.get('miss'):
+                misses.append((record['key'], created))
+            else:
+                entries.append((record['key'], json.dumps(record['value']), created, now))
+        with self._lock:
+            # One transaction instead of one per record
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO lookups (key, value, created, accessed) VALUES (?, ?, ?, ?)", entries
+                )
+                self._conn.executemany("INSERT OR REPLACE INTO misses (key, created) VALUES (?, ?)", misses)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            for key, *_ in entries:
+                self._touched.pop(key, None)
+            self._counts['lookups'] += len(entries)
+            self._counts['misses'] += len(misses)
+            self._evict('lookups')
+            self._evict('misses')
+        return len(entries) + len(misses)
+
+    def purge_expired(self) -> int:
+        """Remove expired entries and misses and return how many were removed."""
+        removed = 0
+        now = time.time()
+        with self._lock:
+            if self.ttl is not None:
+                rowcount = self._conn.execute("DELETE FROM lookups WHERE created < ?", (now - self.ttl,)).rowcount
+                self._counts['lookups'] -= rowcount
+                removed += rowcount
+            if self.negative_ttl is not None:
+                rowcount = self._conn.execute(
+                    "DELETE FROM misses WHERE created < ?", (now - self.negative_ttl,)
+                ).rowcount
+                self._counts['misses'] -= rowcount
+                removed += rowcount
+        return removed
+
+    def clear(self) -> None:
+        """Remove all entries and misses."""
+        with self._lock:
+            self._conn.execute("DELETE FROM lookups")
+            self._conn.execute("DELETE FROM misses")
+            self._touched.clear()
+            self._counts = {'lookups': 0, 'misses': 0}
+
+    def close(self) -> None:
+        """Write the buffered access times and close the underlying database connection."""
+        with self._lock:
+            try:
+                self._flush_touched()
+            finally:
+                self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM lookups").fetchone()[0]
+
+    def _flush_touched(self) -> None:
+        """Write the buffered access times in one transaction, called with the lock held."""
+        if not self._touched:
+            return
+        touched = [(accessed, key) for key, accessed in self._touched.items()]
+        self._touched.clear()
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany("UPDATE lookups SET accessed = ? WHERE key = ?", touched)
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _evict(self, table: str) -> None:
+        """
+        Evict the oldest rows of a table once it holds more than ``max_entries``,
+        called with the lock held.
+
+        The row count kept in ``_counts`` only grows on writes (replaced keys and
+        rows written by other processes are not told apart), so the table is
+        counted again before anything is deleted. Rows are then evicted down to
+        ``max_entries`` less a tenth of it, leaving room for the next writes.
+
+        Args:
+            table (str): ``lookups`` (evicted by access time) or ``misses`` (by creation time)
+        """
+        if self.max_entries is None or self._counts[table] <= self.max_entries:
+            return
+        if table == 'lookups':
+            self._flush_touched()
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if count > self.max_entries:
+            keep = self.max_entries - self.max_entries // 10
+            order = 'accessed' if table == 'lookups' else 'created'
+            count -= self._conn.execute(
+                f"DELETE FROM {table} WHERE key IN (SELECT key FROM {table} ORDER BY {order} DESC LIMIT -1 OFFSET ?)",
+                (keep,),
+            ).rowcount
+        self._counts[table] = count
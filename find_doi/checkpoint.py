@@ -0,0 +1,99 @@
+"""
+Checkpoint journal for resumable BibTeX batch runs.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict
+from typing import Dict, Optional
+
+from .models import ArticleInfo, Resolution
+
+
+def entry_fingerprint(entry) -> str:
+    """
+    Identify a BibTeX entry by its citation key and a hash of its fields.
+
+    Editing any field of an entry changes its fingerprint, so a resumed run
+    resolves it again.
+    """
+    fields = sorted((field.key.lower(), str(field.value)) for field in entry.fields)
+    digest = hashlib.sha256(json.dumps([entry.entry_type.lower(), fields]).encode('utf-8')).hexdigest()
+    return f"{entry.key}:{digest[:16]}"
+
+
+class Checkpoint:
+    """Append-only JSON Lines journal of resolved entries.
+
+    Every resolution is written and flushed as soon as it completes, so a killed
+    run loses at most the entries that were still in flight. When the journal is
+    read back, later records for the same entry replace earlier ones.
+    """
+
+    def __init__(self, path: str, resume: bool = True):
+        """
+        Open a checkpoint journal.
+
+        Args:
+            path (str): Path of the journal file
+            resume (bool): Keep the records of a previous run, otherwise start a fresh journal
+        """
+        self.path = path
+        self.records: Dict[str, dict] = {}
+        truncated = False
+        if resume and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    truncated = not line.endswith('\n')
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A run killed mid-write leaves a truncated last line
+                        continue
+                    self.records[record['id']] = record
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+        if truncated:
+            # Records appended to a truncated line would be unreadable too
+            self._file.write('\n')
+
+    def get(self, fingerprint: str) -> Optional[Resolution]:
+        """
+        Return the recorded resolution of an entry, unless it failed and should be retried.
+
+        Args:
+            fingerprint (str): The entry fingerprint, see `entry_fingerprint`
+
+        Returns:
+            Optional[Resolution]: The recorded resolution, None if the entry still needs resolving
+        """
+        record = self.records.get(fingerprint)
+        if record is None or record.get('error'):
+            return None
+        article_info = record.get('article_info')
+        return Resolution(
+            doi=record.get('doi'),
+            article_info=ArticleInfo(**article_info) if article_info else None,
+            score=record.get('score'),
+            source=record.get('source'),
+            key=record.get('key'),
+        )
+
+    def record(self, fingerprint: str, resolution: Resolution) -> None:
+        """Append the resolution of an entry to the journal."""
+        record = asdict(resolution)
+        record['id'] = fingerprint
+        record['status'] = resolution.status
+        self.records[fingerprint] = record
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the journal file."""
+        self._file.close()
+
+    def __enter__(self) -> "Checkpoint":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -3,43 +3,289 @@
 Command-line interface for DOI Finder
 """
 import argparse
+import glob
 import json
+import os
 import sys
-from typing import Dict, Any, List, Optional
-from . import DOIFinder, ArticleInfo
+import tempfile
+from typing import IO, Dict, Any, Iterable, List, Optional
+from . import DOIFinder, ArticleInfo, Resolution, Metrics, CircuitBreaker, CrossRefError, deadline
+from .format import format_article_info, format_resolution
 
+# SQLite cache of `serve` and the `cache` commands when --cache is not given
+DEFAULT_CACHE = os.path.join("~", ".cache", "find-doi.sqlite")
+# Commands, and whether they can run without positional arguments
+COMMANDS = {'doi': False, 'info': False, 'bibtex': False, 'bibtex-info': False, 'index': False, 'cache': False,
+            'serve': True}
 
-def format_article_info(article_info: ArticleInfo) -> Dict[str, Any]:
-    """Convert ArticleInfo to a dictionary for JSON output."""
-    if article_info is None:
-        return {}
-    
-    result = {
-        "doi": article_info.doi,
-        "title": article_info.title,
-        "authors": article_info.authors,
-        "year": article_info.year,
-        "journal": article_info.journal,
-        "publisher": article_info.publisher,
-        "url": article_info.url,
-        "type": article_info.type
-    }
-    
-    # Include abstract if --full flag is set
-    if getattr(article_info, 'abstract', None):
-        result["abstract"] = article_info.abstract
-    
-    return result
+
+def make_finder(args: argparse.Namespace) -> DOIFinder:
+    """Create a DOIFinder configured from the common command-line options."""
+    cache = None
+    if args.cache:
+        from .cache import open_cache
+        cache = open_cache(args.cache, ttl=args.cache_ttl, negative_ttl=args.negative_ttl)
+    # Keep one pooled connection per worker
+    pool_size = max(getattr(args, "workers", 1), 10)
+    # The cache is opened for this finder only, closing the finder closes it
+    return DOIFinder(mailto_email=args.email, cache=cache, owns_cache=True, pool_size=pool_size,
+                     base_url=args.api_url, index=args.index, lean=args.lean,
+                     metrics=getattr(args, "metrics", None), tracer=getattr(args, "tracer", None),
+                     max_queries=args.max_queries, dedupe_threshold=args.dedupe_threshold or None,
+                     **resilience_options(args))
+
+
+def default_cache() -> str:
+    """Path of `DEFAULT_CACHE`, creating its directory."""
+    path = os.path.expanduser(DEFAULT_CACHE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def resilience_options(args: argparse.Namespace) -> Dict[str, Any]:
+    """DOIFinder timeout, retry, deadline, hedging and circuit breaker options from the command line."""
+    return dict(
+        timeout=(args.connect_timeout, args.read_timeout),
+        transient_retries=args.retries,
+        call_deadline=args.call_deadline,
+        hedge=args.hedge,
+        circuit_breaker=CircuitBreaker(failure_threshold=args.breaker_threshold or None,
+                                       recovery_time=args.breaker_cooldown),
+    )
+
+
+def open_input(path: str) -> IO[str]:
+    """Open the BibTeX input file, or stdin for '-', exiting on errors."""
+    if path == '-':
+        return sys.stdin
+    try:
+        return open(path, 'r', encoding='utf-8')
+    except Exception as e:
+        print(f"Error reading file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def run_pipeline(args: argparse.Namespace, finder: DOIFinder, info: bool = False) -> None:
+    """
+    Resolve BibTeX entries as they are read, optionally journaling them to a checkpoint.
+
+    With --jsonl every result is printed as soon as it is available. With --csv or
+    --parquet the results are collected column by column and written in bulk.
+    Otherwise the results are printed at the end in the command's usual format.
+    Exits with status 1 once the results are written if any lookup failed, so a
+    CrossRef outage is not taken for entries that were not found.
+    """
+    from .checkpoint import Checkpoint
+
+    checkpoint = Checkpoint(args.checkpoint, resume=args.resume) if args.checkpoint else None
+    table = None
+    if args.csv or args.parquet:
+        from .table import ResultTable
+        table = ResultTable(export_columns(args, info))
+    stream = open_input(args.input_file)
+    counts = {'found': 0, 'miss': 0, 'error': 0}
+    resolutions = []
+    try:
+        for resolution in finder.iter_resolve_bibtex(stream, max_workers=args.workers, checkpoint=checkpoint,
+                                                     fetch_dois=info):
+            counts[resolution.status] += 1
+            if table is not None:
+                table.append(resolution)
+            if args.jsonl:
+                print(json.dumps(format_resolution(resolution, info=info)), flush=True)
+            elif table is None:
+                resolutions.append(resolution)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if checkpoint is not None:
+            checkpoint.close()
+
+    if table is not None:
+        write_table(args, table)
+    elif not args.jsonl:
+        if info:
+            print_article_infos(args, [resolution.article_info for resolution in resolutions])
+        else:
+            print_dois(args, [resolution.doi for resolution in resolutions])
+    if checkpoint is not None:
+        summary = (f"Resolved {sum(counts.values())} entries: {counts['found']} found, "
+                   f"{counts['miss']} not found, {counts['error']} failed")
+        if counts['error']:
+            summary += " (rerun with --resume to retry the failed entries)"
+        print(summary, file=sys.stderr)
+    if counts['error']:
+        sys.exit(1)
+
+
+def run_write_back(args: argparse.Namespace) -> None:
+    """Insert the DOIs found into the BibTeX files, see `write_back`."""
+    from .shard import expand_inputs
+    from .writeback import write_back
+
+    if '-' in args.input_file:
+        print("Error: --write-back needs files, not stdin", file=sys.stderr)
+        sys.exit(2)
+    paths = expand_inputs(args.input_file)
+    if args.state and len(paths) > 1:
+        print("Error: --state needs a single input file", file=sys.stderr)
+        sys.exit(2)
+    if not paths:
+        print("Error: no BibTeX files found", file=sys.stderr)
+        sys.exit(1)
+
+    records = []
+    failed = False
+    with make_finder(args) as finder:
+        for path in paths:
+            try:
+                result = write_back(finder, path, state_path=args.state, max_workers=args.workers,
+                                    negative_ttl=args.negative_ttl)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Error updating {path}: {e}", file=sys.stderr)
+                failed = True
+                continue
+            for resolution in result.resolutions:
+                if args.json:
+                    records.append(dict(file=path, **format_resolution(resolution)))
+                elif resolution.error:
+                    print(f"{path} [{resolution.key}] Error: {resolution.error}")
+                elif resolution.doi:
+                    print(f"{path} [{resolution.key}] DOI: {resolution.doi}")
+            found = sum(1 for resolution in result.resolutions if resolution.doi)
+            summary = (f"{path}: {len(result.resolutions)} new or edited entries looked up, {result.inserted} DOIs "
+                       f"written, {len(result.resolutions) - found - result.failed} not found, "
+                       f"{result.failed} failed, {result.unchanged} unchanged")
+            if result.failed:
+                summary += " (rerun to retry the failed entries)"
+                failed = True
+            print(summary, file=sys.stderr)
+    if args.json:
+        print(json.dumps(records, indent=2))
+    if failed:
+        sys.exit(1)
+
+
+def is_sharded(args: argparse.Namespace) -> bool:
+    """Whether the inputs call for the multi-process mode: several files, a directory, a glob or --processes."""
+    inputs = args.input_file
+    return (len(inputs) > 1 or args.processes > 1
+            or (inputs[0] != '-' and (os.path.isdir(inputs[0]) or glob.has_magic(inputs[0]))))
+
+
+def run_sharded(args: argparse.Namespace, info: bool = False) -> None:
+    """
+    Resolve many BibTeX files with a pool of worker processes.
+
+    Results are printed in input order, each tagged with the file it came from.
+    The workers share one lookup cache, a temporary one unless --cache is given,
+    and one request budget. Exits with status 1 if any lookup failed.
+    """
+    from .shard import expand_inputs, iter_resolve_files
+
+    if '-' in args.input_file:
+        print("Error: stdin cannot be combined with several inputs or --processes", file=sys.stderr)
+        sys.exit(2)
+    if args.checkpoint:
+        print("Error: --checkpoint needs a single input file", file=sys.stderr)
+        sys.exit(2)
+    paths = expand_inputs(args.input_file)
+    if not paths:
+        print("Error: no BibTeX files found", file=sys.stderr)
+        sys.exit(1)
+
+    cache = args.cache
+    temporary = None
+    if cache is None:
+        # Workers reuse each other's lookups through a cache file that lives for this run
+        descriptor, temporary = tempfile.mkstemp(prefix="find-doi-", suffix=".sqlite")
+        os.close(descriptor)
+        cache = temporary
+
+    table = None
+    if args.csv or args.parquet:
+        from .table import ResultTable
+        table = ResultTable(['file'] + export_columns(args, info))
+    counts = {'found': 0, 'miss': 0, 'error': 0}
+
+    def results():
+        for path, resolution in iter_resolve_files(
+            paths, processes=args.processes if args.processes > 1 else None, max_workers=args.workers,
+            fetch_dois=info,
+            metrics=getattr(args, "metrics", None), tracer=getattr(args, "tracer", None),
+            cache_ttl=args.cache_ttl, negative_ttl=args.negative_ttl,
+            mailto_email=args.email,
+            cache=cache, base_url=args.api_url, index=args.index, lean=args.lean, max_queries=args.max_queries,
+            **resilience_options(args),
+        ):
+            counts[resolution.status] += 1
+            if table is not None:
+                table.append(resolution, file=path)
+            else:
+                yield path, resolution
+
+    def record(path: str, resolution: Resolution) -> Dict[str, Any]:
+        return dict(file=path, **format_resolution(resolution, info=info))
+
+    try:
+        if table is not None:
+            for _ in results():
+                pass
+            write_table(args, table)
+        elif args.jsonl:
+            for path, resolution in results():
+                print(json.dumps(record(path, resolution)), flush=True)
+        elif args.json:
+            print_json_array(record(path, resolution) for path, resolution in results())
+        else:
+            for path, resolution in results():
+                if resolution.error:
+                    print(f"{path} [{resolution.key}] Error: {resolution.error}")
+                elif info and resolution.article_info:
+                    print(f"\n{path} [{resolution.key}]")
+                    print_article_info(args, resolution.article_info)
+                elif resolution.doi:
+                    print(f"{path} [{resolution.key}] DOI: {resolution.doi}")
+    finally:
+        if temporary is not None:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(temporary + suffix):
+                    os.unlink(temporary + suffix)
+
+    print(f"Resolved {sum(counts.values())} entries from {len(paths)} files: {counts['found']} found, "
+          f"{counts['miss']} not found, {counts['error']} failed", file=sys.stderr)
+    if counts['error']:
+        sys.exit(1)
+
+
+def export_columns(args: argparse.Namespace, info: bool = False) -> List[str]:
+    """Columns written by --csv and --parquet."""
+    from .table import COLUMNS
+
+    if not info:
+        return ['key', 'doi', 'source', 'score', 'requests', 'status', 'error']
+    return [name for name in COLUMNS if name != 'abstract' or args.full]
+
+
+def write_table(args: argparse.Namespace, table) -> None:
+    """Write a ResultTable to the --csv and --parquet files."""
+    try:
+        if args.csv:
+            table.to_csv(sys.stdout if args.csv == '-' else args.csv)
+        if args.parquet:
+            table.to_parquet(args.parquet)
+    except Exception as e:
+        print(f"Error writing results: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 def find_by_title(args: argparse.Namespace) -> None:
     """Find DOI by title."""
-    finder = DOIFinder(mailto_email=args.email)
-    
-    if args.author:
-        doi = finder.find_by_title_and_author(args.title, args.author)
-    else:
-        doi = finder.find_by_title(args.title)
+    with make_finder(args) as finder:
+        if args.author:
+            doi = finder.find_by_title_and_author(args.title, args.author)
+        else:
+            doi = finder.find_by_title(args.title)
     
     if args.json:
         # JSON output
@@ -55,9 +301,8 @@ def find_by_title(args: argparse.Namespace) -> None:
 
 def find_info_by_title(args: argparse.Namespace) -> None:
     """Find article information by title."""
-    finder = DOIFinder(mailto_email=args.email)
-    
-    article_info = finder.find_article_info(args.title, args.author)
+    with make_finder(args) as finder:
+        article_info = finder.find_article_info(args.title, args.author)
     
     if args.json:
         # JSON output
@@ -66,23 +311,24 @@ def find_info_by_title(args: argparse.Namespace) -> None:
     else:
         # Plain text output
         if article_info:
-            print(f"Title: {article_info.title}")
-            print(f"Authors: {', '.join(article_info.authors) if article_info.authors else 'N/A'}")
-            print(f"Year: {article_info.year}")
-            print(f"Journal: {article_info.journal or 'N/A'}")
-            print(f"Publisher: {article_info.publisher or 'N/A'}")
-            print(f"DOI: {article_info.doi}")
-            print(f"URL: {article_info.url or 'N/A'}")
-            print(f"Type: {article_info.type or 'N/A'}")
-            if args.full and article_info.abstract:
-                print(f"Abstract: {article_info.abstract}")
+            print_article_info(args, article_info)
         else:
             print("No article information found")
 
 
 def find_from_bibtex(args: argparse.Namespace) -> None:
     """Find DOI from BibTeX."""
-    finder = DOIFinder(mailto_email=args.email)
+    if args.write_back:
+        run_write_back(args)
+        return
+    if is_sharded(args):
+        run_sharded(args)
+        return
+    args.input_file = args.input_file[0]
+    if args.jsonl or args.checkpoint or args.csv or args.parquet:
+        with make_finder(args) as finder:
+            run_pipeline(args, finder)
+        return
     
     # Read BibTeX from file or stdin
     if args.input_file == '-':
@@ -95,8 +341,13 @@ def find_from_bibtex(args: argparse.Namespace) -> None:
             print(f"Error reading file: {e}", file=sys.stderr)
             sys.exit(1)
     
-    dois = finder.find_from_bibtex(bibtex)
-    
+    with make_finder(args) as finder:
+        dois = finder.find_from_bibtex(bibtex, max_workers=args.workers)
+    print_dois(args, dois)
+
+
+def print_dois(args: argparse.Namespace, dois: Optional[List[Optional[str]]]) -> None:
+    """Print the DOIs found for BibTeX entries."""
     if args.json:
         # JSON output
         result = {"dois": dois}
@@ -113,7 +364,14 @@ def find_from_bibtex(args: argparse.Namespace) -> None:
 
 def find_info_from_bibtex(args: argparse.Namespace) -> None:
     """Find article information from BibTeX."""
-    finder = DOIFinder(mailto_email=args.email)
+    if is_sharded(args):
+        run_sharded(args, info=True)
+        return
+    args.input_file = args.input_file[0]
+    if args.jsonl or args.checkpoint or args.csv or args.parquet:
+        with make_finder(args) as finder:
+            run_pipeline(args, finder, info=True)
+        return
     
     # Read BibTeX from file or stdin
     if args.input_file == '-':
@@ -126,12 +384,39 @@ def find_info_from_bibtex(args: argparse.Namespace) -> None:
             print(f"Error reading file: {e}", file=sys.stderr)
             sys.exit(1)
     
-    articles_info = finder.find_article_info_from_bibtex(bibtex)
-    
+    with make_finder(args) as finder:
+        articles_info = finder.find_article_info_from_bibtex(bibtex, max_workers=args.workers)
+    print_article_infos(args, articles_info)
+
+
+def print_json_array(items: Iterable[Any]) -> None:
+    """Print items as a JSON array, formatted like ``json.dumps(list(items), indent=2)``."""
+    first = True
+    for item in items:
+        print(("[\n  " if first else ",\n  ") + json.dumps(item, indent=2).replace("\n", "\n  "), end="")
+        first = False
+    print("[]" if first else "\n]")
+
+
+def print_article_info(args: argparse.Namespace, article_info: ArticleInfo) -> None:
+    """Print article information as plain text."""
+    print(f"Title: {article_info.title}")
+    print(f"Authors: {', '.join(article_info.authors) if article_info.authors else 'N/A'}")
+    print(f"Year: {article_info.year}")
+    print(f"Journal: {article_info.journal or 'N/A'}")
+    print(f"Publisher: {article_info.publisher or 'N/A'}")
+    print(f"DOI: {article_info.doi}")
+    print(f"URL: {article_info.url or 'N/A'}")
+    print(f"Type: {article_info.type or 'N/A'}")
+    if args.full and article_info.abstract:
+        print(f"Abstract: {article_info.abstract}")
+
+
+def print_article_infos(args: argparse.Namespace, articles_info: Optional[List[Optional[ArticleInfo]]]) -> None:
+    """Print the article information found for BibTeX entries."""
     if args.json:
-        # JSON output
-        results = [format_article_info(ai) for ai in articles_info if ai]
-        print(json.dumps(results, indent=2))
+        # JSON output, converted one entry at a time instead of building every dict first
+        print_json_array(format_article_info(ai) for ai in articles_info or [] if ai)
     else:
         # Plain text output
         if articles_info:
@@ -140,30 +425,161 @@ def find_info_from_bibtex(args: argparse.Namespace) -> None:
                     if i > 0:
                         print("\n" + "-" * 50 + "\n")
                     
-                    print(f"Title: {article_info.title}")
-                    print(f"Authors: {', '.join(article_info.authors) if article_info.authors else 'N/A'}")
-                    print(f"Year: {article_info.year}")
-                    print(f"Journal: {article_info.journal or 'N/A'}")
-                    print(f"Publisher: {article_info.publisher or 'N/A'}")
-                    print(f"DOI: {article_info.doi}")
-                    print(f"URL: {article_info.url or 'N/A'}")
-                    print(f"Type: {article_info.type or 'N/A'}")
-                    if args.full and article_info.abstract:
-                        print(f"Abstract: {article_info.abstract}")
+                    print_article_info(args, article_info)
         else:
             print("No article information found")
 
 
+def print_stats(args: argparse.Namespace) -> None:
+    """Print the metrics collected during the run to stderr in the --stats format."""
+    metrics = args.metrics
+    if args.stats == "json":
+        output = metrics.to_json()
+    elif args.stats == "prometheus":
+        output = metrics.to_prometheus().rstrip("\n")
+    else:
+        output = metrics.report()
+    print(output, file=sys.stderr)
+
+
+def write_trace(args: argparse.Namespace) -> None:
+    """Write the spans recorded during the run to the --trace file."""
+    tracer = args.tracer
+    try:
+        tracer.write(args.trace, format=args.trace_format)
+    except OSError as e:
+        print(f"Error writing trace: {e}", file=sys.stderr)
+        return
+    message = f"Trace of {len(tracer.spans)} spans written to {args.trace}"
+    if tracer.dropped:
+        message += f" ({tracer.dropped} spans dropped)"
+    print(message, file=sys.stderr)
+
+
+def profile_path(args: argparse.Namespace) -> str:
+    """Path of the --profile report: the one given, or next to the first output file."""
+    if args.profile:
+        return args.profile
+    outputs = [getattr(args, name, None) for name in ("csv", "parquet", "output", "trace")]
+    output = next((path for path in outputs if path and path != '-'), None)
+    if output is None:
+        return "find-doi.profile.txt"
+    return os.path.splitext(output)[0] + ".profile.txt"
+
+
+def write_profile(args: argparse.Namespace, profiler) -> None:
+    """Write the --profile report, and the collapsed stacks for flame graphs beside it."""
+    path = profile_path(args)
+    stacks = os.path.splitext(path)[0] + ".folded"
+    try:
+        profiler.write_report(path)
+        profiler.write_collapsed(stacks)
+    except OSError as e:
+        print(f"Error writing profile: {e}", file=sys.stderr)
+        return
+    print(f"Profile written to {path}, stacks for flame graphs to {stacks}", file=sys.stderr)
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Serve lookups from a warm DOIFinder until interrupted."""
+    from .daemon import serve
+
+    finder = make_finder(args)
+    try:
+        serve(finder, host=args.host, port=args.port, socket_path=args.socket, max_workers=args.workers)
+    except OSError as e:
+        print(f"Error starting server: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        finder.close()
+
+
+def warm_cache(args: argparse.Namespace) -> None:
+    """Resolve the entries of BibTeX files into the cache, without printing them."""
+    from .shard import expand_inputs, iter_resolve_files
+
+    paths = expand_inputs(args.input_file)
+    if not paths:
+        print("Error: no BibTeX files found", file=sys.stderr)
+        sys.exit(1)
+
+    def resolutions():
+        if args.processes > 1:
+            for _, resolution in iter_resolve_files(
+                paths, processes=args.processes, max_workers=args.workers, metrics=getattr(args, "metrics", None),
+                tracer=getattr(args, "tracer", None),
+                cache_ttl=args.cache_ttl, negative_ttl=args.negative_ttl, mailto_email=args.email,
+                cache=args.cache, base_url=args.api_url, index=args.index, lean=args.lean,
+                max_queries=args.max_queries, **resilience_options(args),
+            ):
+                yield resolution
+            return
+        with make_finder(args) as finder:
+            for path in paths:
+                try:
+                    with open(path, "r", encoding="utf-8") as file:
+                        yield from finder.iter_resolve_bibtex(file, max_workers=args.workers)
+                except (OSError, UnicodeDecodeError) as e:
+                    yield Resolution(error=f"Error reading file: {e}")
+
+    counts = {'found': 0, 'miss': 0, 'error': 0}
+    cached = 0
+    for resolution in resolutions():
+        counts[resolution.status] += 1
+        cached += resolution.source in ('cache', 'index')
+    print(f"Warmed the cache with {sum(counts.values())} entries from {len(paths)} files: "
+          f"{counts['found']} found, {counts['miss']} not found, {counts['error']} failed, "
+          f"{cached} already known", file=sys.stderr)
+    if counts['error']:
+        sys.exit(1)
+
+
+def export_cache(args: argparse.Namespace) -> None:
+    """Write every entry of the cache to a JSON Lines file, see `CacheBackend.dump`."""
+    from .cache import open_cache, write_records
+    from .rediscache import CacheError
+
+    cache = open_cache(args.cache, ttl=args.cache_ttl, negative_ttl=args.negative_ttl)
+    try:
+        count = write_records(cache.dump(), args.output)
+    except (OSError, CacheError) as e:
+        print(f"Error exporting cache: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        cache.close()
+    print(f"Exported {count} cache records to {args.output}", file=sys.stderr)
+
+
+def import_cache(args: argparse.Namespace) -> None:
+    """Load the records of `export_cache` files into the cache."""
+    from .cache import open_cache, read_records
+    from .rediscache import CacheError
+
+    cache = open_cache(args.cache, ttl=args.cache_ttl, negative_ttl=args.negative_ttl)
+    try:
+        count = sum(cache.load(read_records(path)) for path in args.input)
+    except (OSError, ValueError, KeyError, CacheError) as e:
+        print(f"Error importing cache records: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        cache.close()
+    print(f"Imported {count} cache records", file=sys.stderr)
+
+
+def build_index(args: argparse.Namespace) -> None:
+    """Build an offline index from CrossRef metadata dumps."""
+    from .index import LocalIndex
+
+    try:
+        works = LocalIndex.build(args.dumps, args.output)
+    except Exception as e:
+        print(f"Error building index: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Indexed {works} works into {args.output}")
+
+
 def main() -> None:
     """Main entry point for the CLI."""
-    # Define valid commands
-    commands = ['doi', 'info', 'bibtex', 'bibtex-info']
-    
-    # Check if first argument is not a recognized command and doesn't start with hyphen
-    if len(sys.argv) > 1 and not sys.argv[1].startswith('-') and sys.argv[1] not in commands:
-        # Insert 'doi' command before the first argument
-        sys.argv.insert(1, 'doi')
-    
     # Create the top-level parser
     parser = argparse.ArgumentParser(
         description="DOI Finder - Find Digital Object Identifiers for academic articles",
@@ -177,6 +593,57 @@ def main() -> None:
     common_parser = argparse.ArgumentParser(add_help=False)
     common_parser.add_argument("--email", help="Email to send to CrossRef API for better rate limits")
     common_parser.add_argument("--json", action="store_true", help="Output in JSON format")
+    common_parser.add_argument("--api-url", default="https://api.crossref.org", metavar="URL",
+                               help="Base URL of the CrossRef REST API, e.g. a local mock server")
+    common_parser.add_argument("--cache", metavar="PATH",
+                               help="SQLite file used to cache lookup results between runs, or a shared cache: "
+                                    "redis://HOST:PORT/DB, or memory:// for this process only "
+                                    f"(serve and cache commands default to {DEFAULT_CACHE})")
+    common_parser.add_argument("--cache-ttl", type=float, default=30 * 24 * 3600, metavar="SECONDS",
+                               help="Seconds before a cached lookup expires")
+    common_parser.add_argument("--negative-ttl", type=float, default=7 * 24 * 3600, metavar="SECONDS",
+                               help="Seconds before a cached 'not found' expires, 0 to not cache misses")
+    common_parser.add_argument("--lean", action="store_true",
+                               help="Request only the fields each lookup needs instead of full CrossRef records")
+    common_parser.add_argument("--index", metavar="PATH",
+                               help="Offline index (see the 'index' command) searched before the CrossRef API")
+    common_parser.add_argument("--max-queries", type=int, default=3, metavar="N",
+                               help="Most searches sent per title: title (and author), then bibliographic, "
+                                    "then title only")
+    common_parser.add_argument("--dedupe-threshold", type=float, default=0, metavar="SIMILARITY",
+                               help="Also look up BibTeX entries of the same first author whose titles have "
+                                    "this similarity (0-1, e.g. 0.8) once, checking the record found against "
+                                    "each title; 0 only merges identical titles")
+    common_parser.add_argument("--stats", nargs="?", const="text", choices=["text", "json", "prometheus"],
+                               help="Print request timings, cache hit rates and lookup counts to stderr at the end")
+    common_parser.add_argument("--trace", metavar="PATH",
+                               help="Write a span for every stage of every lookup (parsing, title cleaning, "
+                                    "rate limiter waits, requests, decoding, matching) to this file")
+    common_parser.add_argument("--trace-format", choices=["chrome", "otlp"], default="chrome",
+                               help="Format of --trace: Chrome trace events (chrome://tracing, Perfetto) "
+                                    "or OpenTelemetry JSON")
+    common_parser.add_argument("--profile", nargs="?", const="", metavar="PATH",
+                               help="Profile the run by sampling every thread and write a report to PATH "
+                                    "(default: next to the output file, NAME.profile.txt) with the "
+                                    "collapsed stacks beside it. Worker processes are not profiled.")
+    common_parser.add_argument("--connect-timeout", type=float, default=5.0, metavar="SECONDS",
+                               help="Seconds to wait for a connection to CrossRef")
+    common_parser.add_argument("--read-timeout", type=float, default=30.0, metavar="SECONDS",
+                               help="Seconds to wait for CrossRef to send data")
+    common_parser.add_argument("--retries", type=int, default=2, metavar="N",
+                               help="Times a request failing with a connection error, a timeout or a 5xx "
+                                    "response is retried, with exponential backoff")
+    common_parser.add_argument("--call-deadline", type=float, metavar="SECONDS",
+                               help="Seconds a single lookup may take, searches and retries included")
+    common_parser.add_argument("--deadline", type=float, metavar="SECONDS",
+                               help="Seconds the whole run may take; lookups not done by then are reported as errors")
+    common_parser.add_argument("--hedge", action="store_true",
+                               help="Send a duplicate of requests slower than usual and use the first answer")
+    common_parser.add_argument("--breaker-threshold", type=int, default=5, metavar="N",
+                               help="Consecutive failed requests that stop requests to CrossRef for a while, "
+                                    "0 to never stop")
+    common_parser.add_argument("--breaker-cooldown", type=float, default=30.0, metavar="SECONDS",
+                               help="Seconds before requests are tried again after the circuit breaker opened")
     
     # Subparser for 'doi' command (renamed from 'title')
     doi_parser = subparsers.add_parser("doi", help="Find DOI by article title", parents=[common_parser])
@@ -193,21 +660,122 @@ def main() -> None:
     
     # Subparser for 'bibtex' command
     bibtex_parser = subparsers.add_parser("bibtex", help="Find DOI from BibTeX", parents=[common_parser])
-    bibtex_parser.add_argument("input_file", help="BibTeX file (use '-' for stdin)")
+    bibtex_parser.add_argument("input_file", nargs="+",
+                        help="BibTeX files, directories or glob patterns (use '-' for stdin)")
+    bibtex_parser.add_argument("--processes", type=int, default=1, metavar="N",
+                        help="Worker processes the input files are spread over")
+    bibtex_parser.add_argument("--workers", type=int, default=1, metavar="N", help="Number of entries resolved concurrently")
+    bibtex_parser.add_argument("--jsonl", action="store_true",
+                               help="Stream one JSON object per entry as soon as it is resolved, with its status and error")
+    bibtex_parser.add_argument("--checkpoint", metavar="PATH",
+                               help="Journal file recording every resolved entry as it completes")
+    bibtex_parser.add_argument("--resume", action="store_true",
+                               help="Skip entries already resolved in the --checkpoint journal and retry failed ones")
+    bibtex_parser.add_argument("--csv", metavar="PATH", help="Write the results as CSV ('-' for stdout)")
+    bibtex_parser.add_argument("--parquet", metavar="PATH", help="Write the results as a Parquet file (needs pyarrow)")
+    bibtex_parser.add_argument("--write-back", action="store_true",
+                               help="Insert the DOIs found into the BibTeX files, only looking up entries "
+                                    "added or edited since the last run")
+    bibtex_parser.add_argument("--state", metavar="PATH",
+                               help="State file of --write-back (default: next to the file, NAME.find-doi.json)")
     bibtex_parser.set_defaults(func=find_from_bibtex)
     
     # Subparser for 'bibtex-info' command
     bibtex_info_parser = subparsers.add_parser("bibtex-info", help="Find article information from BibTeX", parents=[common_parser])
-    bibtex_info_parser.add_argument("input_file", help="BibTeX file (use '-' for stdin)")
+    bibtex_info_parser.add_argument("input_file", nargs="+",
+                             help="BibTeX files, directories or glob patterns (use '-' for stdin)")
+    bibtex_info_parser.add_argument("--processes", type=int, default=1, metavar="N",
+                             help="Worker processes the input files are spread over")
     bibtex_info_parser.add_argument("--full", action="store_true", help="Include full information (abstract)")
+    bibtex_info_parser.add_argument("--workers", type=int, default=1, metavar="N", help="Number of entries resolved concurrently")
+    bibtex_info_parser.add_argument("--jsonl", action="store_true",
+                                    help="Stream one JSON object per entry as soon as it is resolved, with its status and error")
+    bibtex_info_parser.add_argument("--checkpoint", metavar="PATH",
+                                    help="Journal file recording every resolved entry as it completes")
+    bibtex_info_parser.add_argument("--resume", action="store_true",
+                                    help="Skip entries already resolved in the --checkpoint journal and retry failed ones")
+    bibtex_info_parser.add_argument("--csv", metavar="PATH", help="Write the results as CSV ('-' for stdout)")
+    bibtex_info_parser.add_argument("--parquet", metavar="PATH",
+                                    help="Write the results as a Parquet file (needs pyarrow)")
     bibtex_info_parser.set_defaults(func=find_info_from_bibtex)
     
+    # Subparser for 'index' command
+    index_parser = subparsers.add_parser("index", help="Build an offline index from CrossRef metadata dumps")
+    index_parser.add_argument("dumps", nargs="+", help="CrossRef JSON or JSON Lines dump files (optionally gzipped)")
+    index_parser.add_argument("-o", "--output", required=True, help="Path of the index file to write")
+    index_parser.set_defaults(func=build_index)
+
+    # Subparser for 'cache' command
+    cache_parser = subparsers.add_parser("cache", help="Warm, export or import a lookup cache")
+    cache_subparsers = cache_parser.add_subparsers(dest="action", required=True)
+    warm_parser = cache_subparsers.add_parser("warm", help="Resolve BibTeX files into the cache",
+                                              parents=[common_parser])
+    warm_parser.add_argument("input_file", nargs="+", help="BibTeX files, directories or glob patterns")
+    warm_parser.add_argument("--processes", type=int, default=1, metavar="N",
+                             help="Resolve the files in N worker processes")
+    warm_parser.add_argument("--workers", type=int, default=1, metavar="N", help="Number of entries resolved concurrently")
+    warm_parser.set_defaults(func=warm_cache)
+    export_parser = cache_subparsers.add_parser("export", help="Write the cache as JSON Lines",
+                                                parents=[common_parser])
+    export_parser.add_argument("output", help="File to write, gzipped if it ends with .gz ('-' for stdout)")
+    export_parser.set_defaults(func=export_cache)
+    import_parser = cache_subparsers.add_parser("import", help="Load exported JSON Lines into the cache",
+                                                parents=[common_parser])
+    import_parser.add_argument("input", nargs="+", help="Files written by 'cache export' ('-' for stdin)")
+    import_parser.set_defaults(func=import_cache)
+    
+    # Subparser for 'serve' command
+    serve_parser = subparsers.add_parser("serve", help="Answer lookups over HTTP or a Unix socket from one warm process",
+                                         parents=[common_parser])
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    serve_parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    serve_parser.add_argument("--socket", metavar="PATH", help="Serve JSON Lines on this Unix socket instead of HTTP")
+    serve_parser.add_argument("--workers", type=int, default=8, metavar="N",
+                              help="Number of lookups of a batch resolved concurrently")
+    serve_parser.set_defaults(func=serve)
+
+    # Check if first argument is not a recognized command and doesn't start with hyphen.
+    # A command name without the positional arguments it needs is a title, e.g. `find-doi index --json`.
+    if len(sys.argv) > 1 and not sys.argv[1].startswith('-') and (
+            sys.argv[1] not in COMMANDS or not (COMMANDS[sys.argv[1]] or any(
+                not argument.startswith('-') for argument in common_parser.parse_known_args(sys.argv[2:])[1]))):
+        # Insert 'doi' command before the first argument
+        sys.argv.insert(1, 'doi')
+
     # Parse arguments
     args = parser.parse_args()
+    if args.command in ("serve", "cache") and not args.cache:
+        args.cache = default_cache()
     
+    if getattr(args, "stats", None):
+        args.metrics = Metrics()
+    if getattr(args, "trace", None):
+        from .tracing import Tracer
+        args.tracer = Tracer()
+    profiler = None
+    if getattr(args, "profile", None) is not None:
+        from .profiling import SamplingProfiler
+        profiler = SamplingProfiler()
+
     # Execute the appropriate function or show help
     if hasattr(args, "func"):
-        args.func(args)
+        if profiler is not None:
+            profiler.start()
+        try:
+            with deadline(getattr(args, "deadline", None)):
+                args.func(args)
+        except CrossRefError as e:
+            # CrossRef could not be asked, which is not the same as finding nothing
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+                write_profile(args, profiler)
+            if getattr(args, "stats", None):
+                print_stats(args)
+            if getattr(args, "trace", None):
+                write_trace(args)
     else:
         parser.print_help()
 
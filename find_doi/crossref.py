@@ -0,0 +1,204 @@
+"""
+Helpers for building CrossRef queries and parsing CrossRef responses.
+
+These are shared by the synchronous and asynchronous clients so both match
+and extract results in exactly the same way.
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .models import ArticleInfo
+
+# Fields read when only the DOI of a search result is needed
+DOI_FIELDS = ("DOI", "title")
+# Fields read by `parse_article_info`, plus the relevance score
+ARTICLE_INFO_FIELDS = (
+    "DOI", "title", "author", "published-print", "published-online", "created",
+    "container-title", "publisher", "URL", "abstract", "type", "score",
+)
+# Results requested by the first query of a search plan
+FIRST_ROWS = 5
+# Results requested by the fallback queries of a search plan
+FALLBACK_ROWS = 10
+# `title_score` of the first query's results below which the fallback queries are not sent
+FALLBACK_SCORE = 0.5
+
+
+# JSON decoder picked on first use, so orjson is not imported with the package
+_loads = None
+
+
+def decode_json(content: Union[bytes, str]) -> Any:
+    """Decode a JSON response body, with orjson when it is installed."""
+    global _loads
+    if _loads is None:
+        try:
+            import orjson
+            _loads = orjson.loads
+        except ImportError:  # pragma: no cover - optional dependency
+            _loads = json.loads
+    return _loads(content)
+
+
+def sanitize_title(title: str) -> str:
+    """Sanitize the title by removing special characters and converting to lowercase."""
+    _sanitized_title = title.lower().strip()
+    # remove special characters using regex
+    _sanitized_title = re.sub(r'[^\w\s]', '', _sanitized_title)
+    # remove all spaces
+    _sanitized_title = re.sub(r'\s+', '', _sanitized_title)
+    return _sanitized_title
+
+
+def cache_key(kind: str, title: str, author: Optional[str] = None) -> str:
+    """Build the cache key for a title/author query."""
+    key = f"{kind}:{sanitize_title(title)}"
+    if author:
+        key += "|" + re.sub(r'\s+', ' ', author.lower().strip())
+    return key
+
+
+def works_query_params(title: str, author: Optional[str] = None,
+                       select: Optional[Sequence[str]] = None, rows: int = 5,
+                       bibliographic: bool = False) -> Dict[str, Any]:
+    """
+    Build the query parameters of a `/works` search by title and author.
+
+    Args:
+        title (str): The title to search for
+        author (str, optional): Author name to narrow the search
+        select (Sequence[str], optional): Only return these fields of each record
+        rows (int): Number of results to return
+        bibliographic (bool): Search title and author together with ``query.bibliographic``,
+                              which also matches citations whose fields are mixed up
+
+    Returns:
+        dict: The query parameters
+    """
+    if bibliographic:
+        params = {"query.bibliographic": " ".join(part for part in (title, author) if part)}
+    else:
+        params = {"query.title": title}
+    params.update({
+        "rows": rows,
+        "sort": "score",  # Sort by relevance score
+        "order": "desc"
+    })
+
+    if author and not bibliographic:
+        params["query.author"] = author
+    if select:
+        params["select"] = ",".join(select)
+    return params
+
+
+def title_score(items: Iterable[Dict[str, Any]], title: str) -> float:
+    """
+    Score how close the results of a search came to a title.
+
+    Args:
+        items (Iterable[dict]): Work records from a `/works` response
+        title (str): The queried title
+
+    Returns:
+        float: The largest word overlap (Jaccard similarity) between the title and the title
+        of a result, from 0 when no result shares a word with it to 1
+    """
+    words = set(re.findall(r'\w+', title.lower()))
+    best = 0.0
+    for item in items:
+        if words and item.get('title'):
+            found = set(re.findall(r'\w+', item['title'][0].lower()))
+            best = max(best, len(words & found) / len(words | found))
+    return best
+
+
+def works_query_plan(title: str, author: Optional[str] = None,
+                     select: Optional[Sequence[str]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Plan the `/works` searches for a title, cheapest and most selective first.
+
+    Callers send the queries in order and stop at the first one whose results
+    match the title:
+
+    1. ``title``: ``query.title`` (and ``query.author``), with `FIRST_ROWS` results
+    2. ``bibliographic``: title and author as one ``query.bibliographic``, with
+       `FALLBACK_ROWS` results, for titles the first query ranked too low
+    3. ``title_only``: ``query.title`` without the author, with `FALLBACK_ROWS`
+       results, for author names that do not match CrossRef's records
+
+    The fallbacks are only sent when the `title_score` of the first query's
+    results reaches `FALLBACK_SCORE`. Below it no result is about a similar
+    title, the work is most likely unknown to CrossRef and searching wider
+    would only cost more requests.
+
+    Args:
+        title (str): The title to search for
+        author (str, optional): Author name to narrow the search
+        select (Sequence[str], optional): Only return these fields of each record
+
+    Returns:
+        List[Tuple[str, dict]]: The name and query parameters of each step
+    """
+    plan = [
+        ("title", works_query_params(title, author, select, rows=FIRST_ROWS)),
+        ("bibliographic", works_query_params(title, author, select, rows=FALLBACK_ROWS, bibliographic=True)),
+    ]
+    if author:
+        plan.append(("title_only", works_query_params(title, None, select, rows=FALLBACK_ROWS)))
+    return plan
+
+
+def match_title(items: Iterable[Dict[str, Any]], title: str) -> Optional[Dict[str, Any]]:
+    """
+    Find the first work whose sanitized title equals the sanitized query title.
+
+    Args:
+        items (Iterable[dict]): Work records from a `/works` response
+        title (str): The queried title
+
+    Returns:
+        Optional[dict]: The matching work record, None if no title matches
+    """
+    _sanitized_title = sanitize_title(title)
+    for item in items:
+        if 'title' in item and item['title']:
+            # Exact match but only characters are important
+            if sanitize_title(item['title'][0]) == _sanitized_title:
+                return item
+    return None
+
+
+def parse_article_info(item: Dict[str, Any]) -> ArticleInfo:
+    """Extract an ArticleInfo from a CrossRef work record."""
+    # Extract authors
+    authors = []
+    if 'author' in item:
+        for author in item['author']:
+            if 'given' in author and 'family' in author:
+                authors.append(f"{author['given']} {author['family']}")
+            elif 'family' in author:
+                authors.append(author['family'])
+
+    # Extract year
+    year = None
+    if 'published-print' in item:
+        year = item['published-print']['date-parts'][0][0]
+    elif 'published-online' in item:
+        year = item['published-online']['date-parts'][0][0]
+    elif 'created' in item:
+        year = item['created']['date-parts'][0][0]
+
+    return ArticleInfo(
+        doi=item.get('DOI'),
+        title=item.get('title', [None])[0],
+        authors=authors,
+        year=year,
+        journal=item.get('container-title', [None])[0] if item.get('container-title') else None,
+        publisher=item.get('publisher'),
+        url=item.get('URL'),
+        abstract=item.get('abstract'),
+        type=item.get('type')
+    )
@@ -0,0 +1,305 @@
+"""
+Long-running lookup service keeping a warm DOIFinder.
+
+One process holds the pooled connections, the lookup cache and the rate-limit
+state, and answers lookups from editors, build scripts or other services over
+local HTTP/JSON or a Unix socket speaking JSON Lines.
+
+A lookup request is a JSON object::
+
+    {"op": "resolve", "title": "...", "author": "...", "doi": "...", "id": 1}
+
+``op`` is ``doi``, ``info``, ``resolve`` (the default) or ``bibtex`` (with a
+``bibtex`` string), and ``id`` is echoed back. A JSON list of requests is a
+batch: its lookups run concurrently, DOIs are fetched with batched
+``filter=doi:...`` queries and the results come back as a list in the same
+order.
+
+HTTP endpoints::
+
+    POST /lookup                   a request or a batch as the JSON body
+    GET  /doi?title=...&author=... the same as a request, op taken from the path
+    GET  /health                   liveness and uptime
+    GET  /metrics                  Prometheus metrics, see `Metrics`
+    GET  /stats                    the same metrics as JSON
+
+On a Unix socket, every line holds a request or a batch and is answered with
+one line.
+"""
+
+import json
+import os
+import signal
+import socketserver
+import stat
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import parse_qsl, urlsplit
+
+from . import CrossRefError, DOIFinder
+from .format import format_article_info, format_resolution
+from .models import Resolution
+from .resilience import map_concurrently
+
+OPS = ("doi", "info", "resolve", "bibtex")
+# Largest request body accepted over HTTP
+MAX_BODY = 32 * 1024 * 1024
+
+
+class LookupServer:
+    """Serve lookups of a shared DOIFinder over HTTP or a Unix socket."""
+
+    def __init__(self, finder: DOIFinder, host: str = "127.0.0.1", port: int = 8765,
+                 socket_path: Optional[str] = None, max_workers: int = 8):
+        """
+        Create the server, call `serve_forever` or `start` to serve.
+
+        Args:
+            finder (DOIFinder): The finder answering lookups, kept warm between requests
+            host (str): Interface to listen on for HTTP
+            port (int): Port to listen on for HTTP, 0 picks a free port
+            socket_path (str, optional): Serve JSON Lines on this Unix socket instead of HTTP
+            max_workers (int): Number of lookups of a batch resolved concurrently
+
+        Raises:
+            FileExistsError: If socket_path exists and is not a socket
+        """
+        self.finder = finder
+        self.max_workers = max_workers
+        self.socket_path = socket_path
+        self.started = time.time()
+        if socket_path is not None:
+            _remove_stale_socket(socket_path)
+            self._server = socketserver.ThreadingUnixStreamServer(socket_path, self._stream_handler())
+        else:
+            self._server = ThreadingHTTPServer((host, port), self._http_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Address clients connect to."""
+        if self.socket_path is not None:
+            return f"unix:{self.socket_path}"
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        """Serve requests on the calling thread until `stop` is called."""
+        self._server.serve_forever()
+
+    def start(self) -> "LookupServer":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the listening socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
+        if self.socket_path is not None and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self) -> "LookupServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def dispatch(self, payload: Union[Dict[str, Any], List[Any]]) -> Union[Dict[str, Any], List[Any]]:
+        """
+        Answer a request or a batch of requests.
+
+        Args:
+            payload (dict or list): A request object, or a list of them
+
+        Returns:
+            dict or list: The result object, or a list of results in request order
+        """
+        if isinstance(payload, list):
+            return self.handle_batch(payload)
+        return self.handle(payload)
+
+    def handle(self, request: Dict[str, Any], prefetched: Optional[Dict[str, Resolution]] = None) -> Dict[str, Any]:
+        """
+        Answer a single lookup request.
+
+        Args:
+            request (dict): The request, see the module documentation
+            prefetched (dict, optional): Resolutions of DOIs already fetched for the batch
+
+        Returns:
+            dict: The result, with an ``error`` field if the request could not be answered
+        """
+        if not isinstance(request, dict):
+            return {"error": "A request must be a JSON object"}
+        op = request.get("op") or "resolve"
+        invalid = [field for field in ("title", "author", "doi", "bibtex")
+                   if request.get(field) is not None and not isinstance(request[field], str)]
+        try:
+            result = self._lookup(op, request, invalid, prefetched)
+        except CrossRefError as e:
+            # One failed lookup does not fail the rest of its batch
+            result = {"error": str(e)}
+        if "id" in request:
+            result["id"] = request["id"]
+        return result
+
+    def _lookup(self, op: str, request: Dict[str, Any], invalid: List[str],
+                prefetched: Optional[Dict[str, Resolution]]) -> Dict[str, Any]:
+        """Run the lookup of a request, see `handle`."""
+        title = request.get("title")
+        author = request.get("author")
+        doi = request.get("doi")
+        if op not in OPS:
+            return {"error": f"Unknown op {op!r}, expected one of {', '.join(OPS)}"}
+        if invalid:
+            return {"error": f"{', '.join(invalid)} must be a string"}
+        if op == "bibtex":
+            resolutions = self.finder.resolve_bibtex(request.get("bibtex") or "", max_workers=self.max_workers)
+            return {"results": [format_resolution(resolution, info=True) for resolution in resolutions or []]}
+        if op == "resolve" and doi and prefetched is not None and doi.strip().lower() in prefetched:
+            return format_resolution(prefetched[doi.strip().lower()], info=True)
+        if op == "resolve":
+            return format_resolution(self.finder.resolve(title=title, author=author, doi=doi), info=True)
+        if not title:
+            return {"error": f"The {op} op needs a title"}
+        if op == "doi":
+            return {"doi": self.finder.find_by_metadata(title, author=author)}
+        return format_article_info(self.finder.find_article_info(title, author))
+
+    def handle_batch(self, requests: List[Any]) -> List[Dict[str, Any]]:
+        """Answer a batch of requests concurrently, fetching their DOIs together."""
+        dois = [request["doi"] for request in requests
+                if isinstance(request, dict) and (request.get("op") or "resolve") == "resolve"
+                and isinstance(request.get("doi"), str) and request["doi"].strip()]
+        prefetched = {}
+        if len(dois) > 1:
+            resolutions = self.finder.resolve_dois(dois, max_workers=self.max_workers)
+            prefetched = {doi.strip().lower(): resolution for doi, resolution in zip(dois, resolutions)}
+        return map_concurrently(lambda request: self.handle(request, prefetched), requests, self.max_workers)
+
+    def health(self) -> Dict[str, Any]:
+        """Liveness information."""
+        return {"status": "ok", "uptime": time.time() - self.started}
+
+    def _http_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, avoid delayed-ACK stalls
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                name = url.path.strip("/")
+                if name == "health":
+                    return self._send(200, server.health())
+                if name == "metrics":
+                    return self._send_text(200, server.finder.metrics.to_prometheus(),
+                                           "text/plain; version=0.0.4")
+                if name == "stats":
+                    return self._send(200, server.finder.metrics.snapshot())
+                if name not in OPS or name == "bibtex":
+                    return self._send(404, {"error": f"Unknown path {url.path}"})
+                request = dict(parse_qsl(url.query))
+                request["op"] = name
+                self._answer(request)
+
+            def do_POST(self):
+                if urlsplit(self.path).path.strip("/") != "lookup":
+                    return self._send(404, {"error": f"Unknown path {self.path}"})
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > MAX_BODY:
+                    return self._send(413, {"error": "Request body too large"})
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"null")
+                except ValueError as e:
+                    return self._send(400, {"error": f"Invalid JSON: {e}"})
+                if not isinstance(payload, (dict, list)):
+                    return self._send(400, {"error": "Expected a request object or a list of them"})
+                self._answer(payload)
+
+            def _answer(self, payload):
+                # Failed lookups are reported in the results, like on the Unix socket
+                try:
+                    result = server.dispatch(payload)
+                except Exception as e:
+                    return self._send(500, {"error": str(e)})
+                self._send(200, result)
+
+            def _send(self, status: int, body: Any):
+                self._send_text(status, json.dumps(body), "application/json")
+
+            def _send_text(self, status: int, text: str, content_type: str):
+                data = text.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def _stream_handler(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        result = server.dispatch(json.loads(line))
+                    except ValueError as e:
+                        result = {"error": f"Invalid JSON: {e}"}
+                    except Exception as e:
+                        result = {"error": str(e)}
+                    self.wfile.write(json.dumps(result).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+
+        return Handler
+
+
+def _remove_stale_socket(path: str) -> None:
+    """
+    Remove a socket left behind by a server that did not shut down cleanly.
+
+    Raises:
+        FileExistsError: If the path exists and is not a socket
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket, refusing to replace it")
+    os.unlink(path)
+
+
+def serve(finder: DOIFinder, host: str = "127.0.0.1", port: int = 8765, socket_path: Optional[str] = None,
+          max_workers: int = 8) -> None:
+    """Serve lookups until interrupted, see `LookupServer`."""
+    server = LookupServer(finder, host=host, port=port, socket_path=socket_path, max_workers=max_workers)
+    print(f"Serving DOI lookups on {server.url}", file=sys.stderr, flush=True)
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    # Shut down cleanly under service managers, which stop processes with SIGTERM
+    signal.signal(signal.SIGTERM, terminate)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
@@ -0,0 +1,419 @@
+"""
+Clustering of BibTeX entries that cite the same work.
+
+Merged bibliographies list the same work many times, with titles differing
+in casing, LaTeX markup, punctuation, small typos or a subtitle. Entries are
+grouped by their normalized title (see `normalize_title`) and first author,
+and groups whose titles are near-duplicates are merged. Candidates come from
+MinHash signatures bucketed by locality-sensitive hashing, so each title is
+only compared with the few titles it shares a bucket with, never with all of
+them::
+
+    lookups = ClusterLookups(cluster_titles(titles, authors), titles, title_of=lambda info: info.title)
+    while lookups.pending():
+        lookups.record([find_article_info(titles[index]) for index in lookups.pending()])
+    article_infos = lookups.results
+
+Near-duplicates are candidates, not proof: "linear" and "nonlinear systems"
+differ by three letters, and normalization may still fold two titles
+together. `ClusterLookups` only shares the record found for one spelling with
+the other spellings of a cluster, equal normalized titles included, whose
+title it matches, and looks the others up on their own.
+"""
+
+import re
+import unicodedata
+import zlib
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from .crossref import match_title, sanitize_title
+
+# Jaccard similarity of title shingles above which two titles are likely the same work, when
+# near-duplicates are clustered at all
+DEFAULT_THRESHOLD = 0.8
+# Characters per shingle
+SHINGLE_SIZE = 4
+# MinHash signature split into BANDS bands of ROWS values, candidates share a whole band
+BANDS = 8
+ROWS = 4
+# Most titles of a bucket a title is compared with
+MAX_BUCKET_COMPARISONS = 50
+# Words a title must keep without its subtitle to be matched with the subtitled version
+MIN_MAIN_TITLE_WORDS = 3
+# Letters a word may differ by to be taken for a typo of another, twice that for words of LONG_WORD letters
+MAX_TYPO_EDITS = 1
+LONG_WORD = 8
+
+_EMPTY_BAND = (-1,) * ROWS
+
+# Commands standing for letters rather than formatting them
+_LATEX_LETTERS = {
+    'ss': 'ss', 'ae': 'ae', 'AE': 'AE', 'oe': 'oe', 'OE': 'OE', 'aa': 'a', 'AA': 'A',
+    'o': 'o', 'O': 'O', 'l': 'l', 'L': 'L', 'i': 'i', 'j': 'j',
+}
+_LATEX_LETTER = re.compile(r'\\(' + '|'.join(sorted(_LATEX_LETTERS, key=len, reverse=True)) + r')(?![a-zA-Z])')
+_LATEX_ESCAPE = re.compile(r'\\([&%$#_{}])')
+_LATEX_ACCENT = re.compile(r'\\(?:[\'"^`~=.]|[Hvucdbtkr](?![a-zA-Z]))\s*')
+_LATEX_COMMAND = re.compile(r'\\([a-zA-Z]+)\*?')
+# Commands formatting or spacing text, dropped; other commands such as ``\\beta`` or
+# ``\\log`` name what they stand for and are kept as words
+_LATEX_FORMATTING = frozenset({
+    'emph', 'textbf', 'textit', 'textsc', 'texttt', 'textrm', 'textsf', 'textsl', 'textup', 'textmd',
+    'textnormal', 'text', 'mathrm', 'mathbf', 'mathit', 'mathsf', 'mathtt', 'mathcal', 'mathbb', 'mathfrak',
+    'mathscr', 'boldsymbol', 'bm', 'operatorname', 'mbox', 'hbox', 'ensuremath', 'it', 'bf', 'em', 'rm', 'sc',
+    'sf', 'tt', 'sl', 'cal', 'up', 'protect', 'relax', 'nocase', 'url', 'textsuperscript', 'textsubscript',
+    'left', 'right', 'big', 'Big', 'bigl', 'bigr', 'ldots', 'dots', 'cdots', 'textendash', 'textemdash',
+    'quad', 'qquad', 'noindent', 'xspace',
+})
+# Variant shapes of Greek letters, named like the letter
+_LATEX_GREEK_VARIANTS = {'varepsilon': 'epsilon', 'vartheta': 'theta', 'varpi': 'pi', 'varrho': 'rho',
+                         'varsigma': 'sigma', 'varphi': 'phi', 'varkappa': 'kappa'}
+_GREEK_LETTER = re.compile(r'[\u0370-\u03ff]')
+_SUBTITLE = re.compile(r'\s*(?::|\s-{1,3}\s|\u2013|\u2014)\s*')
+# Numbers, including the roman numerals of "Part II", which set otherwise equal titles apart
+_NUMBER = re.compile(r'\b(?:\d+|[ivx]+)\b')
+
+
+@dataclass
+class Cluster:
+    """Entries found to cite the same work."""
+    # Entry indices by distinct normalized title, the most common title first
+    groups: List[List[int]] = field(default_factory=list)
+
+    @property
+    def members(self) -> List[int]:
+        """Every entry index, the representative first."""
+        return [index for group in self.groups for index in group]
+
+    @property
+    def variants(self) -> List[int]:
+        """One entry per distinct normalized title, most common first."""
+        return [group[0] for group in self.groups]
+
+
+def latex_to_text(text: str) -> str:
+    """
+    Strip the LaTeX markup of a BibTeX field, keeping its words.
+
+    Accents and special letters become their base letters (``{\\"o}`` and ``ö``
+    both give ``o``), formatting commands such as ``\\emph`` are dropped with
+    their braces, dashes and ties become spaces. Greek letters and other math
+    commands become words (``$\\beta$`` and ``β`` both give ``beta``), so
+    titles differing only by a symbol stay apart.
+    """
+    text = _LATEX_LETTER.sub(lambda match: _LATEX_LETTERS[match.group(1)], text)
+    text = _LATEX_ESCAPE.sub(r'\1', text)
+    text = _LATEX_ACCENT.sub('', text)
+    text = _LATEX_COMMAND.sub(_latex_command_word, text)
+    text = text.replace('$', '').replace('{', '').replace('}', '').replace('~', ' ')
+    text = re.sub(r'-{2,}', ' ', text)
+    if text.isascii():
+        return text
+    # Fold accented letters to their base letter
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _GREEK_LETTER.sub(_greek_letter_word, text)
+
+
+def _latex_command_word(match: re.Match) -> str:
+    name = match.group(1)
+    if name in _LATEX_FORMATTING:
+        return ' '
+    return f" {_LATEX_GREEK_VARIANTS.get(name, name)} "
+
+
+def _greek_letter_word(match: re.Match) -> str:
+    name = unicodedata.name(match.group(0), '')
+    if ' LETTER ' not in name:
+        return match.group(0)
+    # "GREEK SMALL LETTER FINAL SIGMA" is a sigma
+    word = name.split()[-1].lower()
+    return f" {word.capitalize() if ' CAPITAL ' in name else word} "
+
+
+def normalize_title(title: str) -> str:
+    """Normalize a title like `sanitize_title`, after stripping its LaTeX markup."""
+    return sanitize_title(latex_to_text(title))
+
+
+def normalize_author(author: Optional[str]) -> Optional[str]:
+    """
+    Reduce a BibTeX author list to the family name of its first author.
+
+    Handles ``Last, First and ...``, ``First Last and ...`` and ``Last F and ...``.
+    """
+    if not author:
+        return None
+    first = re.split(r'\s+and\s+', latex_to_text(author).strip(), maxsplit=1)[0]
+    if ',' in first:
+        family = first.split(',', 1)[0]
+    else:
+        words = first.split()
+        # Skip initials, so "Doe J" gives the same name as "J. Doe"
+        names = [word for word in words if len(word.strip('.')) > 1 or not word.strip('.').isupper()]
+        family = (names or words or [''])[-1]
+    family = re.sub(r'[^\w]', '', family.lower())
+    return family or None
+
+
+def cluster_titles(titles: Sequence[Optional[str]], authors: Optional[Sequence[Optional[str]]] = None,
+                   threshold: Optional[float] = None) -> List[Cluster]:
+    """
+    Group entries citing the same work.
+
+    Entries are in the same group when their first authors' family names
+    agree and their titles are equal after `normalize_title`. Groups are
+    merged into a cluster when their titles are equal but for a subtitle (and
+    no other subtitle of the same title exists), or when their shingle sets
+    have a Jaccard similarity of at least ``threshold`` and every word that
+    differs is a typo of a word of the other title. Titles whose numbers
+    differ ("Part 1", "Part II") are only merged when equal.
+
+    Only the titles of one group are certain to name the same work, the
+    other groups of a cluster are likely spellings of it to check.
+
+    Args:
+        titles (Sequence[str]): The title of each entry, None or empty for entries without one
+        authors (Sequence[str], optional): The author field of each entry, to keep works of
+                                           different authors apart
+        threshold (float, optional): Similarity above which titles are near-duplicates, e.g.
+                                     `DEFAULT_THRESHOLD`. None to only group equal normalized titles.
+
+    Returns:
+        List[Cluster]: The clusters, covering every entry, in the order of their first entry
+    """
+    authors = authors if authors is not None else [None] * len(titles)
+    # Entries with equal normalized titles and first authors form a group
+    groups: Dict[Tuple[str, Optional[str]], List[int]] = {}
+    singles: List[int] = []
+    texts: Dict[Tuple[str, Optional[str]], str] = {}
+    for index, (title, author) in enumerate(zip(titles, authors)):
+        key = normalize_title(title) if title else ''
+        if not key:
+            singles.append(index)
+            continue
+        group = (key, normalize_author(author))
+        if group not in groups:
+            groups[group] = []
+            texts[group] = latex_to_text(title)
+        groups[group].append(index)
+
+    keys = list(groups)
+    parent = list(range(len(keys)))
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(first: int, second: int) -> None:
+        first, second = find(first), find(second)
+        if first != second:
+            parent[max(first, second)] = min(first, second)
+
+    if threshold is not None:
+        node_of = {key: node for node, key in enumerate(keys)}
+        subtitled: Dict[Tuple[str, Optional[str]], List[int]] = defaultdict(list)
+        for node, (key, author) in enumerate(keys):
+            main = _main_title(texts[keys[node]])
+            if main is not None and main != key and (main, author) in node_of:
+                subtitled[(main, author)].append(node)
+        for main, nodes in subtitled.items():
+            # "X: A" and "X: B" are different works, neither is merged with "X"
+            if len(nodes) == 1:
+                union(nodes[0], node_of[main])
+
+        shingles = [_shingles(key) for key, _ in keys]
+        numbers = [_numbers(texts[key]) for key in keys]
+        words = [_words(texts[key]) for key in keys]
+        buckets: Dict[tuple, List[int]] = defaultdict(list)
+        for node, (_, author) in enumerate(keys):
+            signature = _minhash(shingles[node])
+            for band in range(BANDS):
+                values = tuple(signature[band * ROWS:(band + 1) * ROWS])
+                if values == _EMPTY_BAND:
+                    # Short titles leave bins empty, which says nothing about their similarity
+                    continue
+                bucket = buckets[(author, band) + values]
+                for other in bucket[:MAX_BUCKET_COMPARISONS]:
+                    if (find(other) != find(node) and numbers[other] == numbers[node]
+                            and _jaccard(shingles[other], shingles[node]) >= threshold
+                            and _typos_only(words[other], words[node])):
+                        union(other, node)
+                bucket.append(node)
+
+    merged: Dict[int, List[int]] = defaultdict(list)
+    for node in range(len(keys)):
+        merged[find(node)].append(node)
+    clusters = []
+    for nodes in merged.values():
+        # The most common spelling represents the cluster, the earliest one on ties
+        nodes.sort(key=lambda node: (-len(groups[keys[node]]), groups[keys[node]][0]))
+        clusters.append(Cluster(groups=[groups[keys[node]] for node in nodes]))
+    clusters.extend(Cluster(groups=[[index]]) for index in singles)
+    clusters.sort(key=lambda cluster: min(cluster.members))
+    return clusters
+
+
+def title_matches(title: str, record_title: Optional[str]) -> bool:
+    """Whether a record found for another spelling is the work a title names, see `match_title`."""
+    if not record_title:
+        return False
+    return match_title([{'title': [latex_to_text(record_title)]}], latex_to_text(title)) is not None
+
+
+class ClusterLookups:
+    """Rounds of lookups resolving clustered entries with one lookup per work.
+
+    A spelling is a title written exactly the same way. Each round looks up
+    one spelling per cluster: its most common one first. The result is shared
+    with the entries of that spelling, and with the other spellings of the
+    cluster whose titles match the record found. The remaining spellings are
+    looked up in the next rounds, so a record is never given to an entry
+    whose title names another work, and a spelling CrossRef does not know,
+    e.g. with LaTeX markup, does not hide the others.
+    """
+
+    def __init__(self, clusters: List[Cluster], titles: Sequence[Optional[str]], settled: Callable[[Any], bool] = bool,
+                 title_of: Optional[Callable[[Any], Optional[str]]] = None):
+        """
+        Plan the lookups of clustered entries.
+
+        Args:
+            clusters (List[Cluster]): Clusters made by `cluster_titles`
+            titles (Sequence[str]): The title of each entry
+            settled (Callable): Whether a result is final; spellings of a cluster whose
+                                lookup was not are tried with the next results found
+            title_of (Callable, optional): Title of the record in a result. Without it the
+                                           title looked up stands for it, for lookups that only
+                                           accept records whose title equals the query.
+        """
+        self.titles = titles
+        self.settled = settled
+        self.title_of = title_of
+        self.results: List[Any] = [None] * sum(len(cluster.members) for cluster in clusters)
+        self.lookups = 0  # Lookups made, one per round and cluster
+        # Spellings of each cluster still to look up, and those whose lookup was not settled
+        self._pending = [(self._spellings(cluster), []) for cluster in clusters]
+
+    def pending(self) -> List[int]:
+        """The entries to look up in this round, one per cluster left."""
+        return [spellings[0][0] for spellings, _ in self._pending]
+
+    def record(self, found: List[Any]) -> None:
+        """Share the results of the entries returned by `pending`, in the same order, and plan the next round."""
+        pending = []
+        for (spellings, unsettled), result in zip(self._pending, found):
+            self.lookups += 1
+            self._share(spellings[0], result)
+            if not self.settled(result):
+                unsettled = unsettled + [spellings[0]]
+                left = spellings[1:]
+            else:
+                if self.title_of is not None:
+                    record_title = self.title_of(result)
+                else:
+                    record_title = self.titles[spellings[0][0]]
+                left = []
+                for spelling in spellings[1:] + unsettled:
+                    if title_matches(self.titles[spelling[0]], record_title):
+                        self._share(spelling, result)
+                    elif spelling not in unsettled:
+                        left.append(spelling)
+                unsettled = []
+            if left:
+                pending.append((left, unsettled))
+        self._pending = pending
+
+    def _spellings(self, cluster: Cluster) -> List[List[int]]:
+        """Split the groups of a cluster by spelling, the most common spelling of each group first."""
+        spellings = []
+        for group in cluster.groups:
+            by_title: Dict[str, List[int]] = {}
+            for index in group:
+                by_title.setdefault(' '.join((self.titles[index] or '').split()), []).append(index)
+            spellings.extend(sorted(by_title.values(), key=lambda spelling: (-len(spelling), spelling[0])))
+        return spellings
+
+    def _share(self, group: List[int], result: Any) -> None:
+        for index in group:
+            self.results[index] = result
+
+
+def _main_title(text: str) -> Optional[str]:
+    """The normalized title without its subtitle, None if it has none or is too short without it."""
+    parts = _SUBTITLE.split(text, maxsplit=1)
+    if len(parts) < 2 or len(parts[0].split()) < MIN_MAIN_TITLE_WORDS:
+        return None
+    return sanitize_title(parts[0])
+
+
+def _shingles(key: str) -> FrozenSet[str]:
+    if len(key) <= SHINGLE_SIZE:
+        return frozenset([key])
+    return frozenset(key[index:index + SHINGLE_SIZE] for index in range(len(key) - SHINGLE_SIZE + 1))
+
+
+def _numbers(text: str) -> Tuple[str, ...]:
+    return tuple(sorted(_NUMBER.findall(text.lower())))
+
+
+def _words(text: str) -> Counter:
+    return Counter(re.sub(r'[^\w\s]', '', text.lower()).split())
+
+
+def _typos_only(first: Counter, second: Counter) -> bool:
+    """Whether every word found in only one of two titles pairs with a word of the other differing by a typo."""
+    extra, missing = list((first - second).elements()), list((second - first).elements())
+    if len(extra) != len(missing):
+        # A word added or dropped, e.g. "linear" in "large-scale linear systems"
+        return False
+    for word in extra:
+        limit = MAX_TYPO_EDITS * (2 if len(word) >= LONG_WORD else 1)
+        match = next((other for other in missing if _edit_distance(word, other, limit) <= limit), None)
+        if match is None:
+            return False
+        missing.remove(match)
+    return True
+
+
+def _edit_distance(first: str, second: str, limit: int) -> int:
+    """Levenshtein distance of two words, any distance above limit is reported as limit + 1."""
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    previous = list(range(len(second) + 1))
+    for row, char in enumerate(first, 1):
+        current = [row]
+        for column, other in enumerate(second, 1):
+            current.append(min(previous[column] + 1, current[column - 1] + 1,
+                               previous[column - 1] + (char != other)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _minhash(shingles: FrozenSet[str]) -> List[int]:
+    """
+    MinHash signature of a shingle set, with one permutation hashing.
+
+    Every shingle is hashed once into one of ``BANDS * ROWS`` bins by its low
+    bits, and each bin keeps its smallest hash. Two sets agree on a bin with a
+    probability close to their Jaccard similarity, like with one hash function
+    per value, at the cost of a single hash per shingle.
+    """
+    bins = BANDS * ROWS
+    signature = [-1] * bins
+    for shingle in shingles:
+        value = zlib.crc32(shingle.encode('utf-8'))
+        index, value = value % bins, value // bins
+        if signature[index] < 0 or value < signature[index]:
+            signature[index] = value
+    return signature
+
+
+def _jaccard(first: FrozenSet[str], second: FrozenSet[str]) -> float:
+    return len(first & second) / len(first | second)
@@ -0,0 +1,23 @@
+"""
+Exceptions raised by the DOI Finder clients.
+"""
+
+
+class CrossRefError(Exception):
+    """Base class for errors talking to the CrossRef API."""
+
+
+class TransientError(CrossRefError):
+    """A failure that may succeed when retried later (throttling, timeouts, 5xx)."""
+
+
+class RateLimitError(TransientError):
+    """CrossRef kept answering 429 Too Many Requests after all retries."""
+
+
+class DeadlineExceeded(TransientError):
+    """The deadline of a lookup or batch passed before CrossRef answered, see `deadline`."""
+
+
+class CircuitOpenError(TransientError):
+    """Requests are not sent while CrossRef keeps failing, see `CircuitBreaker`."""
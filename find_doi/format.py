@@ -0,0 +1,43 @@
+"""
+JSON representations of lookup results, shared by the command line and the lookup service.
+"""
+from typing import Any, Dict, Optional
+
+from .models import ArticleInfo, Resolution
+
+
+def format_article_info(article_info: Optional[ArticleInfo]) -> Dict[str, Any]:
+    """Convert ArticleInfo to a dictionary for JSON output."""
+    if article_info is None:
+        return {}
+    
+    result = {
+        "doi": article_info.doi,
+        "title": article_info.title,
+        "authors": article_info.authors,
+        "year": article_info.year,
+        "journal": article_info.journal,
+        "publisher": article_info.publisher,
+        "url": article_info.url,
+        "type": article_info.type
+    }
+    
+    # Include abstract if --full flag is set
+    if getattr(article_info, 'abstract', None):
+        result["abstract"] = article_info.abstract
+    
+    return result
+
+
+def format_resolution(resolution: Resolution, info: bool = False) -> Dict[str, Any]:
+    """Convert a Resolution to a dictionary for JSON Lines output, failed lookups carry their error."""
+    result = {"key": resolution.key, "doi": resolution.doi}
+    if info:
+        result.update(format_article_info(resolution.article_info))
+        result["doi"] = resolution.doi
+    result["source"] = resolution.source
+    result["score"] = resolution.score
+    result["requests"] = resolution.requests
+    result["status"] = resolution.status
+    result["error"] = resolution.error
+    return result
@@ -0,0 +1,263 @@
+"""
+Offline index of CrossRef metadata for resolving works without the API.
+
+The index is a single file with a sorted hash table followed by the records::
+
+    header   b'FDOIIDX1', number of keys (uint64), number of works (uint64)
+    table    (key hash uint64, record offset uint64) pairs sorted by hash
+    records  one compact JSON object per work
+
+Works are keyed on their sanitized title (the same normalization used to match
+API results) and on their DOI. The file is memory-mapped and looked up with a
+binary search over the table, so lookups touch only a few pages of the file.
+"""
+
+import gzip
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from dataclasses import asdict
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .crossref import parse_article_info, sanitize_title
+from .models import ArticleInfo
+
+_MAGIC = b'FDOIIDX1'
+_HEADER = struct.Struct('<8sQQ')
+_SLOT = struct.Struct('<QQ')
+# Table slots sorted in memory at a time while building, about 50 MB while a run is sorted
+_RUN_SLOTS = 1 << 19
+# Slots read at a time from each sorted run while merging them
+_MERGE_SLOTS = 1 << 10
+
+
+def _key_hash(key: str) -> int:
+    """Hash an index key to 64 bits."""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _title_key(title: str) -> str:
+    return "title:" + sanitize_title(title)
+
+
+def _doi_key(doi: str) -> str:
+    return "doi:" + doi.strip().lower()
+
+
+def iter_dump_items(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read CrossRef work records from a metadata dump.
+
+    Supports JSON Lines files with one work per line, and JSON files holding a
+    list of works, a ``{"items": [...]}`` snapshot file or a ``/works`` API
+    response. Files ending in ``.gz`` are decompressed on the fly.
+
+    Args:
+        path (str): Path of the dump file
+
+    Yields:
+        dict: The work records
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as file:
+        first = file.read(1)
+        while first and first.isspace():
+            first = file.read(1)
+        if not first:
+            return
+        file.seek(0)
+        name = path[:-3] if path.endswith('.gz') else path
+        if first == '[' or name.endswith('.json'):
+            data = json.load(file)
+            if isinstance(data, dict):
+                data = data.get('message', data)
+                data = data.get('items', [data]) if isinstance(data, dict) else data
+            yield from data
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _write_run(slots: array, file: IO[bytes]) -> Tuple[int, int]:
+    """Sort packed (key hash, offset) slots and append them to a file, returning the byte range written."""
+    start = file.seek(0, os.SEEK_END)
+    run = array('Q')
+    for slot in sorted(zip(slots[0::2], slots[1::2])):
+        run.extend(slot)
+    if sys.byteorder == 'big':
+        run.byteswap()
+    run.tofile(file)
+    return start, file.tell()
+
+
+def _iter_run(file: IO[bytes], start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """Read back a sorted run written by `_write_run`, a few slots at a time."""
+    while start < end:
+        file.seek(start)
+        chunk = file.read(min(end - start, _MERGE_SLOTS * _SLOT.size))
+        start += len(chunk)
+        yield from _SLOT.iter_unpack(chunk)
+
+
+def _copy(source: IO[bytes], output: IO[bytes]) -> None:
+    """Copy the rest of a file to another in 1 MiB chunks."""
+    while True:
+        chunk = source.read(1 << 20)
+        if not chunk:
+            break
+        output.write(chunk)
+
+
+class LocalIndex:
+    """Memory-mapped, read-only index of CrossRef works."""
+
+    def __init__(self, path: str):
+        """
+        Open an index built with `LocalIndex.build`.
+
+        Args:
+            path (str): Path of the index file
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, self._works = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a DOI Finder index")
+        self._records_offset = _HEADER.size + self._count * _SLOT.size
+
+    @classmethod
+    def build(cls, sources: Iterable[str], path: str) -> int:
+        """
+        Build an index file from CrossRef metadata dumps.
+
+        Records are streamed to a temporary file. Table slots are packed 16 bytes
+        each into an array, sorted in runs of ``_RUN_SLOTS`` written to another
+        temporary file, and the runs are merged into the table, so memory does
+        not grow with the size of the dumps.
+
+        Args:
+            sources (Iterable[str]): Paths of dump files, see `iter_dump_items`
+            path (str): Path of the index file to write
+
+        Returns:
+            int: Number of works indexed
+        """
+        slots = array('Q')
+        runs: List[Tuple[int, int]] = []
+        count = works = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.TemporaryFile(dir=directory) as records, tempfile.TemporaryFile(dir=directory) as table:
+            offset = 0
+            for source in sources:
+                for item in iter_dump_items(source):
+                    if not item.get('DOI'):
+                        continue
+                    article_info = parse_article_info(item)
+                    # Abstracts are left out to keep the index compact
+                    article_info.abstract = None
+                    record = json.dumps(asdict(article_info), separators=(',', ':')).encode('utf-8') + b'\n'
+                    records.write(record)
+                    slots.extend((_key_hash(_doi_key(item['DOI'])), offset))
+                    if article_info.title:
+                        slots.extend((_key_hash(_title_key(article_info.title)), offset))
+                    offset += len(record)
+                    works += 1
+                    if len(slots) >= 2 * _RUN_SLOTS:
+                        runs.append(_write_run(slots, table))
+                        count += len(slots) // 2
+                        del slots[:]
+            if slots or not runs:
+                runs.append(_write_run(slots, table))
+                count += len(slots) // 2
+                del slots[:]
+
+            records.seek(0)
+            with open(path, 'wb') as output:
+                output.write(_HEADER.pack(_MAGIC, count, works))
+                if len(runs) == 1:
+                    table.seek(0)
+                    _copy(table, output)
+                else:
+                    for slot in heapq.merge(*(_iter_run(table, start, end) for start, end in runs)):
+                        output.write(_SLOT.pack(*slot))
+                _copy(records, output)
+        return works
+
+    def lookup_title(self, title: str, author: Optional[str] = None) -> Optional[ArticleInfo]:
+        """
+        Find a work by title.
+
+        Args:
+            title (str): The title of the article
+            author (str, optional): Author name used to pick between works with the same title
+
+        Returns:
+            Optional[ArticleInfo]: The indexed work, None if the title is not in the index
+        """
+        sanitized = sanitize_title(title)
+        candidates = [info for info in self._lookup(_title_key(title))
+                      if info.title and sanitize_title(info.title) == sanitized]
+        if author and len(candidates) > 1:
+            names = {token.lower() for token in author.replace(',', ' ').split() if len(token) > 1}
+            for info in candidates:
+                if names & {token.lower() for name in info.authors or [] for token in name.split()}:
+                    return info
+        return candidates[0] if candidates else None
+
+    def lookup_doi(self, doi: str) -> Optional[ArticleInfo]:
+        """
+        Find a work by DOI.
+
+        Args:
+            doi (str): The DOI
+
+        Returns:
+            Optional[ArticleInfo]: The indexed work, None if the DOI is not in the index
+        """
+        doi = doi.strip().lower()
+        for info in self._lookup(_doi_key(doi)):
+            if info.doi and info.doi.lower() == doi:
+                return info
+        return None
+
+    def _lookup(self, key: str) -> Iterator[ArticleInfo]:
+        """Yield every record stored under the hash of a key."""
+        target = _key_hash(key)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if _SLOT.unpack_from(self._mmap, _HEADER.size + middle * _SLOT.size)[0] < target:
+                low = middle + 1
+            else:
+                high = middle
+        while low < self._count:
+            key_hash, offset = _SLOT.unpack_from(self._mmap, _HEADER.size + low * _SLOT.size)
+            if key_hash != target:
+                break
+            start = self._records_offset + offset
+            end = self._mmap.find(b'\n', start)
+            yield ArticleInfo(**json.loads(self._mmap[start:end]))
+            low += 1
+
+    def close(self) -> None:
+        """Unmap and close the index file."""
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "LocalIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._works
@@ -0,0 +1,329 @@
+"""
+Instrumentation of DOI Finder lookups.
+
+A `Metrics` instance collects counters and timing histograms while a finder
+runs: HTTP requests by endpoint and status, bytes received, time spent
+waiting for the rate limiter, decoding and matching responses, cache,
+cached-miss and index hit rates, searches by query plan step, coalesced
+lookups and lookup outcomes. It can be exported as JSON, in the Prometheus
+text format or as a readable report.
+
+Subclass `Metrics` and override `count` and `observe` to forward the
+measurements to another monitoring system.
+"""
+
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds of the timing histogram buckets, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+
+# Steps of the search plan in the order they are sent, see `works_query_plan`
+_SEARCH_STEPS = {'title': 0, 'bibliographic': 1, 'title_only': 2}
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, Any]) -> _Key:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+class _Histogram:
+    """Bucketed distribution of durations."""
+
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Estimate a quantile by interpolating within the bucket holding it, like Prometheus does."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(BUCKETS, self.counts):
+            if count and seen + count >= rank:
+                upper = min(bound, self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return self.max
+
+
+class Metrics:
+    """Thread-safe counters and timing histograms for a finder."""
+
+    def __init__(self, prefix: str = "find_doi"):
+        """
+        Create an empty set of metrics.
+
+        Args:
+            prefix (str): Prefix of the metric names in the Prometheus export
+        """
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters: Dict[_Key, float] = {}
+        self._histograms: Dict[_Key, _Histogram] = {}
+        self._gauges: Dict[_Key, List[Callable[[], float]]] = {}
+        self.started = time.time()
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Increase a counter.
+
+        Args:
+            name (str): Name of the counter, e.g. ``http_requests_total``
+            value (float): Amount to add
+            **labels: Labels distinguishing series of the same counter
+        """
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """
+        Record a duration.
+
+        Args:
+            name (str): Name of the histogram, e.g. ``http_request_seconds``
+            seconds (float): The duration
+            **labels: Labels distinguishing series of the same histogram
+        """
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.add(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Record the duration of a ``with`` block, see `observe`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def gauge(self, name: str, func: Callable[[], float], **labels) -> None:
+        """
+        Register a value read when the metrics are exported.
+
+        Functions registered under the same name and labels are summed, so
+        several finders can share one `Metrics`.
+
+        Args:
+            name (str): Name of the value
+            func (Callable[[], float]): Returns the current value
+            **labels: Labels distinguishing series of the same value
+        """
+        with self._lock:
+            self._gauges.setdefault(_key(name, labels), []).append(func)
+
+    def value(self, name: str, **labels) -> float:
+        """Return the current value of a counter or gauge, 0 if it was never set."""
+        key = _key(name, labels)
+        with self._lock:
+            funcs = list(self._gauges.get(key, ()))
+            counter = self._counters.get(key, 0)
+        return counter + sum(func() for func in funcs)
+
+    def total(self, name: str, **labels) -> float:
+        """Sum a counter over every series matching the given labels."""
+        wanted = set(_key(name, labels)[1])
+        with self._lock:
+            return sum(value for (counter, series), value in self._counters.items()
+                       if counter == name and wanted <= set(series))
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """
+        Add the counters and timings of a snapshot, e.g. one taken in a worker process.
+
+        Gauges are not merged, they are read from the objects they were registered for.
+
+        Args:
+            snapshot (dict): Metrics returned by `snapshot`
+        """
+        with self._lock:
+            for metric in snapshot["counters"]:
+                key = _key(metric["name"], metric["labels"])
+                self._counters[key] = self._counters.get(key, 0) + metric["value"]
+            for metric in snapshot["timings"]:
+                key = _key(metric["name"], metric["labels"])
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = _Histogram()
+                for index, count in enumerate(metric["buckets"].values()):
+                    histogram.counts[index] += count
+                histogram.count += metric["count"]
+                histogram.sum += metric["sum"]
+                histogram.max = max(histogram.max, metric["max"])
+
+    def reset(self) -> None:
+        """Clear every counter and histogram, registered gauges are kept."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return every metric as plain data.
+
+        Returns:
+            dict: ``counters`` and ``gauges`` as lists of name/labels/value, and
+                  ``timings`` with count, sum, max, p50, p95 and bucket counts
+        """
+        with self._lock:
+            counters = list(self._counters.items())
+            gauges = [(key, list(funcs)) for key, funcs in self._gauges.items()]
+            histograms = [(key, histogram.count, histogram.sum, histogram.max, list(histogram.counts),
+                           histogram.quantile(0.5), histogram.quantile(0.95))
+                          for key, histogram in self._histograms.items()]
+        return {
+            "elapsed": time.time() - self.started,
+            "counters": [{"name": name, "labels": dict(labels), "value": value}
+                         for (name, labels), value in sorted(counters)],
+            "gauges": [{"name": name, "labels": dict(labels), "value": sum(func() for func in funcs)}
+                       for (name, labels), funcs in sorted(gauges, key=lambda gauge: gauge[0])],
+            "timings": [{"name": name, "labels": dict(labels), "count": count, "sum": total, "max": longest,
+                         "p50": p50, "p95": p95,
+                         "buckets": {str(bound): bucket for bound, bucket in zip(BUCKETS, buckets)}}
+                        for (name, labels), count, total, longest, buckets, p50, p95 in sorted(histograms)],
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """Export the metrics as JSON, see `snapshot`."""
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self) -> str:
+        """Export the metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+
+        def declare(name: str, kind: str) -> None:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for kind, series in (("counter", snapshot["counters"]), ("gauge", snapshot["gauges"])):
+            for metric in series:
+                name = f"{self.prefix}_{metric['name']}"
+                declare(name, kind)
+                lines.append(f"{name}{_labels(metric['labels'])} {_number(metric['value'])}")
+        for metric in snapshot["timings"]:
+            name = f"{self.prefix}_{metric['name']}"
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(BUCKETS, metric["buckets"].values()):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f"{name}_bucket{_labels(dict(metric['labels'], le=le))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(metric['labels'])} {_number(metric['sum'])}")
+            lines.append(f"{name}_count{_labels(metric['labels'])} {metric['count']}")
+        return "\n".join(lines) + "\n"
+
+    def report(self) -> str:
+        """Format an end-of-run breakdown for people to read."""
+        snapshot = self.snapshot()
+        lines = [f"Elapsed: {snapshot['elapsed']:.2f} s"]
+
+        requests = self.total("http_requests_total")
+        if requests:
+            failed = self.total("http_requests_total", status="error")
+            received = self.total("http_response_bytes_total")
+            by_status = {}
+            for metric in snapshot["counters"]:
+                if metric["name"] == "http_requests_total":
+                    status = metric["labels"].get("status")
+                    by_status[status] = by_status.get(status, 0) + metric["value"]
+            statuses = ", ".join(f"{status}: {_number(count)}" for status, count in sorted(by_status.items()))
+            lines.append(f"HTTP requests: {_number(requests)} ({statuses}), "
+                         f"{received / 1024:.1f} KiB received" + (f", {_number(failed)} failed" if failed else ""))
+            retries = self.total("http_retries_total")
+            if retries:
+                lines.append(f"Retries: {_number(retries)} failed requests sent again")
+
+        for tier, name in (("cache", "Cache"), ("negative_cache", "Cached misses"), ("index", "Index")):
+            hits = self.value(f"{tier}_lookups_total", result="hit")
+            misses = self.value(f"{tier}_lookups_total", result="miss")
+            if hits or misses:
+                lines.append(f"{name}: {_number(hits)} hits, {_number(misses)} misses "
+                             f"({hits / (hits + misses):.0%} hit rate)")
+        write_errors = self.value("cache_write_errors_total")
+        if write_errors:
+            lines.append(f"Cache write errors: {_number(write_errors)} results could not be stored")
+
+        calls = self.value("singleflight_calls")
+        if calls:
+            shared = self.value("singleflight_shared")
+            lines.append(f"Coalescing: {_number(shared)} of {_number(calls)} lookups shared an identical "
+                         f"lookup in flight ({shared / calls:.0%})")
+        duplicates = self.value("duplicate_entries_total")
+        if duplicates:
+            lines.append(f"Duplicates: {_number(duplicates)} entries answered by the lookup of a near-identical entry")
+
+        searches: Dict[str, Dict[str, float]] = {}
+        for metric in snapshot["counters"]:
+            if metric["name"] == "search_queries_total":
+                results = searches.setdefault(metric["labels"].get("step"), {})
+                results[metric["labels"].get("result")] = metric["value"]
+        if searches:
+            lines.append("Searches: " + ", ".join(
+                f"{step} {_number(sum(results.values()))} ({_number(results.get('match', 0))} matched)"
+                for step, results in sorted(searches.items(), key=lambda search: _SEARCH_STEPS.get(search[0], 99))
+            ))
+
+        hedged = self.total("hedged_requests_total")
+        if hedged:
+            lines.append(f"Hedging: {_number(hedged)} requests duplicated, "
+                         f"{_number(self.total('hedged_requests_total', won='hedge'))} answered first by the duplicate")
+        rejected = self.total("circuit_rejections_total")
+        expired = self.total("deadline_exceeded_total")
+        if rejected or expired:
+            lines.append(f"Failing fast: {_number(rejected)} requests refused by the circuit breaker, "
+                         f"{_number(expired)} stopped by a deadline")
+
+        outcomes = [metric for metric in snapshot["counters"] if metric["name"] == "lookups_total"]
+        if outcomes:
+            lines.append("Lookups: " + ", ".join(
+                f"{metric['labels'].get('kind')} {metric['labels'].get('result')}: {_number(metric['value'])}"
+                for metric in outcomes
+            ))
+
+        if snapshot["timings"]:
+            lines.append(f"{'Timing':<36}{'count':>8}{'total s':>10}{'mean ms':>10}{'p50 ms':>9}"
+                         f"{'p95 ms':>9}{'max ms':>9}")
+            for metric in snapshot["timings"]:
+                label = metric["name"] + "".join(f" {value}" for value in metric["labels"].values())
+                lines.append(f"{label:<36}{metric['count']:>8}{metric['sum']:>10.3f}"
+                             f"{metric['sum'] / metric['count'] * 1000:>10.1f}{metric['p50'] * 1000:>9.1f}"
+                             f"{metric['p95'] * 1000:>9.1f}{metric['max'] * 1000:>9.1f}")
+        return "\n".join(lines)
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
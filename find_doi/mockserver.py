@@ -0,0 +1,386 @@
+"""
+Local stand-in for the CrossRef REST API.
+
+Replays recorded work records for ``/works`` searches, ``filter=doi:...``
+queries and ``/works/{doi}`` lookups, with configurable latency, error and
+throttling rates. Used for benchmarks and for trying the finder offline::
+
+    python -m find_doi.mockserver works.jsonl --port 8080 --latency 0.05
+    find-doi bibtex references.bib --api-url http://127.0.0.1:8080
+
+`MockRedisServer` likewise stands in for the Redis server of a shared
+`find_doi.rediscache.RedisCache`.
+"""
+
+import argparse
+import fnmatch
+import heapq
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from .index import iter_dump_items
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r'\w+', text.lower())
+
+
+def synthetic_works(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate CrossRef-like work records with distinct titles.
+
+    Args:
+        count (int): Number of works
+        seed (int): Seed of the random generator
+
+    Returns:
+        List[dict]: The work records
+    """
+    rng = random.Random(seed)
+    words = ["analysis", "energy", "network", "learning", "model", "system", "renewable", "deep",
+             "control", "optimal", "review", "sustainable", "graph", "quantum", "data", "robust"]
+    works = []
+    for number in range(count):
+        title = " ".join(rng.choice(words) for _ in range(5)).capitalize() + f": study {number}"
+        works.append({
+            "DOI": f"10.5555/mock.{number}",
+            "title": [title],
+            "author": [{"given": rng.choice("ABCDEFGH"), "family": f"Author{rng.randrange(1000)}"}],
+            "published-print": {"date-parts": [[1990 + rng.randrange(35)]]},
+            "container-title": ["Journal of Benchmarks"],
+            "publisher": "Mock Publisher",
+            "URL": f"https://doi.org/10.5555/mock.{number}",
+            "type": "journal-article",
+            "reference": [{"key": f"ref{index}", "unstructured": "A reference " * 5} for index in range(20)],
+        })
+    return works
+
+
+class MockCrossRefServer:
+    """Threaded HTTP server answering like the CrossRef REST API."""
+
+    def __init__(self, works: Iterable[Dict[str, Any]], host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: int = 1, rate_limit: int = 50,
+                 seed: Optional[int] = None):
+        """
+        Create the server, call `start` (or use it as a context manager) to serve.
+
+        Args:
+            works (Iterable[dict]): CrossRef work records to serve
+            host (str): Interface to listen on
+            port (int): Port to listen on, 0 picks a free port
+            latency (float): Seconds added to every response
+            jitter (float): Maximum random seconds added on top of latency
+            error_rate (float): Fraction of requests answered with 503
+            throttle_rate (float): Fraction of requests answered with 429
+            retry_after (int): Retry-After seconds sent with 429 responses
+            rate_limit (int): Value of the X-Rate-Limit-Limit header (per second)
+            seed (int, optional): Seed for the random latency and failures
+        """
+        self.works: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, List[str]] = defaultdict(list)
+        for work in works:
+            doi = work["DOI"].lower()
+            self.works[doi] = work
+            for token in set(_tokens(" ".join(work.get("title") or []))):
+                self._postings[token].append(doi)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_fixtures(cls, paths: Iterable[str], **kwargs) -> "MockCrossRefServer":
+        """Create a server replaying recorded CrossRef JSON/JSON Lines files, see `iter_dump_items`."""
+        return cls((work for path in paths for work in iter_dump_items(path)), **kwargs)
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to DOIFinder(base_url=...)."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockCrossRefServer":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockCrossRefServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def search(self, query: str, rows: int) -> List[Dict[str, Any]]:
+        """Rank works by the number of query words found in their title."""
+        scores: Dict[str, int] = defaultdict(int)
+        for token in set(_tokens(query)):
+            for doi in self._postings.get(token, ()):
+                scores[doi] += 1
+        ranked = heapq.nlargest(rows, scores.items(), key=lambda item: item[1])
+        return [dict(self.works[doi], score=float(score)) for doi, score in ranked]
+
+    def _roll(self) -> Optional[int]:
+        """Pick the status of a simulated failure, None to answer normally."""
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            delay = self.latency + self._random.random() * self.jitter
+        if delay:
+            time.sleep(delay)
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 503
+        return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, avoid delayed-ACK stalls
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                failure = server._roll()
+                if failure == 429:
+                    return self._send(429, {"status": "error", "message": "Too many requests"},
+                                      {"Retry-After": str(server.retry_after)})
+                if failure:
+                    return self._send(failure, {"status": "error", "message": "Service unavailable"})
+
+                url = urlsplit(self.path)
+                params = dict(parse_qsl(url.query))
+                if url.path.startswith("/works/"):
+                    work = server.works.get(unquote(url.path[len("/works/"):]).lower())
+                    if work is None:
+                        return self._send(404, {"status": "error", "message": "Resource not found."})
+                    return self._send(200, {"status": "ok", "message-type": "work", "message": work})
+                if url.path != "/works":
+                    return self._send(404, {"status": "error", "message": "Resource not found."})
+
+                rows = int(params.get("rows", 20))
+                if "filter" in params:
+                    dois = [value.split(":", 1)[1].lower() for value in params["filter"].split(",")
+                            if value.startswith("doi:")]
+                    items = [server.works[doi] for doi in dois if doi in server.works][:rows]
+                else:
+                    query = " ".join(params.get(name, "") for name in ("query.title", "query.bibliographic"))
+                    items = server.search(query, rows)
+                if "select" in params:
+                    fields = params["select"].split(",")
+                    items = [{field: item[field] for field in fields if field in item} for item in items]
+                return self._send(200, {"status": "ok", "message-type": "work-list",
+                                        "message": {"total-results": len(items), "items": items}})
+
+            def _send(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(body).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.send_header("X-Rate-Limit-Limit", str(server.rate_limit))
+                    self.send_header("X-Rate-Limit-Interval", "1s")
+                    for name, value in (headers or {}).items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped waiting, e.g. past its deadline or after a hedged request won
+                    self.close_connection = True
+
+        return Handler
+
+
+class MockRedisServer:
+    """Threaded TCP server answering the Redis commands used by `RedisCache`.
+
+    Keeps a single in-memory database and supports PING, AUTH, SELECT, GET,
+    SET (with EX/PX), EXISTS, DEL, PTTL, SCAN, DBSIZE and FLUSHDB.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, password: Optional[str] = None):
+        """
+        Create the server, call `start` (or use it as a context manager) to serve.
+
+        Args:
+            host (str): Interface to listen on
+            port (int): Port to listen on, 0 picks a free port
+            password (str, optional): Password clients must AUTH with
+        """
+        self.password = password
+        self.commands = 0
+        # key -> (value, monotonic expiry time or None)
+        self.data: Dict[bytes, tuple] = {}
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """URL to pass to DOIFinder(cache=...)."""
+        host, port = self._server.server_address[:2]
+        return f"redis://{':' + self.password + '@' if self.password else ''}{host}:{port}/0"
+
+    def start(self) -> "MockRedisServer":
+        """Serve connections on a background thread."""
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockRedisServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def command(self, name: str, args: List[bytes]) -> Any:
+        """Run a command, returning its reply; exceptions are sent as error replies."""
+        with self._lock:
+            self.commands += 1
+            now = time.monotonic()
+            for key in [key for key, (_, expires) in self.data.items() if expires is not None and expires <= now]:
+                del self.data[key]
+            if name == "PING":
+                return "PONG"
+            if name in ("SELECT", "AUTH"):
+                return "OK"
+            if name == "GET":
+                entry = self.data.get(args[0])
+                return None if entry is None else entry[0]
+            if name == "SET":
+                expires = None
+                options = [arg.upper() for arg in args[2:]]
+                if b"PX" in options:
+                    expires = now + int(args[2 + options.index(b"PX") + 1]) / 1000
+                elif b"EX" in options:
+                    expires = now + int(args[2 + options.index(b"EX") + 1])
+                self.data[args[0]] = (args[1], expires)
+                return "OK"
+            if name == "EXISTS":
+                return sum(1 for key in args if key in self.data)
+            if name == "DEL":
+                return sum(1 for key in args if self.data.pop(key, None) is not None)
+            if name == "PTTL":
+                entry = self.data.get(args[0])
+                if entry is None:
+                    return -2
+                return -1 if entry[1] is None else int((entry[1] - now) * 1000)
+            if name == "SCAN":
+                # Everything in one batch, ending the iteration
+                pattern = args[args.index(b"MATCH") + 1].decode() if b"MATCH" in args else "*"
+                return [b"0", [key for key in self.data if fnmatch.fnmatchcase(key.decode(), pattern)]]
+            if name == "DBSIZE":
+                return len(self.data)
+            if name == "FLUSHDB":
+                self.data.clear()
+                return "OK"
+        raise ValueError(f"unknown command '{name}'")
+
+    def _handler(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                authenticated = server.password is None
+                while True:
+                    line = self.rfile.readline()
+                    if not line.startswith(b"*"):
+                        return
+                    args = []
+                    for _ in range(int(line[1:])):
+                        length = int(self.rfile.readline()[1:])
+                        args.append(self.rfile.read(length + 2)[:-2])
+                    name = args[0].decode().upper()
+                    try:
+                        if name == "AUTH":
+                            authenticated = args[-1].decode() == server.password
+                            if not authenticated:
+                                raise ValueError("WRONGPASS invalid password")
+                        elif not authenticated:
+                            raise ValueError("NOAUTH Authentication required")
+                        reply = _encode_reply(server.command(name, args[1:]))
+                    except ValueError as e:
+                        message = str(e)
+                        if not message.split(" ")[0].isupper():
+                            message = "ERR " + message
+                        reply = b"-" + message.encode() + b"\r\n"
+                    self.wfile.write(reply)
+
+        return Handler
+
+
+def _encode_reply(reply: Any) -> bytes:
+    """Encode a reply in the Redis protocol."""
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, str):
+        return b"+" + reply.encode() + b"\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    return b"*%d\r\n" % len(reply) + b"".join(_encode_reply(item) for item in reply)
+
+
+def main() -> None:
+    """Run the mock server from the command line."""
+    parser = argparse.ArgumentParser(description="Local stand-in for the CrossRef REST API",
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("fixtures", nargs="*", help="Recorded CrossRef JSON or JSON Lines files to replay")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N", help="Also serve N generated works")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random extra latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-limit", type=int, default=50, help="Advertised requests per second")
+    args = parser.parse_args()
+
+    works = [work for path in args.fixtures for work in iter_dump_items(path)] + synthetic_works(args.synthetic)
+    server = MockCrossRefServer(works, host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+                                error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                                rate_limit=args.rate_limit)
+    print(f"Serving {len(server.works)} works on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
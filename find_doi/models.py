@@ -0,0 +1,68 @@
+"""
+Data classes shared by the DOI Finder clients.
+"""
+
+import sys
+from dataclasses import dataclass, fields
+from typing import List, Optional
+
+
+def _slotted(cls):
+    """
+    Rebuild a dataclass with ``__slots__`` instead of a per-instance ``__dict__``.
+
+    The same as ``@dataclass(slots=True)``, which needs Python 3.10.
+    """
+    names = tuple(field.name for field in fields(cls))
+    namespace = {key: value for key, value in cls.__dict__.items()
+                 if key not in names and key not in ('__dict__', '__weakref__')}
+    namespace['__slots__'] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@_slotted
+@dataclass
+class ArticleInfo:
+    """Data class to store article information.
+
+    Instances have no ``__dict__`` and the journal, publisher and type strings
+    are interned, since the same few values repeat across millions of records.
+    """
+    doi: Optional[str] = None
+    title: Optional[str] = None
+    authors: Optional[List[str]] = None
+    year: Optional[int] = None
+    journal: Optional[str] = None
+    publisher: Optional[str] = None
+    url: Optional[str] = None
+    abstract: Optional[str] = None
+    citation_count: Optional[int] = None
+    type: Optional[str] = None  # article, book, conference paper, etc.
+
+    def __post_init__(self):
+        if self.journal is not None:
+            self.journal = sys.intern(self.journal)
+        if self.publisher is not None:
+            self.publisher = sys.intern(self.publisher)
+        if self.type is not None:
+            self.type = sys.intern(self.type)
+
+
+@_slotted
+@dataclass
+class Resolution:
+    """Combined result of resolving a single work."""
+    doi: Optional[str] = None
+    article_info: Optional[ArticleInfo] = None
+    score: Optional[float] = None  # CrossRef relevance score of the matched record
+    source: Optional[str] = None  # 'search', 'doi', 'cache', 'index' or 'bibtex'
+    key: Optional[str] = None  # BibTeX citation key, when resolved from BibTeX
+    error: Optional[str] = None  # Set when the lookup failed rather than found nothing
+    requests: int = 0  # CrossRef queries sent, 0 when answered by the cache or the index
+
+    @property
+    def status(self) -> str:
+        """'error' if the lookup failed, 'found' if a DOI is known, 'miss' otherwise."""
+        if self.error:
+            return 'error'
+        return 'found' if self.doi else 'miss'
@@ -0,0 +1,152 @@
+"""
+Sampling profiler for whole runs.
+
+A background thread samples the stack of every thread at a fixed interval,
+so lookups running on worker threads are profiled along with the main
+thread, at a cost that does not grow with the number of calls. Samples are
+wall-clock: time spent waiting for CrossRef or the rate limiter shows up in
+the functions doing the waiting::
+
+    with SamplingProfiler() as profiler:
+        finder.resolve_bibtex(bibtex, max_workers=8)
+    print(profiler.report())
+    profiler.write_collapsed("profile.folded")  # for flamegraph.pl or speedscope
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Seconds between two samples
+DEFAULT_INTERVAL = 0.005
+
+_Frame = Tuple[str, int, str]  # File, first line and name of a function
+
+
+class SamplingProfiler:
+    """Collect the stacks of every thread at regular intervals."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        """
+        Create a stopped profiler.
+
+        Args:
+            interval (float): Seconds between two samples
+        """
+        self.interval = interval
+        self.samples = 0  # Sampling rounds taken
+        self.elapsed = 0.0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="find-doi-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling, keeping the samples taken."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.elapsed += time.perf_counter() - self._started
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def report(self, limit: int = 30) -> str:
+        """
+        Format the functions the most samples were taken in.
+
+        Args:
+            limit (int): Number of functions listed in each table
+
+        Returns:
+            str: Tables of the functions by total samples (the function or one
+                 it called was running) and by own samples (the function itself was running)
+        """
+        total: Counter = Counter()
+        own: Counter = Counter()
+        for (_, stack), count in self._stacks.items():
+            for frame in set(stack):
+                total[frame] += count
+            if stack:
+                own[stack[-1]] += count
+        samples = sum(self._stacks.values())
+        lines = [f"Profiled {self.elapsed:.2f} s, {self.samples} rounds of samples every "
+                 f"{self.interval * 1000:g} ms, {samples} thread stacks"]
+        for title, counts in (("total", total), ("own", own)):
+            lines.append("")
+            lines.append(f"{'samples':>8} {'%':>6}  function (by {title} samples)")
+            for frame, count in counts.most_common(limit):
+                lines.append(f"{count:>8} {count / max(samples, 1):>6.1%}  {_describe(frame)}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path: str, limit: int = 30) -> None:
+        """Write `report` to a file."""
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(self.report(limit))
+
+    def write_collapsed(self, path: str) -> None:
+        """
+        Write the samples as collapsed stacks, one ``thread;outer;...;inner count`` line per stack.
+
+        The format is read by flamegraph.pl, speedscope and most flame graph viewers.
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            for (thread, stack), count in sorted(self._stacks.items()):
+                file.write(";".join([thread] + [_short(frame) for frame in stack]) + f" {count}\n")
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names: Dict[int, str] = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack: List[_Frame] = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.reverse()
+                self._stacks[(_thread_group(names.get(ident, str(ident))), tuple(stack))] += 1
+            self.samples += 1
+
+
+def _thread_group(name: str) -> str:
+    """Strip the number of a pool thread, so the threads of a pool are merged."""
+    return name.rstrip("0123456789").rstrip("_-") or name
+
+
+def _describe(frame: _Frame) -> str:
+    filename, line, name = frame
+    return f"{name} ({_relative(filename)}:{line})"
+
+
+def _short(frame: _Frame) -> str:
+    filename, _, name = frame
+    return f"{os.path.splitext(os.path.basename(filename))[0]}:{name}"
+
+
+def _relative(filename: str) -> str:
+    """Shorten the path of files inside installed packages."""
+    for path in sorted(sys.path, key=len, reverse=True):
+        if path and filename.startswith(path + os.sep):
+            return filename[len(path) + 1:]
+    return filename
@@ -0,0 +1,209 @@
+"""
+Adaptive token-bucket rate limiting for CrossRef requests.
+"""
+
+import re
+import threading
+import time
+from typing import Mapping, Optional
+
+
+class RateLimiter:
+    """Token bucket shared by threads and asyncio tasks.
+
+    The bucket resizes itself from the ``X-Rate-Limit-Limit`` and
+    ``X-Rate-Limit-Interval`` headers CrossRef sends with every response, and
+    throttled responses pause every caller for ``Retry-After`` seconds or an
+    exponentially growing delay.
+    """
+
+    def __init__(self, limit: float = 50, interval: float = 1.0, max_backoff: float = 60.0,
+                 adaptive: bool = True):
+        """
+        Create a rate limiter allowing ``limit`` requests per ``interval`` seconds.
+
+        Args:
+            limit (float): Number of requests allowed per interval
+            interval (float): Length of the interval in seconds
+            max_backoff (float): Upper bound of the exponential backoff delay in seconds
+            adaptive (bool): Whether to follow the limits advertised in response headers
+        """
+        self.limit = limit
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.adaptive = adaptive
+        self._lock = threading.Lock()
+        self._tokens = float(limit)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._failures = 0
+
+    @property
+    def rate(self) -> float:
+        """Sustained number of requests per second."""
+        return self.limit / self.interval
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.limit, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(delay, self._blocked_until - now)
+
+    def try_acquire(self) -> bool:
+        """
+        Take a token only if one is available right away.
+
+        Unlike `reserve`, a caller that would have to wait takes nothing, so
+        optional requests (e.g. hedges) never delay the ones that are needed.
+
+        Returns:
+            bool: Whether a token was taken
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.limit, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1 or now < self._blocked_until:
+                return False
+            self._tokens -= 1
+            return True
+
+    def acquire(self) -> float:
+        """Block the calling thread until a request may be sent, returning the time waited."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self) -> float:
+        """Wait without blocking the event loop until a request may be sent."""
+        import asyncio
+
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Resize the bucket from the X-Rate-Limit-Limit/X-Rate-Limit-Interval response headers."""
+        if not self.adaptive:
+            return
+        limit = headers.get("X-Rate-Limit-Limit")
+        interval = headers.get("X-Rate-Limit-Interval")
+        try:
+            limit = float(limit) if limit else None
+            interval = _parse_interval(interval) if interval else None
+        except ValueError:
+            return
+        with self._lock:
+            if limit and limit > 0:
+                self.limit = limit
+                self._tokens = min(self._tokens, limit)
+            if interval and interval > 0:
+                self.interval = interval
+
+    def backoff(self, retry_after: Optional[str] = None) -> float:
+        """
+        Pause all callers after a throttled response.
+
+        Args:
+            retry_after (str, optional): Value of the Retry-After header, seconds or an HTTP date
+
+        Returns:
+            float: The pause in seconds
+        """
+        delay = _parse_retry_after(retry_after) if retry_after else None
+        with self._lock:
+            self._failures += 1
+            if delay is None:
+                delay = min(self.max_backoff, self.interval * 2 ** (self._failures - 1))
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        return delay
+
+    def succeeded(self) -> None:
+        """Reset the exponential backoff after a successful response."""
+        if self._failures:
+            with self._lock:
+                self._failures = 0
+
+
+def _parse_interval(value: str) -> float:
+    """Parse a CrossRef interval such as '1s', '60s' or '1m' into seconds."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*', value)
+    if not match:
+        raise ValueError(f"Invalid interval: {value}")
+    return float(match.group(1)) * {'': 1, 's': 1, 'm': 60, 'h': 3600}[match.group(2)]
+
+
+def _parse_retry_after(value: str) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    import email.utils
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _shared_field(index: int) -> property:
+    """Property reading and writing one slot of the shared state array."""
+    def get(self) -> float:
+        return self._state[index]
+
+    def set(self, value: float) -> None:
+        self._state[index] = value
+
+    return property(get, set)
+
+
+class SharedRateLimiter(RateLimiter):
+    """`RateLimiter` whose bucket is shared by several processes.
+
+    The bucket lives in shared memory behind a process lock, so worker
+    processes stay within one global request budget and all of them pause
+    when any of them is throttled. Hand the limiter to the workers when they
+    are started, e.g. through the initializer of a `multiprocessing.Pool`.
+    """
+
+    limit = _shared_field(0)
+    interval = _shared_field(1)
+    _tokens = _shared_field(2)
+    _updated = _shared_field(3)
+    _blocked_until = _shared_field(4)
+    _failures = _shared_field(5)
+
+    def __init__(self, limit: float = 50, interval: float = 1.0, max_backoff: float = 60.0,
+                 adaptive: bool = True, context=None):
+        """
+        Create a shared rate limiter allowing ``limit`` requests per ``interval`` seconds.
+
+        Args:
+            limit (float): Number of requests allowed per interval, across all processes
+            interval (float): Length of the interval in seconds
+            max_backoff (float): Upper bound of the exponential backoff delay in seconds
+            adaptive (bool): Whether to follow the limits advertised in response headers
+            context (optional): multiprocessing context the worker processes are started with
+        """
+        if context is None:
+            import multiprocessing as context
+        self._state = context.RawArray('d', 6)
+        super().__init__(limit, interval, max_backoff, adaptive)
+        self._lock = context.Lock()
+
+    def __getstate__(self) -> dict:
+        return {'state': self._state, 'lock': self._lock, 'max_backoff': self.max_backoff,
+                'adaptive': self.adaptive}
+
+    def __setstate__(self, state: dict) -> None:
+        self._state = state['state']
+        self._lock = state['lock']
+        self.max_backoff = state['max_backoff']
+        self.adaptive = state['adaptive']
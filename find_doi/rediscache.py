@@ -0,0 +1,253 @@
+"""
+Lookup cache on a Redis server, shared by every node resolving against it.
+
+Uses the ``redis`` client library (``pip install find-doi[redis]``) and works
+with Redis, Valkey, KeyDB and other compatible servers. Entries and misses are
+stored as separate keys under a common prefix and expire through the server's
+own TTLs::
+
+    finder = DOIFinder(cache="redis://cache.internal:6379/0")
+
+Lookups never fail because of the cache: while the server cannot be reached,
+reads miss, writes are dropped and lookups go to CrossRef as without a cache.
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+from urllib.parse import unquote, urlsplit
+
+try:
+    import redis
+    from redis.backoff import NoBackoff
+    from redis.retry import Retry
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+from .cache import CacheBackend
+
+# Keys read or written per round trip by bulk operations
+BATCH_SIZE = 500
+
+_T = TypeVar("_T")
+
+
+class CacheError(Exception):
+    """The cache server could not be reached or refused a command."""
+
+
+class RedisCache(CacheBackend):
+    """`CacheBackend` storing lookups on a Redis server.
+
+    The number of entries is not limited here; give the server a
+    ``maxmemory`` with ``maxmemory-policy allkeys-lru`` to bound it.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, username: Optional[str] = None,
+                 prefix: str = "find-doi:", ttl: Optional[float] = 30 * 24 * 3600,
+                 negative_ttl: Optional[float] = 7 * 24 * 3600, socket_timeout: float = 1.0,
+                 retry_interval: float = 5.0):
+        """
+        Create a cache on a Redis server, connecting on first use.
+
+        Args:
+            host (str): Host name of the server
+            port (int): Port of the server
+            db (int): Database number to select
+            password (str, optional): Password to authenticate with
+            username (str, optional): ACL user to authenticate as, with the password
+            prefix (str): Prefix of every key, to share a database with other applications
+            ttl (float, optional): Seconds before an entry expires, None to never expire
+            negative_ttl (float, optional): Seconds before a remembered miss expires, None to never
+                                            expire, 0 to not remember misses
+            socket_timeout (float): Seconds to wait for the server before giving up on a command
+            retry_interval (float): Seconds the server is left alone after it could not be reached
+
+        Raises:
+            ImportError: If the redis package is not installed
+        """
+        if redis is None:
+            raise ImportError("RedisCache requires redis, install it with 'pip install find-doi[redis]'")
+        self.host = host
+        self.port = port
+        self.db = db
+        self.prefix = prefix
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.retry_interval = retry_interval
+        self.errors = 0  # Commands that failed, and were treated as misses or dropped
+        self._down_until = 0.0
+        # The client keeps a thread-safe pool of connections, opened on first use. It does not
+        # retry, a failed command is a miss and retry_interval spaces out the next attempts.
+        # RESP2 works with servers older than Redis 6, which do not know the RESP3 handshake.
+        self._client = redis.Redis(host=host, port=port, db=db, password=password, username=username,
+                                   socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout,
+                                   retry=Retry(NoBackoff(), 0), protocol=2)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCache":
+        """
+        Create a cache from a ``redis://[[username]:password@]host[:port][/db]`` URL.
+
+        Args:
+            url (str): The URL of the server
+            **kwargs: Other arguments of `RedisCache`
+        """
+        parts = urlsplit(url)
+        db = parts.path.strip("/")
+        return cls(host=parts.hostname or "127.0.0.1", port=parts.port or 6379, db=int(db) if db else 0,
+                   password=unquote(parts.password) if parts.password else None,
+                   username=unquote(parts.username) if parts.username else None, **kwargs)
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            value = self._call(lambda: self._client.get(self._entry_key(key)))
+        except CacheError:
+            return None
+        return None if value is None else json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            self._call(lambda: self._client.set(self._entry_key(key), json.dumps(value), px=_expiry(self.ttl)))
+        except CacheError:
+            pass
+
+    def is_miss(self, key: str) -> bool:
+        if self.negative_ttl == 0:
+            return False
+        try:
+            return bool(self._call(lambda: self._client.exists(self._miss_key(key))))
+        except CacheError:
+            return False
+
+    def set_miss(self, key: str) -> None:
+        if self.negative_ttl == 0:
+            return
+        try:
+            self._call(lambda: self._client.set(self._miss_key(key), "1", px=_expiry(self.negative_ttl)))
+        except CacheError:
+            pass
+
+    def dump(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every entry and miss stored under the prefix as a record.
+
+        Raises:
+            CacheError: If the server cannot be reached
+        """
+        entries, misses = self.prefix + "v:", self.prefix + "m:"
+        for keys in self._scan(self.prefix + "*"):
+            pipeline = self._client.pipeline(transaction=False)
+            for key in keys:
+                pipeline.get(key)
+                pipeline.pttl(key)
+            replies = self._call(pipeline.execute, strict=True)
+            now = time.time()
+            for key, value, pttl in zip(keys, replies[::2], replies[1::2]):
+                if value is None:
+                    # Expired since the scan
+                    continue
+                key = key.decode("utf-8")
+                if key.startswith(entries):
+                    record = {'key': key[len(entries):], 'value': json.loads(value)}
+                    ttl = self.ttl
+                elif key.startswith(misses):
+                    record = {'key': key[len(misses):], 'miss': True}
+                    ttl = self.negative_ttl
+                else:
+                    continue
+                # The server only knows the time left, derive the age from it
+                record['created'] = now - ttl + pttl / 1000 if ttl and pttl > 0 else now
+                yield record
+
+    def load(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Store records made by `dump`, with the time they have left to live.
+
+        Raises:
+            CacheError: If the server cannot be reached
+        """
+        now = time.time()
+        count = 0
+        pipeline = self._client.pipeline(transaction=False)
+        for record in records:
+            if self._expired(record, now):
+                continue
+            created = record.get('created', now)
+            if record.get('miss'):
+                ttl = self.negative_ttl
+                key, value = self._miss_key(record['key']), "1"
+            else:
+                ttl = self.ttl
+                key, value = self._entry_key(record['key']), json.dumps(record['value'])
+            pipeline.set(key, value, px=_expiry(None if ttl is None else ttl - (now - created)))
+            count += 1
+            if len(pipeline) >= BATCH_SIZE:
+                self._call(pipeline.execute, strict=True)
+        if len(pipeline):
+            self._call(pipeline.execute, strict=True)
+        return count
+
+    def clear(self) -> None:
+        """
+        Remove every key under the prefix.
+
+        Raises:
+            CacheError: If the server cannot be reached
+        """
+        for keys in self._scan(self.prefix + "*"):
+            self._call(lambda: self._client.delete(*keys), strict=True)
+
+    def close(self) -> None:
+        """Close the connections to the server."""
+        self._client.connection_pool.disconnect()
+
+    def __len__(self) -> int:
+        return sum(len(keys) for keys in self._scan(self.prefix + "v:*"))
+
+    def _entry_key(self, key: str) -> str:
+        return self.prefix + "v:" + key
+
+    def _miss_key(self, key: str) -> str:
+        return self.prefix + "m:" + key
+
+    def _scan(self, pattern: str) -> Iterator[List[bytes]]:
+        """Yield the keys matching a pattern in batches."""
+        cursor = 0
+        while True:
+            cursor, keys = self._call(lambda: self._client.scan(cursor, match=pattern, count=BATCH_SIZE),
+                                      strict=True)
+            if keys:
+                yield keys
+            if not cursor:
+                return
+
+    def _call(self, command: Callable[[], _T], strict: bool = False) -> _T:
+        """
+        Run a command of the client.
+
+        Args:
+            command (callable): Sends the command and returns its reply
+            strict (bool): Try the server even while it is considered down
+
+        Raises:
+            CacheError: If the server cannot be reached or answers the command with an error
+        """
+        if not strict and time.monotonic() < self._down_until:
+            self.errors += 1
+            raise CacheError(f"Cache server {self.host}:{self.port} is unavailable")
+        try:
+            return command()
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            self.errors += 1
+            self._down_until = time.monotonic() + self.retry_interval
+            raise CacheError(f"Cache server {self.host}:{self.port} failed: {e}") from e
+        except redis.RedisError as e:
+            self.errors += 1
+            raise CacheError(f"Cache server refused a command: {e}") from e
+
+
+def _expiry(seconds: Optional[float]) -> Optional[int]:
+    """The milliseconds before a key expires, None to keep it."""
+    return None if seconds is None else max(int(seconds * 1000), 1)
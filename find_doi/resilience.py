@@ -0,0 +1,240 @@
+"""
+Deadlines, hedged requests and circuit breaking for CrossRef requests.
+
+A deadline bounds the time everything inside a ``with deadline(...)`` block
+may take, including lookups running on worker threads started from it.
+Requests are not started once it has passed, and their timeouts are cut to
+the time left::
+
+    with deadline(300):
+        resolutions = finder.resolve_bibtex(bibtex, max_workers=8)
+
+A `CircuitBreaker` fails requests fast while CrossRef keeps failing, and a
+`LatencyWindow` tracks recent response times to pick the delay after which a
+hedged duplicate request is sent.
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from .errors import CircuitOpenError, DeadlineExceeded
+
+T = TypeVar('T')
+
+# Seconds before a request is hedged, until enough response times were seen to use their 95th percentile
+HEDGE_DELAY = 1.0
+# Seconds before a failed request is retried, doubled for every further retry
+RETRY_BACKOFF = 0.5
+
+# Monotonic time at which the innermost deadline expires
+_expires: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar("find_doi_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Bound the time of every lookup made inside the block.
+
+    Nested deadlines can only shorten the time left, never extend it.
+
+    Args:
+        seconds (float, optional): Seconds the block may take, None for no limit
+    """
+    if seconds is None:
+        yield
+        return
+    expires = time.monotonic() + seconds
+    current = _expires.get()
+    token = _expires.set(expires if current is None else min(current, expires))
+    try:
+        yield
+    finally:
+        _expires.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, None without a deadline."""
+    expires = _expires.get()
+    return None if expires is None else expires - time.monotonic()
+
+
+def check_deadline(delay: float = 0.0) -> None:
+    """
+    Raise if the current deadline passes within ``delay`` seconds.
+
+    Raises:
+        DeadlineExceeded: When there is not enough time left
+    """
+    left = remaining()
+    if left is not None and left <= delay:
+        raise DeadlineExceeded("Deadline exceeded before CrossRef answered")
+
+
+def request_timeout(timeout: Optional[Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+    """Cut a (connect, read) timeout to the time left before the current deadline."""
+    left = remaining()
+    if left is None:
+        return timeout
+    left = max(left, 0.001)
+    if timeout is None:
+        return left, left
+    return min(timeout[0], left), min(timeout[1], left)
+
+
+def retry_delay(failures: int, backoff: float = RETRY_BACKOFF) -> Optional[float]:
+    """
+    Seconds to wait before retrying a request that failed ``failures`` times in a row.
+
+    Returns:
+        Optional[float]: The delay, None if the current deadline would pass before the retry
+    """
+    delay = backoff * 2 ** (failures - 1)
+    left = remaining()
+    if left is not None and left <= delay:
+        return None
+    return delay
+
+
+def run_in_context(func: Callable[..., T]) -> Callable[..., T]:
+    """Wrap a function to run in a copy of the caller's context, keeping its deadline on worker threads."""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # A context can only be entered by one thread at a time
+        return context.copy().run(func, *args, **kwargs)
+
+    return run
+
+
+def map_concurrently(func: Callable[[Any], T], items: Iterable[Any], max_workers: int = 1) -> List[T]:
+    """
+    Apply a function to every item using up to max_workers threads.
+
+    Args:
+        func (Callable): The function, run in a copy of the caller's context (see `run_in_context`)
+        items (Iterable): The items
+        max_workers (int): Number of items processed concurrently, 1 to process them in this thread
+
+    Returns:
+        List: The results, in input order
+    """
+    if max_workers <= 1:
+        return [func(item) for item in items]
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Workers keep the caller's deadline
+        return list(executor.map(run_in_context(func), items))
+
+
+class CircuitBreaker:
+    """Fail requests fast while CrossRef is degraded.
+
+    After ``failure_threshold`` consecutive failures (connection errors,
+    timeouts and 5xx responses) the circuit opens and requests fail at once
+    with `CircuitOpenError`. After ``recovery_time`` seconds a single trial
+    request is let through: its success closes the circuit, its failure opens
+    it again.
+    """
+
+    def __init__(self, failure_threshold: Optional[int] = 5, recovery_time: float = 30.0):
+        """
+        Create a closed circuit breaker.
+
+        Args:
+            failure_threshold (int, optional): Consecutive failures that open the circuit, None never opens it
+            recovery_time (float): Seconds the circuit stays open before a trial request
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+
+    def __getstate__(self) -> dict:
+        # Worker processes start with a closed circuit of their own
+        return {'failure_threshold': self.failure_threshold, 'recovery_time': self.recovery_time}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half-open' (letting a trial request through)."""
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if self._trial or time.monotonic() - self._opened_at >= self.recovery_time:
+                return 'half-open'
+            return 'open'
+
+    def before_request(self) -> None:
+        """
+        Check that a request may be sent.
+
+        Raises:
+            CircuitOpenError: While the circuit is open, or a trial request is already running
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = time.monotonic() - self._opened_at
+            if waited >= self.recovery_time and not self._trial:
+                self._trial = True
+                return
+            retry_in = max(self.recovery_time - waited, 0.0)
+        raise CircuitOpenError(f"CrossRef is failing, not sending requests for another {retry_in:.0f} s")
+
+    def succeeded(self) -> None:
+        """Record a successful request, closing the circuit."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def abandoned(self) -> None:
+        """Record a request given up before CrossRef answered, letting another trial request through."""
+        with self._lock:
+            self._trial = False
+
+    def failed(self) -> None:
+        """Record a failed request, opening the circuit after too many in a row."""
+        with self._lock:
+            self._failures += 1
+            if self._trial or (self.failure_threshold is not None and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class LatencyWindow:
+    """Recent response times of an endpoint, for picking hedging delays."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        """
+        Create an empty window.
+
+        Args:
+            size (int): Number of recent response times kept
+            min_samples (int): Response times needed before quantiles are estimated
+        """
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        """Record a response time."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Return a quantile of the recent response times, None until there are enough of them."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            samples = sorted(self._samples)
+        return samples[min(int(fraction * len(samples)), len(samples) - 1)]
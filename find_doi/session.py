@@ -0,0 +1,61 @@
+"""
+Pooled HTTP transport for talking to the CrossRef API.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .resilience import remaining
+
+
+class DeadlineRetry(Retry):
+    """urllib3 retry policy that gives up once the current `deadline` would pass before the next attempt."""
+
+    def is_exhausted(self) -> bool:
+        left = remaining()
+        return super().is_exhausted() or (left is not None and left <= self.get_backoff_time())
+
+
+def create_session(pool_connections: int = 10, pool_maxsize: int = 10, max_retries: int = 0,
+                   backoff_factor: float = 0.5) -> requests.Session:
+    """
+    Create a requests Session with a keep-alive connection pool.
+
+    The session can be shared between several DOIFinder instances. Responses are
+    requested gzip-compressed. Failed requests are not retried by the session:
+    `DOIFinder` retries them itself, so that every attempt goes through its rate
+    limiter and circuit breaker (see ``transient_retries``).
+
+    Args:
+        pool_connections (int): Number of host pools to cache
+        pool_maxsize (int): Maximum number of connections kept alive per host
+        max_retries (int): Retries of connections that could not be established, before
+                           anything was sent, unless the current `deadline` passes first
+        backoff_factor (float): Factor for the exponential delay between retries
+
+    Returns:
+        requests.Session: The configured session
+    """
+    retry = DeadlineRetry(
+        total=max_retries,
+        connect=max_retries,
+        # Timeouts and 5xx responses are retried by the finder
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=backoff_factor,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+        # Throttled responses are handled by the finder's RateLimiter
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive",
+    })
+    return session
@@ -0,0 +1,154 @@
+"""
+Multi-process resolution of many BibTeX files.
+
+Files are sharded across a pool of worker processes, so BibTeX parsing and
+title normalization use every core. Each worker runs its own `DOIFinder`, but
+all of them share one lookup cache (a SQLite file, or a Redis server shared
+with other nodes) and one `SharedRateLimiter`, so the pool as a whole stays
+within CrossRef's request budget. Results come back in input order, tagged
+with the file they were read from. A `deadline` around the call applies to
+the workers too.
+"""
+
+import glob
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import Resolution
+from .resilience import deadline, remaining
+from .tracing import Span
+
+# Set in each worker process by `_init_worker`
+_worker: Dict[str, Any] = {}
+
+
+def expand_inputs(inputs: Iterable[str], pattern: str = "*.bib") -> List[str]:
+    """
+    Expand files, directories and glob patterns into a list of BibTeX files.
+
+    Directories are searched recursively for files matching ``pattern``, glob
+    patterns may use ``**``. Matches are sorted, and every file is listed once
+    in the order it is first found.
+
+    Args:
+        inputs (Iterable[str]): File paths, directories or glob patterns
+        pattern (str): File name pattern searched for in directories
+
+    Returns:
+        List[str]: The BibTeX file paths
+    """
+    paths = {}
+    for value in inputs:
+        if os.path.isdir(value):
+            matches = sorted(glob.glob(os.path.join(glob.escape(value), "**", pattern), recursive=True))
+        elif glob.has_magic(value):
+            matches = sorted(glob.glob(value, recursive=True))
+        else:
+            matches = [value]
+        for path in matches:
+            if not os.path.isdir(path):
+                paths.setdefault(os.path.normpath(path), None)
+    return list(paths)
+
+
+def iter_resolve_files(paths: Iterable[str], processes: Optional[int] = None, max_workers: int = 1,
+                       use_metadata: bool = True, fetch_dois: bool = True, rate_limiter=None, metrics=None,
+                       tracer=None,
+                       cache_ttl: Optional[float] = 30 * 24 * 3600, negative_ttl: Optional[float] = 7 * 24 * 3600,
+                       **finder_options) -> Iterator[Tuple[str, Resolution]]:
+    """
+    Resolve the entries of many BibTeX files with a pool of worker processes.
+
+    Args:
+        paths (Iterable[str]): BibTeX files, see `expand_inputs`
+        processes (int, optional): Number of worker processes, defaults to the number of CPUs
+        max_workers (int): Number of entries each worker resolves concurrently
+        use_metadata (bool): Whether to use metadata (beside title) to help find the DOI
+        fetch_dois (bool): Whether entries that carry a DOI are looked up for their article
+                           information, see `DOIFinder.iter_resolve_bibtex`
+        rate_limiter (SharedRateLimiter, optional): Request budget shared by all workers.
+                                                    One following CrossRef's advertised limits is created if omitted.
+        metrics (Metrics, optional): Receives the metrics collected by the workers
+        tracer (Tracer, optional): Receives the spans recorded by the workers
+        cache_ttl (float, optional): Seconds before an entry of the shared cache expires
+        negative_ttl (float, optional): Seconds before a miss remembered by the shared cache expires
+        **finder_options: Arguments of every worker's `DOIFinder`. ``cache`` and ``index``
+                          must be paths (or a cache URL), so each worker can open them.
+                          A ``memory://`` cache is not shared between the workers.
+
+    Yields:
+        Tuple[str, Resolution]: The file and the resolution of each entry, in input order.
+        A file that cannot be read yields a single resolution with its error.
+    """
+    import multiprocessing
+
+    from .ratelimit import SharedRateLimiter
+
+    for name in ("cache", "index"):
+        if finder_options.get(name) is not None and not isinstance(finder_options[name], str):
+            raise TypeError(f"{name} must be a path so that worker processes can open it")
+    if rate_limiter is None:
+        rate_limiter = SharedRateLimiter()
+
+    if tracer is not None:
+        # Each worker records into its own copy, whose spans come back with its results
+        finder_options = dict(finder_options, tracer=tracer)
+    paths = list(paths)
+    processes = min(processes or os.cpu_count() or 1, max(len(paths), 1))
+    # Deadlines are kept in a context variable, which does not reach other processes
+    left = remaining()
+    expires = None if left is None else time.time() + left
+    with multiprocessing.Pool(processes, initializer=_init_worker,
+                              initargs=(finder_options, (cache_ttl, negative_ttl), rate_limiter,
+                                        dict(max_workers=max_workers, use_metadata=use_metadata,
+                                             fetch_dois=fetch_dois), expires)) as pool:
+        # imap keeps the input order while later files are already being resolved
+        for path, resolutions, snapshot, spans in pool.imap(_resolve_file, paths):
+            if metrics is not None and snapshot is not None:
+                metrics.merge(snapshot)
+            if tracer is not None:
+                tracer.extend(spans)
+            for resolution in resolutions:
+                yield path, resolution
+        # Let the workers exit on their own and close their finders, instead of being terminated
+        pool.close()
+        pool.join()
+
+
+def _init_worker(finder_options: Dict[str, Any], ttls: Tuple[Optional[float], Optional[float]], rate_limiter,
+                 resolve_options: Dict[str, Any], expires: Optional[float]) -> None:
+    """Create the finder of a worker process."""
+    import multiprocessing.util
+
+    from . import DOIFinder
+
+    finder_options = dict(finder_options)
+    if finder_options.get("cache") is not None:
+        from .cache import open_cache
+        finder_options["cache"] = open_cache(finder_options["cache"], ttl=ttls[0], negative_ttl=ttls[1])
+    # Keep one pooled connection per thread
+    finder = _worker["finder"] = DOIFinder(rate_limiter=rate_limiter, owns_cache=True,
+                                           pool_size=max(resolve_options["max_workers"], 10), **finder_options)
+    # Run when the worker exits after `Pool.close`, writing what the cache still buffers
+    multiprocessing.util.Finalize(finder, finder.close, exitpriority=10)
+    # Arguments of iter_resolve_bibtex
+    _worker["resolve_options"] = resolve_options
+    # Wall clock time at which the caller's deadline passes
+    _worker["expires"] = expires
+
+
+def _resolve_file(path: str) -> Tuple[str, List[Resolution], Optional[Dict[str, Any]], List[Span]]:
+    """Resolve every entry of one file in a worker process."""
+    finder = _worker["finder"]
+    expires = _worker["expires"]
+    try:
+        with deadline(None if expires is None else expires - time.time()), \
+                open(path, "r", encoding="utf-8") as file:
+            resolutions = list(finder.iter_resolve_bibtex(file, **_worker["resolve_options"]))
+    except (OSError, UnicodeDecodeError) as e:
+        resolutions = [Resolution(error=f"Error reading file: {e}")]
+    # Hand the metrics of this file to the parent and start afresh for the next one
+    snapshot = finder.metrics.snapshot()
+    finder.metrics.reset()
+    return path, resolutions, snapshot, finder.tracer.drain()
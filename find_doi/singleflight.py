@@ -0,0 +1,98 @@
+"""
+Coalescing of concurrent identical lookups.
+"""
+
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+class _Call:
+    """A lookup in flight and the outcome shared with its waiters."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run concurrent calls that share a key only once.
+
+    The first caller for a key runs the function; callers arriving while it is
+    still running wait for it and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call ``func(*args, **kwargs)`` unless a call with the same key is already running.
+
+        Args:
+            key (Hashable): Identifies identical calls
+            func (Callable): The function to call
+
+        Returns:
+            Any: The result of the call, shared by all concurrent callers
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of `SingleFlight` for coroutines on one event loop."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Future"] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Await ``func(*args, **kwargs)`` unless a call with the same key is already pending."""
+        import asyncio
+
+        self.calls += 1
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+            # Shielded so a cancelled waiter does not cancel the shared call
+            return await asyncio.shield(future)
+
+        future = self._calls[key] = asyncio.ensure_future(func(*args, **kwargs))
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if future.done():
+                self._calls.pop(key, None)
+            else:
+                future.add_done_callback(lambda _: self._calls.pop(key, None))
@@ -0,0 +1,165 @@
+"""
+Column-oriented container for large sets of lookup results.
+
+A `ResultTable` keeps one Python list per field instead of one object (and
+later one dict) per result, and writes the columns in bulk to CSV, an Arrow
+table or a Parquet file. Results can be appended while they are streamed out
+of `DOIFinder.iter_resolve_bibtex`, so the objects never pile up::
+
+    table = ResultTable.from_resolutions(finder.iter_resolve_bibtex(file, max_workers=8))
+    table.to_csv("references.csv")
+"""
+
+import csv
+from typing import IO, TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from .models import ArticleInfo, Resolution
+
+if TYPE_CHECKING:
+    import pyarrow
+
+# Columns of a table by default, in output order
+COLUMNS = (
+    'key', 'doi', 'title', 'authors', 'year', 'journal', 'publisher', 'url', 'type', 'abstract',
+    'citation_count', 'score', 'source', 'requests', 'status', 'error',
+)
+# Optional columns
+EXTRA_COLUMNS = (
+    'file',  # BibTeX file an entry was read from
+)
+# Columns filled from the ArticleInfo of a result
+_ARTICLE_COLUMNS = ('title', 'authors', 'year', 'journal', 'publisher', 'url', 'type', 'abstract', 'citation_count')
+# Separator of the authors in CSV output
+AUTHOR_SEPARATOR = '; '
+
+
+class ResultTable:
+    """Lookup results stored column by column."""
+
+    def __init__(self, columns: Sequence[str] = COLUMNS):
+        """
+        Create an empty table.
+
+        Args:
+            columns (Sequence[str]): Columns to keep, from `COLUMNS` and `EXTRA_COLUMNS`.
+                                     Fields that are not kept are dropped on append.
+        """
+        unknown = [name for name in columns if name not in COLUMNS and name not in EXTRA_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        self.columns: Dict[str, List[Any]] = {name: [] for name in columns}
+        self._article_columns = [name for name in _ARTICLE_COLUMNS if name in self.columns]
+
+    @classmethod
+    def from_resolutions(cls, resolutions: Iterable[Resolution], columns: Sequence[str] = COLUMNS) -> "ResultTable":
+        """Build a table from resolutions, consuming them one at a time."""
+        table = cls(columns)
+        table.extend(resolutions)
+        return table
+
+    @classmethod
+    def from_article_infos(cls, article_infos: Iterable[Optional[ArticleInfo]],
+                           columns: Sequence[str] = COLUMNS) -> "ResultTable":
+        """Build a table from article information, with an empty row for every None."""
+        table = cls(columns)
+        for article_info in article_infos:
+            table.append_article_info(article_info)
+        return table
+
+    def append(self, resolution: Resolution, file: Optional[str] = None) -> None:
+        """Add the result of resolving one work, optionally with the file it was read from."""
+        self._append(resolution.article_info, key=resolution.key, doi=resolution.doi, score=resolution.score,
+                     source=resolution.source, requests=resolution.requests, status=resolution.status,
+                     error=resolution.error, file=file)
+
+    def append_article_info(self, article_info: Optional[ArticleInfo], key: Optional[str] = None) -> None:
+        """Add the article information of one work."""
+        doi = article_info.doi if article_info is not None else None
+        self._append(article_info, key=key, doi=doi, score=None, source=None, requests=None,
+                     status='found' if doi else 'miss', error=None, file=None)
+
+    def extend(self, resolutions: Iterable[Resolution]) -> None:
+        """Add several results."""
+        for resolution in resolutions:
+            self.append(resolution)
+
+    def _append(self, article_info: Optional[ArticleInfo], **values) -> None:
+        for name, value in values.items():
+            column = self.columns.get(name)
+            if column is not None:
+                column.append(value)
+        for name in self._article_columns:
+            self.columns[name].append(getattr(article_info, name) if article_info is not None else None)
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
+
+    def column(self, name: str) -> List[Any]:
+        """Return the values of a column."""
+        return self.columns[name]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Return one result as a dict of column values."""
+        return {name: values[index] for name, values in self.columns.items()}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Yield the results as dicts, one at a time."""
+        names = list(self.columns)
+        for values in zip(*self.columns.values()):
+            yield dict(zip(names, values))
+
+    def to_csv(self, file: Union[str, IO[str]]) -> None:
+        """
+        Write the table as CSV with a header row.
+
+        Authors are joined with ``'; '`` and missing values are left empty.
+
+        Args:
+            file (str or IO[str]): Path of the CSV file, or an open text stream
+        """
+        if isinstance(file, str):
+            with open(file, 'w', encoding='utf-8', newline='') as stream:
+                return self.to_csv(stream)
+        writer = csv.writer(file)
+        writer.writerow(self.columns)
+        columns = [_csv_authors(values) if name == 'authors' else values for name, values in self.columns.items()]
+        writer.writerows(zip(*columns))
+
+    def to_arrow(self) -> "pyarrow.Table":
+        """
+        Convert the table to a pyarrow Table, authors as a list of strings.
+
+        Requires pyarrow, install it with ``pip install find-doi[parquet]``.
+        """
+        pyarrow = _import_pyarrow()
+        types = {
+            'authors': pyarrow.list_(pyarrow.string()),
+            'year': pyarrow.int64(),
+            'citation_count': pyarrow.int64(),
+            'score': pyarrow.float64(),
+            'requests': pyarrow.int64(),
+        }
+        return pyarrow.table({
+            name: pyarrow.array(values, type=types.get(name, pyarrow.string()))
+            for name, values in self.columns.items()
+        })
+
+    def to_parquet(self, path: str) -> None:
+        """Write the table as a Parquet file, see `to_arrow`."""
+        _import_pyarrow()
+        import pyarrow.parquet
+
+        pyarrow.parquet.write_table(self.to_arrow(), path)
+
+
+def _csv_authors(values: List[Optional[Sequence[str]]]) -> Iterator[Optional[str]]:
+    return (AUTHOR_SEPARATOR.join(authors) if authors else None for authors in values)
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Arrow and Parquet export require pyarrow, "
+                          "install it with 'pip install find-doi[parquet]'") from None
+    return pyarrow
@@ -0,0 +1,264 @@
+"""
+Per-entry tracing of DOI Finder lookups.
+
+Where `Metrics` aggregates, a `Tracer` records every stage of every lookup
+as a span: BibTeX parsing, title cleaning, rate limiter waits, HTTP
+requests, JSON decoding and title matching, nested under the lookup of the
+entry they belong to. Spans follow the lookup onto worker threads and
+asyncio tasks, and can be exported as Chrome trace events (for
+``chrome://tracing`` or Perfetto) or as OpenTelemetry (OTLP/JSON)::
+
+    tracer = Tracer()
+    finder = DOIFinder(tracer=tracer)
+    finder.resolve_bibtex(bibtex, max_workers=8)
+    tracer.write("trace.json")
+"""
+
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, List, Optional, Union
+
+# Export formats of `Tracer.write`
+FORMATS = ("chrome", "otlp")
+
+# Span enclosing the code currently running, in this thread or task
+_current: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("find_doi_span", default=None)
+
+
+@dataclass
+class Span:
+    """A timed stage of a lookup."""
+    name: str
+    trace_id: int  # Shared by every span of one lookup
+    span_id: int
+    parent_id: Optional[int] = None
+    start: int = 0  # Nanoseconds since the epoch
+    end: int = 0
+    pid: int = 0
+    thread: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set(self, **attributes) -> None:
+        """Add attributes, e.g. the status of a response once it arrived."""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+
+class Tracer:
+    """Thread-safe recorder of `Span` objects."""
+
+    def __init__(self, service: str = "find-doi", max_spans: Optional[int] = 1_000_000):
+        """
+        Create an empty tracer.
+
+        Args:
+            service (str): Service name of the OpenTelemetry export
+            max_spans (int, optional): Most spans kept, later ones are counted in `dropped`.
+                                       None to keep every span.
+        """
+        self.service = service
+        self.max_spans = max_spans
+        self.dropped = 0
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        # Span times come from the monotonic clock, shifted to the epoch once
+        self._offset = time.time_ns() - time.perf_counter_ns()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Worker processes get an empty tracer with the same settings
+        return {'service': self.service, 'max_spans': self.max_spans}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    @property
+    def spans(self) -> List[Span]:
+        """The finished spans, in the order they finished."""
+        with self._lock:
+            return list(self._spans)
+
+    def span(self, name: str, **attributes) -> "_SpanContext":
+        """
+        Time a ``with`` block as a span, a child of the span enclosing it.
+
+        A span started outside of any other span begins a new trace.
+
+        Args:
+            name (str): Name of the stage, e.g. ``http_request``
+            **attributes: Details of the span, e.g. the entry key
+        """
+        return _SpanContext(self, name, attributes)
+
+    def extend(self, spans: List[Span]) -> None:
+        """Add spans recorded elsewhere, e.g. by a worker process."""
+        with self._lock:
+            self._keep(spans)
+
+    def drain(self) -> List[Span]:
+        """Remove and return the finished spans."""
+        with self._lock:
+            spans, self._spans = self._spans, []
+        return spans
+
+    def to_chrome(self) -> Dict[str, Any]:
+        """
+        Export the spans as Chrome trace events.
+
+        Every trace gets its own row, named after its first span, so the
+        stages of each entry line up. Timestamps are microseconds since the
+        first span started.
+        """
+        spans = sorted(self.spans, key=lambda span: span.start)
+        origin = spans[0].start if spans else 0
+        rows: Dict[int, int] = {}
+        events = []
+        for span in spans:
+            row = rows.get(span.trace_id)
+            if row is None:
+                row = rows[span.trace_id] = len(rows) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": span.pid, "tid": row,
+                               "args": {"name": _label(span)}})
+            args = dict(span.attributes, thread=span.thread)
+            if span.error is not None:
+                args["error"] = span.error
+            events.append({"name": span.name, "cat": "find_doi", "ph": "X", "pid": span.pid, "tid": row,
+                           "ts": (span.start - origin) / 1000, "dur": (span.end - span.start) / 1000,
+                           "args": args})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Export the spans as an OpenTelemetry (OTLP/JSON) trace request."""
+        spans = []
+        for span in sorted(self.spans, key=lambda span: span.start):
+            record = {
+                "traceId": f"{span.trace_id:032x}",
+                "spanId": f"{span.span_id:016x}",
+                "name": span.name,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(span.start),
+                "endTimeUnixNano": str(span.end),
+                "attributes": [_attribute(key, value) for key, value in
+                               dict(span.attributes, **{"process.pid": span.pid, "thread.id": span.thread}).items()],
+                "status": {"code": 2, "message": span.error} if span.error is not None else {},
+            }
+            if span.parent_id is not None:
+                record["parentSpanId"] = f"{span.parent_id:016x}"
+            spans.append(record)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", self.service)]},
+            "scopeSpans": [{"scope": {"name": "find_doi"}, "spans": spans}],
+        }]}
+
+    def write(self, file: Union[str, IO[str]], format: str = "chrome") -> None:
+        """
+        Write the spans to a file.
+
+        Args:
+            file (str or IO[str]): Path or text stream to write to
+            format (str): ``chrome`` for Chrome trace events, ``otlp`` for OpenTelemetry JSON
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Unknown trace format {format!r}, expected one of {', '.join(FORMATS)}")
+        data = self.to_chrome() if format == "chrome" else self.to_otlp()
+        if isinstance(file, str):
+            with open(file, "w", encoding="utf-8") as stream:
+                json.dump(data, stream)
+        else:
+            json.dump(data, file)
+
+    def _start(self, name: str, attributes: Dict[str, Any]) -> Span:
+        parent = _current.get()
+        span_id = self._random.getrandbits(64) or 1
+        return Span(name=name, trace_id=self._random.getrandbits(128) if parent is None else parent.trace_id,
+                    span_id=span_id, parent_id=None if parent is None else parent.span_id,
+                    start=time.perf_counter_ns() + self._offset, pid=os.getpid(), thread=threading.get_ident(),
+                    attributes=attributes)
+
+    def _finish(self, span: Span) -> None:
+        span.end = time.perf_counter_ns() + self._offset
+        with self._lock:
+            self._keep([span])
+
+    def _keep(self, spans: List[Span]) -> None:
+        if self.max_spans is not None and len(self._spans) + len(spans) > self.max_spans:
+            room = max(self.max_spans - len(self._spans), 0)
+            self.dropped += len(spans) - room
+            spans = spans[:room]
+        self._spans.extend(spans)
+
+
+class NullTracer(Tracer):
+    """Tracer that records nothing, used when tracing is off."""
+
+    @property
+    def enabled(self) -> bool:
+        return False
+
+    def span(self, name: str, **attributes) -> Span:
+        return _NO_SPAN
+
+
+class _SpanContext:
+    """Context manager recording one span."""
+
+    __slots__ = ('tracer', 'name', 'attributes', 'span', 'token')
+
+    def __init__(self, tracer: Tracer, name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Span:
+        self.span = self.tracer._start(self.name, self.attributes)
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        _current.reset(self.token)
+        if exc_value is not None:
+            self.span.error = f"{exc_type.__name__}: {exc_value}"
+        self.tracer._finish(self.span)
+
+
+class _NoSpan(Span):
+    """Span of a `NullTracer`, discarding the attributes set on it."""
+
+    def set(self, **attributes) -> None:
+        pass
+
+
+# Shared by every span of a `NullTracer`
+_NO_SPAN = _NoSpan(name="", trace_id=0, span_id=0)
+
+
+def _label(span: Span) -> str:
+    """Name of the Chrome trace row of a trace, from its first span."""
+    detail = span.attributes.get("key") or span.attributes.get("title") or span.attributes.get("doi")
+    return f"{span.name} {detail}" if detail else span.name
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    """Encode an attribute as an OTLP key/value."""
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
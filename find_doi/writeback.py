@@ -0,0 +1,235 @@
+"""
+Incremental DOI write-back into BibTeX files.
+
+`write_back` inserts the DOIs it finds into the original file as ``doi``
+fields, leaving every other byte of the file as it was, so the change reads
+as a small diff under version control. A sidecar state file keeps a hash of
+every entry already handled, and later runs only look up entries that were
+added or edited since, and entries nothing was found for once the miss is
+older than ``negative_ttl``::
+
+    with DOIFinder(cache="lookups.sqlite") as finder:
+        result = write_back(finder, "references.bib", max_workers=8)
+    print(f"{result.inserted} DOIs written, {result.unchanged} entries unchanged")
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from .bibtex import _STRING_BLOCK, _parse_blocks, iter_bibtex_blocks
+from .models import Resolution
+
+if TYPE_CHECKING:
+    import bibtexparser
+
+# Version of the state file layout
+STATE_VERSION = 1
+
+# Start of an entry: its type, opening delimiter and citation key
+_ENTRY_HEAD = re.compile(r'\s*@\s*(\w+)\s*([{(])\s*([^,\s]*)')
+# Block types that are not bibliographic entries
+_NON_ENTRIES = {'string', 'comment', 'preamble'}
+# A field assignment at the start of a line, to copy its layout
+_FIELD_LAYOUT = re.compile(r'\n([ \t]*)\w[\w-]*(\s*=\s*)')
+_DOI_FIELD = re.compile(r'[,{(]\s*doi\s*=', re.IGNORECASE)
+
+
+@dataclass
+class WriteBackResult:
+    """Summary of a write-back run."""
+    path: str
+    resolutions: List[Resolution] = field(default_factory=list)  # Entries looked up, in file order
+    inserted: int = 0  # DOI fields written into the file
+    unchanged: int = 0  # Entries skipped because they were handled by an earlier run
+
+    @property
+    def failed(self) -> int:
+        """Number of lookups that failed and are retried by the next run."""
+        return sum(1 for resolution in self.resolutions if resolution.error)
+
+
+def default_state_path(path: str) -> str:
+    """Sidecar state file of a BibTeX file: ``references.bib`` keeps its state in ``references.find-doi.json``."""
+    return os.path.splitext(path)[0] + ".find-doi.json"
+
+
+def entry_hash(block: str) -> str:
+    """Hash the text of an entry, ignoring changes in whitespace and in the text following it."""
+    end = _entry_end(block)
+    if end is not None:
+        block = block[:end + 1]
+    return hashlib.sha256(" ".join(block.split()).encode('utf-8')).hexdigest()[:32]
+
+
+def insert_doi(block: str, doi: str) -> Optional[str]:
+    """
+    Add a ``doi`` field at the end of a BibTeX entry.
+
+    The field copies the indentation and ``=`` spacing of the entry's other
+    fields and its line endings, the rest of the text is kept as is.
+
+    Args:
+        block (str): The text of the entry, possibly followed by blank lines or comments
+        doi (str): The DOI to insert
+
+    Returns:
+        Optional[str]: The updated text, None if the entry is not closed
+    """
+    end = _entry_end(block)
+    if end is None:
+        return None
+    newline = "\r\n" if "\r\n" in block else "\n"
+    layout = _FIELD_LAYOUT.search(block)
+    indent, separator = (layout.group(1), layout.group(2)) if layout else ("  ", " = ")
+    if not layout or newline not in block[:end]:
+        # Entry written on a single line
+        indent = " "
+    body = block[:end].rstrip()
+    gap = block[len(body):end]
+    trailing_comma = body.endswith(",")
+    if not trailing_comma:
+        body += ","
+    line_break = newline if newline in block[:end] else ""
+    text = f"{line_break}{indent}doi{separator}{{{doi}}}" + ("," if trailing_comma else "")
+    return body + text + gap + block[end:]
+
+
+def write_back(finder, path: str, state_path: Optional[str] = None, use_metadata: bool = True,
+               max_workers: int = 1, negative_ttl: Optional[float] = 7 * 24 * 3600) -> WriteBackResult:
+    """
+    Resolve the entries of a BibTeX file without a DOI and write the DOIs found into it.
+
+    Entries whose text is unchanged since an earlier run, according to the
+    state file, are neither parsed nor looked up again; entries nothing was
+    found for are looked up again once their miss is older than negative_ttl.
+    Failed lookups are not recorded, so the next run retries them. The file is replaced atomically, and only if a DOI was added.
+
+    Args:
+        finder (DOIFinder): The finder used for the lookups
+        path (str): The BibTeX file to update
+        state_path (str, optional): The state file, see `default_state_path`
+        use_metadata (bool): Whether to use metadata (beside title) to help find the DOI
+        max_workers (int): Number of entries resolved concurrently
+        negative_ttl (float, optional): Seconds before an entry nothing was found for is
+                                        looked up again, None to never
+
+    Returns:
+        WriteBackResult: The lookups made and the number of DOIs written
+    """
+    state_path = state_path or default_state_path(path)
+    state = _load_state(state_path)
+    result = WriteBackResult(path=path)
+    now = time.time()
+
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        blocks = list(iter_bibtex_blocks(file))
+
+    strings: List[str] = []
+    pending: List[Tuple[int, "bibtexparser.model.Entry"]] = []
+    done: Dict[str, dict] = {}
+    for index, block in enumerate(blocks):
+        if _STRING_BLOCK.match(block):
+            strings.append(block)
+            continue
+        head = _ENTRY_HEAD.match(block)
+        if head is None or head.group(1).lower() in _NON_ENTRIES:
+            continue
+        digest = entry_hash(block)
+        if digest in state and not _miss_expired(state[digest], now, negative_ttl):
+            done[digest] = state[digest]
+            result.unchanged += 1
+            continue
+        if _DOI_FIELD.search(block):
+            # Existing DOIs are left alone
+            done[digest] = {'key': head.group(3), 'status': 'present'}
+            continue
+        entries = list(_parse_blocks(strings, [block]))
+        if entries:
+            pending.append((index, entries[-1]))
+
+    resolutions = finder.resolve_entries([entry for _, entry in pending], use_metadata, max_workers)
+    for (index, entry), resolution in zip(pending, resolutions):
+        result.resolutions.append(resolution)
+        if resolution.error:
+            continue
+        if resolution.doi:
+            updated = insert_doi(blocks[index], resolution.doi)
+            if updated is None:
+                continue
+            blocks[index] = updated
+            result.inserted += 1
+        record = {'key': entry.key, 'status': resolution.status, 'doi': resolution.doi}
+        if resolution.status == 'miss':
+            record['checked'] = now
+        done[entry_hash(blocks[index])] = record
+
+    if result.inserted:
+        _replace_file(path, ''.join(blocks))
+    if done != state:
+        _replace_file(state_path, json.dumps({'version': STATE_VERSION, 'entries': done}, indent=1) + "\n")
+    return result
+
+
+def _entry_end(block: str) -> Optional[int]:
+    """Return the index of the delimiter closing the entry at the start of a block."""
+    head = _ENTRY_HEAD.match(block)
+    if head is None:
+        return None
+    closing = '}' if head.group(2) == '{' else ')'
+    # Scanning starts after the opening delimiter
+    depth = 1 if closing == '}' else 0
+    for index in range(head.end(2), len(block)):
+        char = block[index]
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if closing == '}' and depth == 0:
+                return index
+        elif char == ')' and closing == ')' and depth == 0:
+            return index
+    return None
+
+
+def _miss_expired(record: dict, now: float, negative_ttl: Optional[float]) -> bool:
+    """Whether a recorded entry is a miss old enough to be looked up again."""
+    if record.get('status') != 'miss' or negative_ttl is None:
+        return False
+    # Misses recorded without a time are treated as expired
+    return now - record.get('checked', 0) >= negative_ttl
+
+
+def _load_state(path: str) -> Dict[str, dict]:
+    """Read the entries recorded by earlier runs, an empty state if there is none."""
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+    except FileNotFoundError:
+        return {}
+    except ValueError:
+        # A damaged state only costs a full run
+        return {}
+    if not isinstance(state, dict) or state.get('version') != STATE_VERSION:
+        return {}
+    return state.get('entries') or {}
+
+
+def _replace_file(path: str, text: str) -> None:
+    """Write a file atomically, so an interrupted run never leaves it half written."""
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".find-doi-", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8', newline='') as file:
+            file.write(text)
+        if os.path.exists(path):
+            os.chmod(temporary, os.stat(path).st_mode & 0o7777)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
@@ -23,4 +23,10 @@ setup(
         "requests",
         "bibtexparser>=2.0.0b8",
     ],
+    extras_require={
+        "async": ["aiohttp"],
+        "fast": ["orjson"],
+        "parquet": ["pyarrow"],
+        "redis": ["redis>=5"],
+    },
 ) 
\ No newline at end of file
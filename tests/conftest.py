@@ -0,0 +1,27 @@
+import pytest
+
+from find_doi.mockserver import MockCrossRefServer
+
+
+def make_work(doi, title, family="Doe"):
+    """A minimal CrossRef work record."""
+    return {
+        "DOI": doi,
+        "title": [title],
+        "author": [{"given": "Jane", "family": family}],
+        "published-print": {"date-parts": [[2020]]},
+        "type": "journal-article",
+    }
+
+
+def bibtex(*entries):
+    """BibTeX text of (key, title, author) entries."""
+    return "".join("@article{%s,\n  title = {%s},\n  author = {%s}\n}\n\n" % entry for entry in entries)
+
+
+@pytest.fixture
+def crossref(request):
+    """A mock CrossRef API serving the works of the test's ``works`` marker."""
+    marker = request.node.get_closest_marker("works")
+    with MockCrossRefServer(marker.args[0] if marker else []) as server:
+        yield server
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from find_doi import DOIFinder
+
+from .conftest import bibtex, make_work
+
+GRAPHS = "Graph neural networks for traffic forecasting"
+ENERGY = "Renewable energy and sustainable development"
+UNKNOWN = "No such work anywhere"
+WORKS = [make_work("10.1/graphs", GRAPHS), make_work("10.1/energy", ENERGY, family="Roe")]
+TEXT = bibtex(("a", ENERGY, "Roe, Richard"), ("b", UNKNOWN, "Doe, Jane")) + \
+    "@article{c,\n  title = {Ignored},\n  doi = {10.1/graphs}\n}\n"
+
+
+def lookups(finder):
+    """Every lookup method, called the same way on either finder."""
+    return [
+        ("find_by_title", finder.find_by_title(GRAPHS)),
+        ("find_by_title_and_author", finder.find_by_title_and_author(ENERGY, "Roe")),
+        ("find_by_metadata", finder.find_by_metadata(UNKNOWN, author="Doe")),
+        ("find_article_info", finder.find_article_info(ENERGY)),
+        ("find_from_bibtex", finder.find_from_bibtex(TEXT)),
+        ("find_article_info_from_bibtex", finder.find_article_info_from_bibtex(TEXT)),
+        ("resolve", finder.resolve(doi="10.1/GRAPHS")),
+        ("resolve_bibtex", finder.resolve_bibtex(TEXT)),
+    ]
+
+
+@pytest.mark.works(WORKS)
+def test_async_finder_answers_like_the_sync_one(crossref):
+    pytest.importorskip("aiohttp")
+    from find_doi import AsyncDOIFinder
+
+    async def run():
+        async with AsyncDOIFinder(base_url=crossref.url) as finder:
+            return [(name, await result) for name, result in lookups(finder)]
+
+    with DOIFinder(base_url=crossref.url) as finder:
+        expected = lookups(finder)
+    assert asyncio.run(run()) == expected
+
+
+@pytest.mark.works(WORKS)
+def test_stream_yields_every_query_with_its_index(crossref):
+    pytest.importorskip("aiohttp")
+    from find_doi import AsyncDOIFinder
+
+    queries = [GRAPHS, (ENERGY, "Roe"), UNKNOWN] * 4
+
+    async def run():
+        async with AsyncDOIFinder(base_url=crossref.url, max_queries=1) as finder:
+            return [result async for result in finder.stream_find_by_metadata(queries, concurrency=2)]
+
+    results = asyncio.run(run())
+    assert sorted(results) == [(index, ["10.1/graphs", "10.1/energy", None][index % 3]) for index in range(12)]
@@ -0,0 +1,132 @@
+import json
+from contextlib import closing
+
+import pytest
+
+from find_doi import DOIFinder, LocalIndex, LookupCache, MemoryCache
+from find_doi.crossref import cache_key
+
+from .conftest import make_work
+
+TITLE = "Graph neural networks for traffic forecasting"
+UNKNOWN = "A thesis crossref has never heard of"
+WORKS = [make_work("10.1/graphs", TITLE)]
+
+
+class BrokenCache(MemoryCache):
+    """A cache whose writes fail, like a full disk or a lost connection."""
+
+    def set(self, key, value):
+        raise OSError("disk full")
+
+    def set_miss(self, key):
+        raise OSError("disk full")
+
+
+@pytest.mark.works(WORKS)
+def test_hits_and_misses_are_not_requested_again(crossref):
+    with DOIFinder(base_url=crossref.url, cache=":memory:") as finder:
+        assert finder.resolve(title=TITLE).source == "search"
+        # A title resolved once answers every kind of lookup from the cache
+        assert finder.resolve(title=TITLE).source == "cache"
+        assert finder.find_by_metadata(TITLE) == "10.1/graphs"
+        cached = finder.find_article_info(TITLE)
+        assert (cached.doi, cached.authors) == ("10.1/graphs", ["Jane Doe"])
+        searches = crossref.requests
+        assert finder.resolve(title=UNKNOWN).status == "miss"
+        missed = crossref.requests
+        assert finder.resolve(title=UNKNOWN).status == "miss"
+        assert finder.find_by_metadata(UNKNOWN) is None
+        assert crossref.requests == missed > searches == 1
+
+
+def test_finders_close_the_caches_they_own():
+    class ClosingCache(MemoryCache):
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    shared, owned = ClosingCache(), ClosingCache()
+    DOIFinder(cache=shared).close()
+    DOIFinder(cache=owned, owns_cache=True).close()
+    assert (shared.closed, owned.closed) == (False, True)
+
+
+@pytest.mark.works(WORKS)
+def test_failed_cache_writes_keep_the_result(crossref):
+    with DOIFinder(base_url=crossref.url, cache=BrokenCache()) as finder:
+        resolution = finder.resolve(title=TITLE)
+        assert (resolution.status, resolution.doi) == ("found", "10.1/graphs")
+        assert finder.find_by_metadata(TITLE) == "10.1/graphs"
+        assert finder.resolve(doi="10.1/graphs").status == "found"
+        assert finder.resolve(title=UNKNOWN).status == "miss"
+        assert finder.metrics.value("cache_write_errors_total") > 0
+
+
+@pytest.mark.works(WORKS)
+def test_every_lookup_consults_the_index_before_the_cache(crossref, tmp_path):
+    dump = tmp_path / "dump.jsonl"
+    dump.write_text(json.dumps(make_work("10.1/indexed", TITLE)) + "\n")
+    LocalIndex.build([str(dump)], str(tmp_path / "works.idx"))
+    cache = MemoryCache()
+    stale = {"doi": "10.1/stale", "title": TITLE, "authors": [], "year": None, "journal": None,
+             "publisher": None, "url": None, "type": None, "abstract": None}
+    title = TITLE.lower()
+    cache.set(cache_key("info", title, None), stale)
+    cache.set(cache_key("doi", title, None), "10.1/stale")
+    with DOIFinder(base_url=crossref.url, cache=cache, index=str(tmp_path / "works.idx")) as finder:
+        assert finder.resolve(title=TITLE).doi == "10.1/indexed"
+        assert finder.find_by_metadata(TITLE) == "10.1/indexed"
+        assert finder.find_article_info(title).doi == "10.1/indexed"
+    assert crossref.requests == 0
+
+
+def test_sqlite_cache_evicts_least_recently_used_entries_in_batches(tmp_path):
+    statements = []
+    with closing(LookupCache(str(tmp_path / "lookups.sqlite"), max_entries=20)) as cache:
+        cache._conn.set_trace_callback(statements.append)
+        for number in range(20):
+            cache.set(f"key{number}", number)
+        cache.get("key0")
+        assert not any(statement.startswith(("DELETE", "UPDATE")) for statement in statements)
+        # Going over max_entries evicts a tenth of it, keeping the entry just read
+        cache.set("key20", 20)
+        assert len(cache) == 18
+        assert cache.get("key0") == 0
+        assert cache.get("key1") is None and cache.get("key2") is None
+        assert sum(statement.startswith("DELETE") for statement in statements) == 1
+        for number in range(20):
+            cache.set_miss(f"miss{number}")
+        assert cache._counts["misses"] <= 20
+
+
+def test_sqlite_cache_writes_access_times_in_batches(tmp_path):
+    path = str(tmp_path / "lookups.sqlite")
+    with closing(LookupCache(path)) as cache:
+        cache.touch_batch = 3
+        for number in range(5):
+            cache.set(f"key{number}", number)
+        statements = []
+        cache._conn.set_trace_callback(statements.append)
+        for number in range(5):
+            assert cache.get(f"key{number}") == number
+        assert sum(statement.startswith("UPDATE") for statement in statements) == 3
+        assert sum(statement == "BEGIN" for statement in statements) == 1
+    # Closing the cache writes the access times still buffered
+    with closing(LookupCache(path)) as cache:
+        rows = cache._conn.execute("SELECT accessed > created FROM lookups ORDER BY key").fetchall()
+        assert rows == [(1,)] * 5
+
+
+def test_cache_backends_must_implement_the_interface():
+    from find_doi.cache import CacheBackend
+
+    class GetOnly(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        CacheBackend()
+    with pytest.raises(TypeError, match="set_miss"):
+        GetOnly()
@@ -0,0 +1,49 @@
+import pytest
+
+from find_doi import DOIFinder
+from find_doi.checkpoint import Checkpoint
+
+from .conftest import bibtex, make_work
+
+GRAPHS = "Graph neural networks for traffic forecasting"
+ENERGY = "Renewable energy and sustainable development"
+WORKS = [make_work("10.1/graphs", GRAPHS), make_work("10.1/energy", ENERGY)]
+TEXT = bibtex(("a", GRAPHS, "Doe, Jane"), ("b", ENERGY, "Doe, Jane"), ("c", "No such work anywhere", "Doe, Jane"))
+
+
+def resolve(finder, path, resume=True):
+    with Checkpoint(str(path), resume=resume) as checkpoint:
+        return list(finder.iter_resolve_bibtex(TEXT, checkpoint=checkpoint))
+
+
+@pytest.mark.works(WORKS)
+def test_resume_skips_journaled_entries(crossref, tmp_path):
+    journal = tmp_path / "refs.journal"
+    with DOIFinder(base_url=crossref.url, max_queries=1) as finder:
+        first = resolve(finder, journal)
+        sent = crossref.requests
+        resumed = resolve(finder, journal)
+        assert crossref.requests == sent
+        restarted = resolve(finder, journal, resume=False)
+    assert [(r.key, r.doi) for r in resumed] == [(r.key, r.doi) for r in first] == \
+        [("a", "10.1/graphs"), ("b", "10.1/energy"), ("c", None)]
+    assert crossref.requests == 2 * sent
+    assert len(restarted) == 3
+
+
+@pytest.mark.works(WORKS)
+def test_resume_retries_failed_entries_and_truncated_lines(crossref, tmp_path):
+    journal = tmp_path / "refs.journal"
+    with DOIFinder(base_url=crossref.url, max_queries=1) as finder:
+        resolve(finder, journal)
+        lines = journal.read_text().splitlines(keepends=True)
+        # The second entry failed, and the run was killed while writing the third
+        failed = lines[1].replace('"error": null', '"error": "503"')
+        journal.write_text(lines[0] + failed + lines[2][:10])
+        sent = crossref.requests
+        resumed = resolve(finder, journal)
+        assert crossref.requests == sent + 2
+        # The records appended after the truncated line are read back
+        resolve(finder, journal)
+        assert crossref.requests == sent + 2
+    assert [r.doi for r in resumed] == ["10.1/graphs", "10.1/energy", None]
@@ -0,0 +1,85 @@
+import json
+import sys
+
+import pytest
+
+from find_doi import cli
+from find_doi.mockserver import MockCrossRefServer
+
+from .conftest import bibtex, make_work
+
+GRAPHS = "Graph neural networks for traffic forecasting"
+WORKS = [make_work("10.1/graphs", GRAPHS)]
+ENTRIES = [("a", GRAPHS, "Doe, Jane"), ("b", "No such work anywhere", "Doe, Jane")]
+
+
+def run(monkeypatch, capsys, *argv):
+    """Run the command line with argv, returning its exit status and the lines it printed."""
+    monkeypatch.setattr(sys, "argv", ["find-doi", *argv])
+    try:
+        cli.main()
+        status = 0
+    except SystemExit as e:
+        status = e.code
+    return status, capsys.readouterr().out.splitlines()
+
+
+@pytest.fixture
+def bib(tmp_path):
+    path = tmp_path / "refs.bib"
+    path.write_text(bibtex(*ENTRIES))
+    return str(path)
+
+
+@pytest.mark.works(WORKS)
+def test_jsonl_reports_status_per_entry(crossref, bib, monkeypatch, capsys):
+    status, lines = run(monkeypatch, capsys, "bibtex", bib, "--jsonl", "--api-url", crossref.url)
+    records = [json.loads(line) for line in lines]
+    assert status == 0
+    assert [(record["key"], record["status"], record["error"]) for record in records] == \
+        [("a", "found", None), ("b", "miss", None)]
+
+
+def test_jsonl_failures_are_errors_not_misses(bib, monkeypatch, capsys):
+    with MockCrossRefServer(WORKS, error_rate=1.0) as server:
+        status, lines = run(monkeypatch, capsys, "bibtex", bib, "--jsonl", "--api-url", server.url,
+                            "--max-queries", "1", "--retries", "0")
+    records = [json.loads(line) for line in lines]
+    assert status == 1
+    assert [record["status"] for record in records] == ["error", "error"]
+    assert all(record["error"] for record in records)
+
+
+def test_failures_exit_with_an_error_in_every_mode(bib, tmp_path, monkeypatch, capsys):
+    with MockCrossRefServer(WORKS, error_rate=1.0) as server:
+        options = ("--api-url", server.url, "--max-queries", "1", "--retries", "0")
+        assert run(monkeypatch, capsys, "bibtex", bib, "--csv", str(tmp_path / "out.csv"), *options)[0] == 1
+        assert run(monkeypatch, capsys, "bibtex", bib, "--checkpoint", str(tmp_path / "journal"), *options)[0] == 1
+        assert run(monkeypatch, capsys, "bibtex", bib, "--json", *options)[0] == 1
+
+
+@pytest.mark.works(WORKS)
+def test_jsonl_takes_the_dois_of_entries_as_they_are(crossref, tmp_path, monkeypatch, capsys):
+    path = tmp_path / "cited.bib"
+    path.write_text("@article{cited,\n  title = {%s},\n  doi = {10.1/graphs}\n}\n" % GRAPHS)
+    status, lines = run(monkeypatch, capsys, "bibtex", str(path), "--jsonl", "--api-url", crossref.url)
+    assert (status, json.loads(lines[0])["doi"]) == (0, "10.1/graphs")
+    assert crossref.requests == 0
+
+
+@pytest.mark.works([make_work("10.1/index", "Index")])
+def test_command_names_alone_are_titles(crossref, monkeypatch, capsys):
+    for title in ("index", "cache", "bibtex"):
+        status, lines = run(monkeypatch, capsys, title, "--api-url", crossref.url)
+        assert status == 0
+        assert lines[0].startswith("DOI: " if title == "index" else "No DOI")
+
+
+def test_cache_commands_default_to_the_persistent_cache(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    records = tmp_path / "records.jsonl"
+    records.write_text('{"key": "work:10.1/a", "value": {"doi": "10.1/a"}}\n')
+    assert run(monkeypatch, capsys, "cache", "import", str(records))[0] == 0
+    assert (tmp_path / ".cache" / "find-doi.sqlite").exists()
+    assert run(monkeypatch, capsys, "cache", "export", str(tmp_path / "out.jsonl"))[0] == 0
+    assert "10.1/a" in (tmp_path / "out.jsonl").read_text()
@@ -0,0 +1,72 @@
+import json
+import os
+import socket
+import urllib.request
+
+import pytest
+
+from find_doi import DOIFinder
+from find_doi.daemon import LookupServer
+
+from .conftest import make_work
+
+WORKS = [make_work("10.1/graphs", "Graph neural networks for traffic forecasting"),
+         make_work("10.1/energy", "Renewable energy and sustainable development")]
+
+
+@pytest.fixture
+def finder(crossref):
+    with DOIFinder(base_url=crossref.url, cache=":memory:") as finder:
+        yield finder
+
+
+def post(url, payload):
+    request = urllib.request.Request(url + "/lookup", data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+@pytest.mark.works(WORKS)
+def test_http_lookups(finder):
+    with LookupServer(finder, port=0) as server:
+        result = post(server.url, {"title": "Graph neural networks for traffic forecasting", "id": 7})
+        assert (result["doi"], result["status"], result["id"]) == ("10.1/graphs", "found", 7)
+        batch = post(server.url, [{"op": "doi", "title": "Renewable energy and sustainable development"},
+                                  {"op": "doi", "title": "Unknown work"},
+                                  {"op": "nope"}])
+        assert [result.get("doi") for result in batch] == ["10.1/energy", None, None]
+        assert "error" in batch[2]
+        with urllib.request.urlopen(server.url + "/health") as response:
+            assert json.loads(response.read())["status"] == "ok"
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+@pytest.mark.works(WORKS)
+def test_unix_socket_lookups(finder, tmp_path):
+    path = str(tmp_path / "find-doi.sock")
+    with LookupServer(finder, socket_path=path):
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(path)
+            client.sendall(b'{"op": "doi", "title": "Graph neural networks for traffic forecasting"}\n')
+            assert json.loads(client.makefile().readline()) == {"doi": "10.1/graphs"}
+    assert not os.path.exists(path)
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_stale_socket_is_replaced(tmp_path):
+    path = str(tmp_path / "find-doi.sock")
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(path)
+    stale.close()
+    with DOIFinder() as finder, LookupServer(finder, socket_path=path) as server:
+        assert server.url == f"unix:{path}"
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_socket_path_never_replaces_a_file(tmp_path):
+    path = tmp_path / "refs.bib"
+    path.write_text("@article{a, title = {Keep me}}\n")
+    with DOIFinder() as finder, pytest.raises(FileExistsError):
+        LookupServer(finder, socket_path=str(path))
+    assert path.read_text() == "@article{a, title = {Keep me}}\n"
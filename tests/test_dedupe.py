@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+
+from find_doi import DOIFinder
+from find_doi.dedupe import DEFAULT_THRESHOLD, Cluster, ClusterLookups, cluster_titles, normalize_title
+
+from .conftest import bibtex, make_work
+
+# Titles of different works that near-duplicate detection must keep apart
+DISTINCT_PAIRS = [
+    ("Distributed model predictive control of large-scale linear systems",
+     "Distributed model predictive control of large-scale nonlinear systems"),
+    ("Stability of networked control systems with packet loss, Part I",
+     "Stability of networked control systems with packet loss, Part II"),
+    ("Effects of the presence of vegetation on urban heat islands",
+     "Effects of the absence of vegetation on urban heat islands"),
+    ("A unified framework for convex optimization over networks",
+     "A unified framework for nonconvex optimization over networks"),
+]
+
+PAIR_WORKS = [make_work(f"10.1/pair{number}.{side}", pair[side])
+              for number, pair in enumerate(DISTINCT_PAIRS) for side in (0, 1)]
+PAIR_ENTRIES = [(f"k{number}{side}", pair[side], "Doe, Jane")
+                for number, pair in enumerate(DISTINCT_PAIRS) for side in (0, 1)]
+PAIR_DOIS = [work["DOI"] for work in PAIR_WORKS]
+
+
+def clustered(titles, authors=None, threshold=DEFAULT_THRESHOLD):
+    return sorted(sorted(cluster.members) for cluster in cluster_titles(titles, authors, threshold=threshold))
+
+
+def test_normalize_title_strips_latex():
+    assert normalize_title(r"The {S}chr{\"o}dinger equation in \emph{$k$-space}") == \
+        normalize_title("The Schrödinger Equation in k-Space")
+
+
+def test_normalize_title_keeps_greek_letters():
+    assert normalize_title(r"$\beta$-decay of nuclei") == normalize_title("β-decay of nuclei")
+    assert normalize_title(r"$\beta$-decay of nuclei") != normalize_title(r"$\gamma$-decay of nuclei")
+    assert clustered([r"$\beta$-decay of nuclei", r"$\gamma$-decay of nuclei"], threshold=None) == [[0], [1]]
+
+
+def test_exact_spellings_share_a_cluster_by_default():
+    titles = ["Deep Learning", "{Deep} learning.", r"\textbf{Deep} Learning", "Shallow learning"]
+    assert clustered(titles, threshold=None) == [[0, 1, 2], [3]]
+
+
+@pytest.mark.parametrize("pair", DISTINCT_PAIRS)
+def test_distinct_works_are_not_clustered(pair):
+    assert clustered(list(pair), ["Doe, Jane"] * 2) == [[0], [1]]
+
+
+def test_typos_are_clustered():
+    titles = ["Renewable energy and sustainable development: a crucial review",
+              "Renewable energy and sustainable developmnet: a crucial review"]
+    assert clustered(titles) == [[0, 1]]
+
+
+def test_different_first_authors_are_not_clustered():
+    titles = ["Renewable energy and sustainable development"] * 2
+    assert clustered(titles, ["Doe, Jane", "Roe, Richard"]) == [[0], [1]]
+
+
+def test_subtitles_do_not_chain_different_works():
+    titles = ["Graph neural networks for traffic", "Graph neural networks for traffic: a survey",
+              "Graph neural networks for traffic: a benchmark"]
+    assert clustered(titles) == [[0], [1], [2]]
+    assert clustered(titles[:2]) == [[0, 1]]
+
+
+def test_cluster_lookups_check_other_spellings_against_the_record():
+    titles = ["Linear systems", "Linear systems", "Nonlinear systems"]
+    # A cluster wrongly merging two works, as a near-duplicate candidate might
+    lookups = ClusterLookups([Cluster(groups=[[0, 1], [2]])], titles, title_of=lambda record: record)
+    assert lookups.pending() == [0]
+    lookups.record(["Linear systems"])
+    assert lookups.pending() == [2]
+    lookups.record(["Nonlinear systems"])
+    assert lookups.pending() == []
+    assert lookups.results == ["Linear systems", "Linear systems", "Nonlinear systems"]
+    assert lookups.lookups == 2
+
+
+def test_cluster_lookups_try_the_next_spelling_after_a_miss():
+    titles = [r"Schr{\"o}dinger cats", "Schrödinger cats"]
+    lookups = ClusterLookups([Cluster(groups=[[0], [1]])], titles, title_of=lambda record: record)
+    lookups.record([None])
+    assert lookups.pending() == [1]
+    lookups.record(["Schrödinger cats"])
+    # The record found for the second spelling matches the first one too
+    assert lookups.results == ["Schrödinger cats", "Schrödinger cats"]
+
+
+@pytest.mark.works(PAIR_WORKS)
+@pytest.mark.parametrize("threshold", [None, DEFAULT_THRESHOLD])
+def test_finder_gives_each_distinct_work_its_own_doi(crossref, threshold):
+    with DOIFinder(base_url=crossref.url, dedupe_threshold=threshold) as finder:
+        assert finder.find_from_bibtex(bibtex(*PAIR_ENTRIES)) == PAIR_DOIS
+        assert [resolution.doi for resolution in finder.resolve_bibtex(bibtex(*PAIR_ENTRIES))] == PAIR_DOIS
+        assert [info.doi for info in finder.find_article_info_from_bibtex(bibtex(*PAIR_ENTRIES))] == PAIR_DOIS
+
+
+@pytest.mark.works([make_work("10.1/review", "Renewable energy and sustainable development: a crucial review")])
+def test_finder_looks_up_duplicates_once(crossref):
+    entries = [("a", "Renewable energy and sustainable development: a crucial review", "Doe, Jane"),
+               ("b", "{Renewable} Energy and Sustainable Development -- A Crucial Review.", "Jane Doe"),
+               ("c", "Renewable energy and sustainable developmnet: a crucial review", "Doe, J.")]
+    with DOIFinder(base_url=crossref.url, dedupe_threshold=DEFAULT_THRESHOLD) as finder:
+        resolutions = finder.resolve_bibtex(bibtex(*entries))
+    assert [resolution.key for resolution in resolutions] == ["a", "b", "c"]
+    assert [resolution.doi for resolution in resolutions][:2] == ["10.1/review"] * 2
+    # The typo'd spelling is clustered, but the record does not match its title, so it is looked up itself
+    assert resolutions[2].doi is None
+    assert crossref.requests == 1 + 3
+
+
+@pytest.mark.works(PAIR_WORKS)
+def test_async_finder_gives_each_distinct_work_its_own_doi(crossref):
+    pytest.importorskip("aiohttp")
+    from find_doi import AsyncDOIFinder
+
+    async def resolve():
+        async with AsyncDOIFinder(base_url=crossref.url, dedupe_threshold=DEFAULT_THRESHOLD) as finder:
+            return (await finder.find_from_bibtex(bibtex(*PAIR_ENTRIES)),
+                    await finder.resolve_bibtex(bibtex(*PAIR_ENTRIES)),
+                    await finder.find_article_info_from_bibtex(bibtex(*PAIR_ENTRIES)))
+
+    dois, resolutions, article_infos = asyncio.run(resolve())
+    assert dois == PAIR_DOIS
+    assert [resolution.doi for resolution in resolutions] == PAIR_DOIS
+    assert [info.doi for info in article_infos] == PAIR_DOIS
+
+
+DECAY = "-decay of neutron-rich nuclei"
+SCHRODINGER = "The Schrödinger equation on metric graphs"
+SYMBOL_WORKS = [make_work("10.1/beta", "Beta" + DECAY), make_work("10.1/gamma", "Gamma" + DECAY),
+                make_work("10.1/schr", SCHRODINGER)]
+SYMBOL_ENTRIES = [("beta", r"$\beta$" + DECAY, "Doe, Jane"), ("gamma", r"$\gamma$" + DECAY, "Doe, Jane"),
+                  ("latex1", r"The {Schr\"o}dinger equation on metric graphs", "Doe, Jane"),
+                  ("latex2", r"The {Schr\"o}dinger equation on metric graphs", "Doe, Jane"),
+                  ("unicode", SCHRODINGER, "Doe, Jane")]
+
+
+@pytest.mark.works(SYMBOL_WORKS)
+@pytest.mark.parametrize("threshold", [None, DEFAULT_THRESHOLD])
+def test_symbols_and_unknown_spellings_do_not_lose_dois(crossref, threshold):
+    expected = ["10.1/beta", "10.1/gamma", "10.1/schr", "10.1/schr", "10.1/schr"]
+    with DOIFinder(base_url=crossref.url, dedupe_threshold=threshold, max_queries=1) as finder:
+        assert finder.find_from_bibtex(bibtex(*SYMBOL_ENTRIES)) == expected
+        assert [resolution.doi for resolution in finder.resolve_bibtex(bibtex(*SYMBOL_ENTRIES))] == expected
+        # The LaTeX spelling is looked up once, then the unicode one finds the record for both
+        assert finder.metrics.total("duplicate_entries_total") == 2
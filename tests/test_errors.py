@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from find_doi import CircuitBreaker, CircuitOpenError, DOIFinder, RateLimitError, TransientError
+from find_doi.daemon import LookupServer
+from find_doi.mockserver import MockCrossRefServer
+
+from .conftest import bibtex, make_work
+
+TITLE = "Graph neural networks for traffic forecasting"
+WORKS = [make_work("10.1/graphs", TITLE)]
+
+
+@pytest.fixture
+def failing():
+    """A mock CrossRef API answering every request with 503."""
+    with MockCrossRefServer(WORKS, error_rate=1.0) as server:
+        yield server
+
+
+def test_failures_are_not_reported_as_misses(failing):
+    with DOIFinder(base_url=failing.url, transient_retries=0) as finder:
+        with pytest.raises(TransientError):
+            finder.find_by_metadata(TITLE)
+        with pytest.raises(TransientError):
+            finder.find_article_info(TITLE)
+        with pytest.raises(TransientError):
+            finder.find_article_info_by_dois(["10.1/graphs"])
+        with pytest.raises(TransientError):
+            finder.find_from_bibtex(bibtex(("a", TITLE, "Doe, Jane")))
+        # resolve reports failures in the result instead
+        assert finder.resolve(title=TITLE).status == "error"
+
+
+def test_failed_requests_are_retried_by_the_finder():
+    # With this seed the first request fails and the second one is answered
+    with MockCrossRefServer(WORKS, error_rate=0.5, seed=1) as server, \
+            DOIFinder(base_url=server.url, max_queries=1) as finder:
+        assert finder.find_by_metadata(TITLE) == "10.1/graphs"
+    assert server.requests == 2
+    assert finder.metrics.total("http_retries_total") == 1
+    assert finder.metrics.value("http_requests_total", endpoint="search", status=503) == 1
+
+
+def test_every_retry_counts_for_the_circuit_breaker(failing):
+    breaker = CircuitBreaker(failure_threshold=2)
+    with DOIFinder(base_url=failing.url, max_queries=1, circuit_breaker=breaker) as finder:
+        with pytest.raises(CircuitOpenError):
+            finder.find_by_metadata(TITLE)
+    # The third attempt was refused without a request
+    assert failing.requests == 2
+    assert breaker.state == "open"
+
+
+def test_retries_give_up_after_transient_retries(failing):
+    with DOIFinder(base_url=failing.url, max_queries=1, transient_retries=1) as finder:
+        with pytest.raises(TransientError):
+            finder.find_by_metadata(TITLE)
+    assert failing.requests == 2
+
+
+def test_throttling_raises_rate_limit_error():
+    with MockCrossRefServer(WORKS, throttle_rate=1.0, retry_after=0) as server, \
+            DOIFinder(base_url=server.url, max_retries=0) as finder:
+        with pytest.raises(RateLimitError):
+            finder.find_by_metadata(TITLE)
+
+
+def test_failures_are_not_cached_as_misses(failing):
+    with DOIFinder(base_url=failing.url, transient_retries=0, cache=":memory:") as finder:
+        with pytest.raises(TransientError):
+            finder.find_by_metadata(TITLE)
+        failing.error_rate = 0.0
+        assert finder.find_by_metadata(TITLE) == "10.1/graphs"
+
+
+def test_daemon_reports_failed_lookups_per_request(failing):
+    with DOIFinder(base_url=failing.url, transient_retries=0) as finder, LookupServer(finder, port=0) as server:
+        results = server.dispatch([{"op": "doi", "title": TITLE, "id": 1}, {"op": "nope", "id": 2}])
+    assert [result["id"] for result in results] == [1, 2]
+    assert all("error" in result for result in results)
+
+
+def test_async_failures_are_not_reported_as_misses(failing):
+    pytest.importorskip("aiohttp")
+    from find_doi import AsyncDOIFinder
+
+    async def lookup(method):
+        async with AsyncDOIFinder(base_url=failing.url, transient_retries=0) as finder:
+            return await getattr(finder, method)(TITLE)
+
+    for method in ("find_by_metadata", "find_article_info"):
+        with pytest.raises(TransientError):
+            asyncio.run(lookup(method))
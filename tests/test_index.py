@@ -0,0 +1,55 @@
+import gzip
+import json
+
+import pytest
+
+from find_doi import index as index_module
+from find_doi.index import LocalIndex
+
+from .conftest import make_work
+
+GRAPHS = "Graph neural networks for traffic forecasting"
+ENERGY = "Renewable energy and sustainable development"
+WORKS = [make_work("10.1/graphs", GRAPHS), make_work("10.1/energy", ENERGY, family="Smith"),
+         make_work("10.1/energy-2", ENERGY, family="Jones")] + \
+    [make_work(f"10.1/filler-{number}", f"Filler work number {number}") for number in range(20)]
+
+
+@pytest.fixture
+def dumps(tmp_path):
+    lines = tmp_path / "works.jsonl.gz"
+    with gzip.open(lines, "wt") as file:
+        file.writelines(json.dumps(work) + "\n" for work in WORKS[:10])
+    snapshot = tmp_path / "works.json"
+    snapshot.write_text(json.dumps({"message": {"items": WORKS[10:] + [{"title": ["No DOI"]}]}}))
+    return [str(lines), str(snapshot)]
+
+
+def test_works_are_found_by_title_and_doi(dumps, tmp_path):
+    path = str(tmp_path / "works.idx")
+    assert LocalIndex.build(dumps, path) == len(WORKS)
+    with LocalIndex(path) as index:
+        assert len(index) == len(WORKS)
+        assert index.lookup_title("Graph Neural Networks for Traffic Forecasting.").doi == "10.1/graphs"
+        assert index.lookup_doi(" 10.1/FILLER-17 ").title == "Filler work number 17"
+        assert index.lookup_title(ENERGY, author="Jones").doi == "10.1/energy-2"
+        assert index.lookup_title("No such work anywhere") is None
+        assert index.lookup_doi("10.1/missing") is None
+
+
+def test_sorted_runs_merge_into_the_same_table(dumps, tmp_path, monkeypatch):
+    LocalIndex.build(dumps, str(tmp_path / "one-run.idx"))
+    monkeypatch.setattr(index_module, "_RUN_SLOTS", 3)
+    monkeypatch.setattr(index_module, "_MERGE_SLOTS", 2)
+    LocalIndex.build(dumps, str(tmp_path / "runs.idx"))
+    assert (tmp_path / "runs.idx").read_bytes() == (tmp_path / "one-run.idx").read_bytes()
+    with LocalIndex(str(tmp_path / "runs.idx")) as index:
+        assert all(index.lookup_doi(work["DOI"]).doi == work["DOI"] for work in WORKS)
+
+
+def test_an_empty_dump_builds_an_empty_index(tmp_path):
+    dump = tmp_path / "empty.jsonl"
+    dump.write_text("")
+    assert LocalIndex.build([str(dump)], str(tmp_path / "empty.idx")) == 0
+    with LocalIndex(str(tmp_path / "empty.idx")) as index:
+        assert index.lookup_title(GRAPHS) is None
@@ -0,0 +1,38 @@
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from find_doi import DOIFinder
+from find_doi.crossref import ARTICLE_INFO_FIELDS, DOI_FIELDS, decode_json
+from find_doi.session import create_session
+
+from .conftest import make_work
+
+GRAPHS = "Graph neural networks for traffic forecasting"
+ENERGY = "Renewable energy and sustainable development"
+WORKS = [make_work("10.1/graphs", GRAPHS), make_work("10.1/energy", ENERGY)]
+
+
+def lookup(crossref, lean):
+    """Run each kind of lookup, returning the results and the fields every request selected."""
+    selected = []
+    with create_session() as session:
+        session.hooks["response"].append(
+            lambda response, *args, **kwargs: selected.append(parse_qs(urlsplit(response.url).query).get("select")))
+        with DOIFinder(base_url=crossref.url, session=session, lean=lean, max_queries=1) as finder:
+            results = (finder.find_by_metadata(GRAPHS), finder.find_article_info(ENERGY),
+                       finder.find_article_info_by_dois(["10.1/graphs", "10.1/energy"]))
+    return results, selected
+
+
+@pytest.mark.works(WORKS)
+def test_lean_mode_selects_the_fields_each_lookup_reads(crossref):
+    results, selected = lookup(crossref, lean=True)
+    assert selected == [[",".join(DOI_FIELDS)], [",".join(ARTICLE_INFO_FIELDS)], [",".join(ARTICLE_INFO_FIELDS)]]
+    assert results == lookup(crossref, lean=False)[0]
+    assert lookup(crossref, lean=False)[1] == [None] * 3
+
+
+def test_decode_json_takes_bytes_and_text():
+    assert decode_json(b'{"message": {"DOI": "10.1/a"}}') == decode_json('{"message": {"DOI": "10.1/a"}}') == \
+        {"message": {"DOI": "10.1/a"}}
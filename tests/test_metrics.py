@@ -0,0 +1,65 @@
+import json
+import sys
+
+import pytest
+
+from find_doi import DOIFinder, cli
+from find_doi.metrics import Metrics
+
+from .conftest import make_work
+
+GRAPHS = "Graph neural networks for traffic forecasting"
+WORKS = [make_work("10.1/graphs", GRAPHS)]
+
+
+def test_prometheus_export():
+    metrics = Metrics()
+    metrics.count("http_requests_total", endpoint="search", status=200)
+    metrics.count("http_requests_total", 2, endpoint="search", status=503)
+    metrics.gauge("singleflight_calls", lambda: 3)
+    metrics.observe("http_request_seconds", 0.003, endpoint='se"arch')
+    metrics.observe("http_request_seconds", 0.2, endpoint='se"arch')
+    lines = metrics.to_prometheus().splitlines()
+    assert lines.count("# TYPE find_doi_http_requests_total counter") == 1
+    assert 'find_doi_http_requests_total{endpoint="search",status="503"} 2' in lines
+    assert "find_doi_singleflight_calls 3" in lines
+    # Buckets are cumulative and labels escaped
+    assert 'find_doi_http_request_seconds_bucket{endpoint="se\\"arch",le="0.005"} 1' in lines
+    assert 'find_doi_http_request_seconds_bucket{endpoint="se\\"arch",le="+Inf"} 2' in lines
+    assert 'find_doi_http_request_seconds_count{endpoint="se\\"arch"} 2' in lines
+
+
+def test_snapshots_merge_and_reset():
+    worker = Metrics()
+    worker.count("lookups_total", kind="resolve", result="found")
+    worker.observe("decode_seconds", 0.01)
+    merged = Metrics()
+    merged.gauge("singleflight_calls", lambda: 1)
+    merged.merge(worker.snapshot())
+    merged.merge(json.loads(worker.to_json()))
+    assert merged.value("lookups_total", kind="resolve", result="found") == 2
+    assert merged.snapshot()["timings"][0]["count"] == 2
+    merged.reset()
+    assert merged.total("lookups_total") == 0
+    assert merged.value("singleflight_calls") == 1
+
+
+@pytest.mark.works(WORKS)
+def test_finder_records_requests_and_outcomes(crossref):
+    with DOIFinder(base_url=crossref.url) as finder:
+        finder.resolve(title=GRAPHS)
+        report = finder.metrics.report()
+    assert finder.metrics.value("http_requests_total", endpoint="search", status=200) == 1
+    assert finder.metrics.value("lookups_total", kind="resolve", result="found") == 1
+    assert "HTTP requests: 1 (200: 1)" in report
+    assert "Lookups: resolve found: 1" in report
+
+
+@pytest.mark.works(WORKS)
+def test_cli_prints_stats_to_stderr(crossref, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["find-doi", GRAPHS, "--api-url", crossref.url, "--stats", "json"])
+    cli.main()
+    captured = capsys.readouterr()
+    assert captured.out.strip() == "DOI: 10.1/graphs"
+    counters = json.loads(captured.err)["counters"]
+    assert {"name": "http_requests_total", "labels": {"endpoint": "search", "status": "200"}, "value": 1} in counters
@@ -0,0 +1,51 @@
+import pytest
+
+from find_doi import DOIFinder, RateLimiter, TransientError, deadline
+from find_doi.mockserver import MockCrossRefServer
+
+from .conftest import make_work
+
+TITLE = "Graph neural networks for traffic forecasting"
+
+
+def test_try_acquire_takes_only_free_tokens():
+    limiter = RateLimiter(limit=2, interval=10)
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+    # Declined attempts take nothing, the next request waits for one token only
+    assert limiter.reserve() == pytest.approx(5, abs=0.1)
+
+
+def test_try_acquire_respects_backoff():
+    limiter = RateLimiter()
+    limiter.backoff("30")
+    assert not limiter.try_acquire()
+
+
+def test_reserve_spaces_requests_at_the_rate():
+    limiter = RateLimiter(limit=1, interval=10)
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(10, abs=0.1)
+
+
+def test_declined_hedges_spend_no_tokens():
+    with MockCrossRefServer([make_work("10.1/graphs", TITLE)], latency=0.3) as server:
+        limiter = RateLimiter(limit=1, interval=60, adaptive=False)
+        with DOIFinder(base_url=server.url, rate_limiter=limiter, hedge=True, max_queries=1) as finder:
+            # Recent responses were fast, so the slow one is due for a hedge
+            for _ in range(20):
+                finder._latency_window("search").add(0.01)
+            assert finder.find_by_metadata(TITLE) == "10.1/graphs"
+    assert server.requests == 1
+    assert finder.metrics.total("hedged_requests_total") == 0
+    # Only the request itself took a token, a spent hedge token would double the wait
+    assert 55 < limiter.reserve() <= 60
+
+
+def test_no_hedge_past_the_deadline():
+    with MockCrossRefServer([make_work("10.1/graphs", TITLE)], latency=0.5) as server, \
+            DOIFinder(base_url=server.url, hedge=True, max_queries=1) as finder:
+        # The default hedge delay is longer than the time left
+        with deadline(0.3), pytest.raises(TransientError):
+            finder.find_by_metadata(TITLE)
+    assert finder.metrics.total("hedged_requests_total") == 0
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from find_doi import DOIFinder
+from find_doi.cache import open_cache
+from find_doi.mockserver import MockRedisServer
+
+from .conftest import make_work
+
+pytest.importorskip("redis")
+
+TITLE = "Graph neural networks for traffic forecasting"
+
+
+@pytest.fixture(params=[None, "s3cret"], ids=["open", "password"])
+def redis_server(request):
+    with MockRedisServer(password=request.param) as server:
+        yield server
+
+
+def test_entries_and_misses_round_trip(redis_server):
+    cache = open_cache(redis_server.url)
+    cache.set("doi:a", "10.1/a")
+    cache.set_miss("miss:b")
+    assert (cache.get("doi:a"), cache.get("doi:b")) == ("10.1/a", None)
+    assert (cache.is_miss("miss:b"), cache.is_miss("miss:a")) == (True, False)
+    assert len(cache) == 1
+    records = list(cache.dump())
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.load(records) == 2
+    assert cache.get("doi:a") == "10.1/a" and cache.is_miss("miss:b")
+    assert cache.errors == 0
+    cache.close()
+
+
+def test_unreachable_server_is_a_miss():
+    with MockRedisServer() as server:
+        url = server.url
+    cache = open_cache(url, retry_interval=60)
+    assert cache.get("doi:a") is None
+    cache.set("doi:a", "10.1/a")
+    # The server is left alone after the first failure
+    assert cache.errors == 2
+
+
+@pytest.mark.works([make_work("10.1/graphs", TITLE)])
+def test_finders_share_the_cache(crossref, redis_server):
+    with DOIFinder(base_url=crossref.url, cache=redis_server.url) as finder:
+        assert finder.find_by_metadata(TITLE) == "10.1/graphs"
+    with DOIFinder(base_url=crossref.url, cache=redis_server.url) as finder:
+        assert finder.find_by_metadata(TITLE) == "10.1/graphs"
+    assert crossref.requests == 1
+
+
+@pytest.mark.works([make_work("10.1/graphs", TITLE)])
+def test_async_finder_uses_the_cache(crossref, redis_server):
+    pytest.importorskip("aiohttp")
+    from find_doi import AsyncDOIFinder
+
+    async def resolve():
+        async with AsyncDOIFinder(base_url=crossref.url, cache=redis_server.url) as finder:
+            return [(await finder.resolve(title=TITLE)).source for _ in range(2)]
+
+    assert asyncio.run(resolve()) == ["search", "cache"]
+    assert crossref.requests == 1
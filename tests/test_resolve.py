@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from find_doi import DOIFinder
+from find_doi.crossref import title_score
+
+from .conftest import bibtex, make_work
+
+GRAPHS = "Graph neural networks for traffic forecasting"
+ENERGY = "Renewable energy and sustainable development"
+WORKS = [make_work("10.1/graphs", GRAPHS), make_work("10.1/energy", ENERGY, family="Roe")]
+
+
+@pytest.mark.works(WORKS)
+def test_resolve_by_title_parses_one_response(crossref):
+    with DOIFinder(base_url=crossref.url) as finder:
+        resolution = finder.resolve(title=GRAPHS, author="Jane Doe")
+    assert (resolution.status, resolution.doi, resolution.source) == ("found", "10.1/graphs", "search")
+    assert resolution.article_info.title == GRAPHS
+    assert resolution.article_info.year == 2020
+    assert resolution.article_info.authors == ["Jane Doe"]
+    assert resolution.requests == crossref.requests == 1
+
+
+@pytest.mark.works(WORKS)
+def test_resolve_by_doi(crossref):
+    with DOIFinder(base_url=crossref.url) as finder:
+        found = finder.resolve(doi="10.1/ENERGY")
+        unknown = finder.resolve(doi="10.1/unknown")
+    assert (found.status, found.doi, found.source) == ("found", "10.1/energy", "doi")
+    # A DOI CrossRef does not know is kept from the input
+    assert (unknown.doi, unknown.source, unknown.article_info) == ("10.1/unknown", "bibtex", None)
+
+
+@pytest.mark.works(WORKS)
+def test_unrelated_results_stop_the_query_plan(crossref):
+    with DOIFinder(base_url=crossref.url, max_queries=3) as finder:
+        resolution = finder.resolve(title="Quantum chromodynamics on the lattice", author="Doe, Jane")
+    assert resolution.status == "miss"
+    assert resolution.requests == crossref.requests == 1
+    assert finder.metrics.value("search_queries_total", step="title", result="miss") == 1
+
+
+@pytest.mark.works(WORKS)
+def test_close_results_follow_the_query_plan(crossref):
+    with DOIFinder(base_url=crossref.url, max_queries=3) as finder:
+        resolution = finder.resolve(title=GRAPHS + " in large cities", author="Doe, Jane")
+        assert resolution.requests == crossref.requests == 3
+        assert [finder.metrics.value("search_queries_total", step=step, result="miss")
+                for step in ("title", "bibliographic", "title_only")] == [1, 1, 1]
+        assert finder.resolve(title=ENERGY + " in large cities").requests == 2
+
+
+def test_title_score():
+    items = [{"title": ["Graph neural networks"]}, {"title": ["Traffic forecasting"]}, {}]
+    assert title_score(items, "Graph neural networks for traffic forecasting") == 0.5
+    assert title_score(items, "Quantum chromodynamics") == 0
+    assert title_score([], "Graph neural networks") == 0
+
+
+@pytest.mark.works(WORKS)
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_resolve_bibtex_keeps_entry_order(crossref, max_workers):
+    text = bibtex(("a", ENERGY, "Roe, Richard"), ("b", "No such work anywhere", "Doe, Jane"), ("c", GRAPHS, "Doe, Jane"))
+    text += "@article{d,\n  title = {Ignored},\n  doi = {10.1/graphs}\n}\n"
+    with DOIFinder(base_url=crossref.url) as finder:
+        resolutions = finder.resolve_bibtex(text, max_workers=max_workers)
+    assert [resolution.key for resolution in resolutions] == ["a", "b", "c", "d"]
+    assert [resolution.doi for resolution in resolutions] == ["10.1/energy", None, "10.1/graphs", "10.1/graphs"]
+    assert [resolution.source for resolution in resolutions] == ["search", None, "search", "doi"]
+
+
+@pytest.mark.works(WORKS)
+def test_dois_are_fetched_in_batches(crossref):
+    with DOIFinder(base_url=crossref.url) as finder:
+        infos = finder.find_article_info_by_dois(["10.1/graphs", "10.1/energy", "10.1/unknown"])
+    assert [info.doi if info else None for info in infos] == ["10.1/graphs", "10.1/energy", None]
+    assert crossref.requests == 1
+
+
+@pytest.mark.works(WORKS)
+def test_async_resolve_matches_sync(crossref):
+    pytest.importorskip("aiohttp")
+    from find_doi import AsyncDOIFinder
+
+    text = bibtex(("a", ENERGY, "Roe, Richard"), ("b", GRAPHS, "Doe, Jane"))
+
+    async def resolve():
+        async with AsyncDOIFinder(base_url=crossref.url) as finder:
+            return await finder.resolve_bibtex(text)
+
+    with DOIFinder(base_url=crossref.url) as finder:
+        expected = finder.resolve_bibtex(text)
+    assert [(r.key, r.doi, r.status) for r in asyncio.run(resolve())] == \
+        [(r.key, r.doi, r.status) for r in expected]
+
+
+def test_finder_sizes_and_closes_its_own_pool():
+    finder = DOIFinder(pool_size=32)
+    adapter = finder.session.get_adapter("https://api.crossref.org")
+    assert adapter._pool_maxsize == 32
+    finder.close()
+    assert not adapter.poolmanager.pools
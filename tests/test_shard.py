@@ -0,0 +1,68 @@
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from find_doi.resilience import deadline
+from find_doi.metrics import Metrics
+from find_doi.shard import expand_inputs, iter_resolve_files
+
+from .conftest import bibtex, make_work
+
+GRAPHS = "Graph neural networks for traffic forecasting"
+ENERGY = "Renewable energy and sustainable development"
+WORKS = [make_work("10.1/graphs", GRAPHS), make_work("10.1/energy", ENERGY)]
+
+
+@pytest.fixture
+def bibs(tmp_path):
+    paths = []
+    for number, title in enumerate((GRAPHS, ENERGY)):
+        path = tmp_path / f"refs{number}.bib"
+        path.write_text(bibtex((f"k{number}", title, "Doe, Jane"), (f"u{number}", "No such work anywhere", "Doe, Jane")))
+        paths.append(str(path))
+    return paths
+
+
+def test_inputs_expand_to_each_file_once(tmp_path):
+    for name in ("b.bib", "a.bib", "sub/c.bib", "sub/notes.txt"):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text("")
+    directory = str(tmp_path)
+    assert expand_inputs([directory, str(tmp_path / "a.bib"), str(tmp_path / "*" / "*.bib")]) == \
+        [str(tmp_path / name) for name in ("a.bib", "b.bib", "sub/c.bib")]
+
+
+@pytest.mark.works(WORKS)
+def test_files_are_resolved_in_input_order(crossref, bibs):
+    metrics = Metrics()
+    results = list(iter_resolve_files(bibs + [bibs[0] + ".missing"], processes=2, max_queries=1, metrics=metrics,
+                                      base_url=crossref.url))
+    assert [(path, resolution.key, resolution.doi) for path, resolution in results[:4]] == [
+        (bibs[0], "k0", "10.1/graphs"), (bibs[0], "u0", None),
+        (bibs[1], "k1", "10.1/energy"), (bibs[1], "u1", None)]
+    # A file that cannot be read is one failed result
+    assert results[4][1].status == "error" and len(results) == 5
+    # The metrics of every worker are merged
+    assert metrics.total("lookups_total", result="found") == 2
+    assert metrics.total("http_requests_total") == crossref.requests
+
+
+@pytest.mark.works(WORKS)
+def test_the_deadline_applies_in_the_workers(crossref, bibs):
+    with deadline(0.0001):
+        results = list(iter_resolve_files(bibs, processes=1, base_url=crossref.url, cache=None))
+    assert len(results) == 4
+    assert all(resolution.status == "error" for _, resolution in results)
+    assert crossref.requests == 0
+
+
+@pytest.mark.works(WORKS)
+def test_workers_close_their_cache(crossref, bibs, tmp_path):
+    cache = str(tmp_path / "lookups.sqlite")
+    for _ in range(2):
+        results = list(iter_resolve_files(bibs, processes=2, base_url=crossref.url, cache=cache, max_queries=1))
+    assert [resolution.source for _, resolution in results] == ["cache"] * 4
+    # The access times of the second run were buffered and only written when the workers closed the cache
+    with closing(sqlite3.connect(cache)) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM lookups WHERE accessed > created").fetchone()[0] > 0
@@ -0,0 +1,44 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from find_doi import AsyncDOIFinder, DOIFinder
+from find_doi.errors import DeadlineExceeded
+from find_doi.mockserver import MockCrossRefServer
+
+from .conftest import make_work
+
+GRAPHS = "Graph neural networks for traffic forecasting"
+WORKS = [make_work("10.1/graphs", GRAPHS)]
+CITED = "".join("@article{cited%d,\n  doi = {10.1/GRAPHS}\n}\n\n" % number for number in range(5))
+
+
+def test_concurrent_lookups_of_a_title_share_one_search():
+    with MockCrossRefServer(WORKS, latency=0.2) as server, \
+            DOIFinder(base_url=server.url, max_queries=1) as finder, ThreadPoolExecutor(5) as pool:
+        dois = list(pool.map(lambda _: finder.find_by_metadata(GRAPHS), range(5)))
+        assert dois == ["10.1/graphs"] * 5
+        assert server.requests == 1
+        assert finder.metrics.value("singleflight_shared") == 4
+
+
+def test_concurrent_async_lookups_of_a_doi_share_one_request():
+    async def lookup(server):
+        async with AsyncDOIFinder(base_url=server.url) as finder:
+            return await finder.find_article_info_from_bibtex(CITED), finder.metrics.value("singleflight_shared")
+
+    with MockCrossRefServer(WORKS, latency=0.2) as server:
+        article_infos, shared = asyncio.run(lookup(server))
+        assert [info.doi for info in article_infos] == ["10.1/graphs"] * 5
+        assert server.requests == 1
+        assert shared == 4
+
+
+def test_async_doi_lookups_keep_the_call_deadline():
+    async def lookup(server):
+        async with AsyncDOIFinder(base_url=server.url, call_deadline=0.05) as finder:
+            return await finder.find_article_info_from_bibtex(CITED)
+
+    with MockCrossRefServer(WORKS, latency=0.5) as server, pytest.raises(DeadlineExceeded):
+        asyncio.run(lookup(server))
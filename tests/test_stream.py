@@ -0,0 +1,55 @@
+import pytest
+
+from find_doi import DOIFinder
+from find_doi.bibtex import iter_bibtex_entries
+
+from .conftest import bibtex, make_work
+
+GRAPHS = "Graph neural networks for traffic forecasting"
+ENERGY = "Renewable energy and sustainable development"
+WORKS = [make_work("10.1/graphs", GRAPHS), make_work("10.1/energy", ENERGY)]
+WITH_DOI = "@article{cited,\n  title = {%s},\n  doi = {10.1/energy}\n}\n\n" % ENERGY
+
+
+def test_entries_are_parsed_while_the_source_is_read():
+    read = []
+
+    def lines():
+        for number in range(1000):
+            read.append(number)
+            yield "@article{e%d,\n  title = {Title %d},\n  journal = J\n}\n" % (number, number)
+
+    entries = iter_bibtex_entries(lines(), batch_size=10)
+    first = next(entries)
+    assert first.key == "e0"
+    # Only the first batch has been read
+    assert len(read) <= 11
+    assert sum(1 for _ in entries) == 999
+
+
+def test_string_definitions_apply_to_later_batches():
+    text = "@string{j = {Journal of Tests}}\n" + "".join(
+        "@article{e%d, title = {Title %d}, journal = j}\n" % (number, number) for number in range(5))
+    assert {entry["journal"] for entry in iter_bibtex_entries(text, batch_size=2)} == {"Journal of Tests"}
+
+
+@pytest.mark.works(WORKS)
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_iter_resolve_keeps_input_order(crossref, max_workers):
+    text = bibtex(*[(f"k{number}", (GRAPHS, ENERGY, "Unknown work")[number % 3], "Doe, Jane") for number in range(12)])
+    with DOIFinder(base_url=crossref.url, max_queries=1) as finder:
+        resolutions = list(finder.iter_resolve_bibtex(text, max_workers=max_workers))
+    assert [resolution.key for resolution in resolutions] == [f"k{number}" for number in range(12)]
+    assert [resolution.doi for resolution in resolutions] == ["10.1/graphs", "10.1/energy", None] * 4
+
+
+@pytest.mark.works(WORKS)
+def test_dois_of_entries_are_only_fetched_for_article_information(crossref):
+    text = WITH_DOI + bibtex(("a", GRAPHS, "Doe, Jane"))
+    with DOIFinder(base_url=crossref.url) as finder:
+        dois = list(finder.iter_resolve_bibtex(text, fetch_dois=False))
+        assert crossref.requests == 1
+        infos = list(finder.iter_resolve_bibtex(text))
+    assert [(r.key, r.doi, r.source) for r in dois] == [("cited", "10.1/energy", "bibtex"), ("a", "10.1/graphs", "search")]
+    assert infos[0].article_info.title == ENERGY
+    assert crossref.requests == 3
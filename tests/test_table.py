@@ -0,0 +1,50 @@
+import csv
+import io
+
+import pytest
+
+from find_doi import ArticleInfo, Resolution
+from find_doi.table import ResultTable
+
+INFO = ArticleInfo(doi="10.1/graphs", title="Graph neural networks", authors=["Jane Doe", "Richard Roe"], year=2020)
+RESOLUTIONS = [
+    Resolution(doi="10.1/graphs", article_info=INFO, source="search", key="a", requests=1),
+    Resolution(key="b", requests=3),
+    Resolution(key="c", error="503 Service Unavailable", requests=1),
+]
+
+
+def test_article_info_has_no_instance_dict():
+    assert not hasattr(INFO, "__dict__")
+    with pytest.raises(AttributeError):
+        INFO.extra = 1
+
+
+def test_columns_are_filled_from_resolutions():
+    table = ResultTable.from_resolutions(iter(RESOLUTIONS), columns=("key", "doi", "authors", "status", "file"))
+    assert len(table) == 3
+    assert table.column("status") == ["found", "miss", "error"]
+    assert table.row(0) == {"key": "a", "doi": "10.1/graphs", "authors": ["Jane Doe", "Richard Roe"],
+                            "status": "found", "file": None}
+    assert [row["key"] for row in table] == ["a", "b", "c"]
+    with pytest.raises(ValueError):
+        ResultTable(columns=("key", "colour"))
+
+
+def test_csv_joins_authors_and_leaves_missing_values_empty():
+    output = io.StringIO()
+    ResultTable.from_resolutions(RESOLUTIONS, columns=("key", "doi", "authors", "year", "error")).to_csv(output)
+    assert list(csv.reader(io.StringIO(output.getvalue()))) == [
+        ["key", "doi", "authors", "year", "error"],
+        ["a", "10.1/graphs", "Jane Doe; Richard Roe", "2020", ""],
+        ["b", "", "", "", ""],
+        ["c", "", "", "", "503 Service Unavailable"],
+    ]
+
+
+def test_arrow_keeps_authors_as_lists():
+    pyarrow = pytest.importorskip("pyarrow")
+    table = ResultTable.from_article_infos([INFO, None], columns=("doi", "authors", "year")).to_arrow()
+    assert table.schema.field("authors").type == pyarrow.list_(pyarrow.string())
+    assert table.to_pydict() == {"doi": ["10.1/graphs", None], "authors": [["Jane Doe", "Richard Roe"], None],
+                                 "year": [2020, None]}
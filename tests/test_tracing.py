@@ -0,0 +1,95 @@
+import json
+import sys
+import threading
+
+import pytest
+
+from find_doi import DOIFinder, cli
+from find_doi.profiling import SamplingProfiler
+from find_doi.tracing import NullTracer, Tracer
+
+from .conftest import bibtex, make_work
+
+GRAPHS = "Graph neural networks for traffic forecasting"
+WORKS = [make_work("10.1/graphs", GRAPHS)]
+TEXT = bibtex(("a", GRAPHS, "Doe, Jane"), ("b", "No such work anywhere", "Doe, Jane"))
+
+
+@pytest.mark.works(WORKS)
+def test_stages_nest_under_the_entry_on_worker_threads(crossref):
+    tracer = Tracer()
+    with DOIFinder(base_url=crossref.url, tracer=tracer) as finder:
+        finder.resolve_bibtex(TEXT, max_workers=2)
+    spans = {span.span_id: span for span in tracer.spans}
+    entries = {span.attributes["key"]: span for span in spans.values() if span.name == "entry"}
+    assert sorted(entries) == ["a", "b"]
+    for entry in entries.values():
+        stages = [span for span in spans.values() if span.trace_id == entry.trace_id and span is not entry]
+        assert {"resolve", "search", "http_request", "match"} <= {span.name for span in stages}
+        # Every stage hangs off another span of the same entry
+        assert all(span.parent_id in spans for span in stages)
+    assert entries["a"].trace_id != entries["b"].trace_id
+
+
+def test_exports_keep_parents_and_errors():
+    tracer = Tracer()
+    with tracer.span("entry", key="a"):
+        with pytest.raises(ValueError), tracer.span("decode"):
+            raise ValueError("bad JSON")
+    chrome = tracer.to_chrome()["traceEvents"]
+    assert chrome[0] == {"name": "thread_name", "ph": "M", "pid": chrome[1]["pid"], "tid": 1,
+                         "args": {"name": "entry a"}}
+    assert [(event["name"], event["args"].get("error")) for event in chrome[1:]] == \
+        [("entry", None), ("decode", "ValueError: bad JSON")]
+    entry, decode = tracer.to_otlp()["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert decode["parentSpanId"] == entry["spanId"] and "parentSpanId" not in entry
+    assert decode["status"] == {"code": 2, "message": "ValueError: bad JSON"}
+    with pytest.raises(ValueError):
+        tracer.write(sys.stdout, format="svg")
+
+
+def test_spans_past_max_spans_are_counted():
+    tracer = Tracer(max_spans=2)
+    for _ in range(3):
+        with tracer.span("entry"):
+            pass
+    assert (len(tracer.spans), tracer.dropped) == (2, 1)
+    null = NullTracer()
+    with null.span("entry") as span:
+        span.set(key="a")
+    assert null.spans == []
+
+
+def test_profiler_samples_worker_threads(tmp_path):
+    done = threading.Event()
+
+    def busy_lookup():
+        while not done.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_lookup, name="lookup-3")
+    with SamplingProfiler(interval=0.001) as profiler:
+        worker.start()
+        done.wait(0.2)
+        done.set()
+        worker.join()
+    assert profiler.samples > 0
+    assert "busy_lookup" in profiler.report()
+    profiler.write_collapsed(str(tmp_path / "stacks.folded"))
+    lines = (tmp_path / "stacks.folded").read_text().splitlines()
+    # Pool threads are merged under their name without the number
+    assert any(line.startswith("lookup;") and "busy_lookup" in line for line in lines)
+
+
+@pytest.mark.works(WORKS)
+def test_cli_writes_trace_and_profile(crossref, tmp_path, monkeypatch):
+    bib = tmp_path / "refs.bib"
+    bib.write_text(TEXT)
+    monkeypatch.setattr(sys, "argv", ["find-doi", "bibtex", str(bib), "--api-url", crossref.url, "--csv",
+                                      str(tmp_path / "out.csv"), "--trace", str(tmp_path / "out.trace.json"),
+                                      "--trace-format", "otlp", "--profile"])
+    cli.main()
+    trace = json.loads((tmp_path / "out.trace.json").read_text())
+    names = {span["name"] for span in trace["resourceSpans"][0]["scopeSpans"][0]["spans"]}
+    assert {"entry", "search", "http_request"} <= names
+    assert (tmp_path / "out.profile.txt").read_text().startswith("Profiled ")
@@ -0,0 +1,92 @@
+import pytest
+
+from find_doi import DOIFinder
+from find_doi.writeback import default_state_path, insert_doi, write_back
+
+from .conftest import make_work
+
+GRAPHS = "Graph neural networks for traffic forecasting"
+ENERGY = "Renewable energy and sustainable development"
+WORKS = [make_work("10.1/graphs", GRAPHS), make_work("10.1/energy", ENERGY)]
+
+BIB = f"""% Bibliography under version control
+
+@article{{graphs,
+    title     = {{{GRAPHS}}},
+    author    = {{Doe, Jane}}
+}}
+
+@book{{thesis, title = {{A thesis nobody indexed}}, author = {{Doe, Jane}}}}
+
+@article{{known,
+  title = {{{ENERGY}}},
+  doi = {{10.1/energy}}
+}}
+"""
+
+
+def test_insert_doi_copies_the_entry_layout():
+    block = "@article{a,\n    title     = {T},\n    year      = 2020,\n}\n\n"
+    assert insert_doi(block, "10.1/x") == \
+        "@article{a,\n    title     = {T},\n    year      = 2020,\n    doi     = {10.1/x},\n}\n\n"
+    assert insert_doi("@misc{b, title = {T}}", "10.1/y") == "@misc{b, title = {T}, doi = {10.1/y}}"
+    assert insert_doi("@misc{c, title = {T}", "10.1/z") is None
+
+
+@pytest.mark.works(WORKS)
+def test_write_back_inserts_dois_and_keeps_the_rest(crossref, tmp_path):
+    path = tmp_path / "refs.bib"
+    path.write_text(BIB)
+    with DOIFinder(base_url=crossref.url) as finder:
+        result = write_back(finder, str(path))
+    assert (result.inserted, result.unchanged, result.failed) == (1, 0, 0)
+    assert [resolution.key for resolution in result.resolutions] == ["graphs", "thesis"]
+    assert path.read_text() == BIB.replace("    author    = {Doe, Jane}\n",
+                                           "    author    = {Doe, Jane},\n    doi     = {10.1/graphs}\n")
+
+
+@pytest.mark.works(WORKS)
+def test_rerun_only_looks_up_edited_entries(crossref, tmp_path):
+    path = tmp_path / "refs.bib"
+    path.write_text(BIB)
+    with DOIFinder(base_url=crossref.url) as finder:
+        write_back(finder, str(path))
+        first = crossref.requests
+        rerun = write_back(finder, str(path))
+        assert crossref.requests == first
+        assert (rerun.resolutions, rerun.unchanged) == ([], 3)
+        path.write_text(path.read_text().replace("A thesis nobody indexed", GRAPHS))
+        edited = write_back(finder, str(path))
+    assert [resolution.key for resolution in edited.resolutions] == ["thesis"]
+    assert edited.inserted == 1
+    assert (tmp_path / "refs.find-doi.json").exists()
+    assert default_state_path(str(path)) == str(tmp_path / "refs.find-doi.json")
+
+
+def test_failed_lookups_are_retried(tmp_path):
+    from find_doi.mockserver import MockCrossRefServer
+
+    path = tmp_path / "refs.bib"
+    path.write_text(BIB)
+    with MockCrossRefServer(WORKS, error_rate=1.0) as server, \
+            DOIFinder(base_url=server.url, transient_retries=0) as finder:
+        failed = write_back(finder, str(path))
+        assert (failed.inserted, failed.failed) == (0, 2)
+        assert path.read_text() == BIB
+    with MockCrossRefServer(WORKS) as server, DOIFinder(base_url=server.url) as finder:
+        retried = write_back(finder, str(path))
+    assert [resolution.key for resolution in retried.resolutions] == ["graphs", "thesis"]
+    assert retried.inserted == 1
+
+
+@pytest.mark.works(WORKS)
+def test_misses_are_looked_up_again_after_negative_ttl(crossref, tmp_path):
+    path = tmp_path / "refs.bib"
+    path.write_text(BIB)
+    with DOIFinder(base_url=crossref.url) as finder:
+        write_back(finder, str(path))
+        fresh = write_back(finder, str(path))
+        assert fresh.resolutions == []
+        expired = write_back(finder, str(path), negative_ttl=0)
+    assert [resolution.key for resolution in expired.resolutions] == ["thesis"]
+    assert expired.unchanged == 2